@@ -0,0 +1,93 @@
+# apache_monitor/checkpoint.py
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger("Checkpoint")
+
+DEFAULT_CHECKPOINT_PATH = "logs/tail_checkpoint.json"
+
+
+class CheckpointStore:
+    """
+    Simpan checkpoint tail (inode, offset) per file ke disk.
+
+    Ditulis atomik (file sementara + fsync + rename) setiap `every_lines` baris
+    atau `every_seconds` detik, supaya restart tidak membaca ulang log dari awal.
+    """
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH, every_lines=1000, every_seconds=5):
+        self.path = path
+        self.every_lines = every_lines
+        self.every_seconds = every_seconds
+        self.state = self._load()
+        self._pending_lines = 0
+        self._last_flush = time.monotonic()
+        self._dirty = False
+
+    @classmethod
+    def from_config(cls, config):
+        path = config.get("tail_checkpoint_path", DEFAULT_CHECKPOINT_PATH)
+        if not path:
+            return None
+        return cls(
+            path,
+            every_lines=config.get("tail_checkpoint_lines", 1000),
+            every_seconds=config.get("tail_checkpoint_seconds", 5),
+        )
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if isinstance(state, dict):
+                return state
+            logger.warning(f"Checkpoint {self.path} tidak valid, diabaikan")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Gagal membaca checkpoint {self.path}: {e}")
+        return {}
+
+    def get(self, path):
+        """Return (inode, offset) tersimpan untuk path, atau None."""
+        entry = self.state.get(path)
+        if not entry:
+            return None
+        return entry.get("inode"), entry.get("offset", 0)
+
+    def update(self, path, inode, offset, lines=0):
+        entry = self.state.get(path)
+        if entry is None or entry.get("inode") != inode or entry.get("offset") != offset:
+            self.state[path] = {"inode": inode, "offset": offset}
+            self._dirty = True
+        self._pending_lines += lines
+
+    def maybe_flush(self):
+        if not self._dirty:
+            return False
+        if self._pending_lines >= self.every_lines or time.monotonic() - self._last_flush >= self.every_seconds:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Gagal menyimpan checkpoint {self.path}: {e}")
+            return
+        self._dirty = False
+        self._pending_lines = 0
+        self._last_flush = time.monotonic()
@@ -1,15 +1,297 @@
 import sqlite3
 import os
+import time
+import queue
+import atexit
+import logging
+import threading
 from datetime import datetime
-from .utils import sha256sum
 
 DB_PATH = "logs/alerts.db"
 
-def init_db():
-    os.makedirs("logs", exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+logger = logging.getLogger("DB")
+
+WRITER_BATCH_SIZE = 500
+WRITER_FLUSH_INTERVAL = 0.2  # detik, jeda maksimum sebelum batch di-commit
+WRITER_MAX_QUEUE = 100000
+WRITER_STATS_INTERVAL = 60  # detik, log statistik writer secara periodik
+BUSY_TIMEOUT_MS = 5000
+INTERN_CACHE_SIZE = 100000  # id path/user agent yang diingat writer
+SQL_MAX_PARAMS = 500  # batas parameter per query IN (...)
+
+def connect(path=None):
+    """Koneksi SQLite dengan busy_timeout (reader tidak langsung gagal saat writer commit)."""
+    conn = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+class DBWriter:
+    """
+    Satu thread penulis dengan koneksi WAL yang hidup lama.
+
+    Caller hanya memasukkan (sql, params) ke antrian tanpa blok; thread writer
+    mengambil sampai `batch_size` item sekaligus, mengelompokkan per statement
+    dan menjalankan `executemany` dalam satu transaksi (group commit), sehingga
+    fsync terjadi per batch, bukan per baris. Jika antrian penuh, item dibuang
+    dan dihitung di `dropped` daripada memblok thread log/watchdog. Jika
+    transaksi batch gagal, batch diulang per statement lalu per baris, dan
+    hanya baris yang tetap gagal yang dibuang (dihitung di `failed_rows`).
+
+    Alert IP diantrikan lewat `submit_alert` dan ditulis per batch: path dan
+    user agent di-intern ke tabel kamus (id-nya di-cache di writer), lalu
+    relasi alert -> path masuk ke `alert_paths` dengan satu `executemany`.
+    """
+
+    def __init__(self, path, batch_size=WRITER_BATCH_SIZE, flush_interval=WRITER_FLUSH_INTERVAL,
+                 max_queue=WRITER_MAX_QUEUE):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.rows = 0
+        self.commits = 0
+        self.errors = 0
+        self.dropped = 0
+        self.failed_rows = 0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self._total_commit_ms = 0.0
+        self._next_stats = time.monotonic() + WRITER_STATS_INTERVAL
+        self._ids = {"paths": {}, "user_agents": {}}
+        self._stop = object()
+        self._thread = threading.Thread(target=self._run, name="DBWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params):
+        """Antrikan satu INSERT; tidak pernah blok. Return False jika antrian penuh."""
+        try:
+            self.queue.put_nowait((sql, params))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Antrian DB penuh, {self.dropped} baris dibuang")
+            return False
+
+    def submit_alert(self, ip, hits, paths, user_agent, example_entry):
+        """Antrikan satu alert IP beserta daftar path-nya; tidak pernah blok."""
+        return self.submit(_ALERT, (ip, hits, tuple(dict.fromkeys(paths)), user_agent, example_entry))
+
+    def _intern(self, conn, table, column, values):
+        """Return {nilai: id} untuk `values`, menambah baris baru ke tabel kamus bila perlu."""
+        cache = self._ids[table]
+        missing = [v for v in values if v not in cache]
+        if missing and len(cache) + len(missing) > INTERN_CACHE_SIZE:
+            # Kosongkan dulu, lalu ambil ulang semua `values` (bukan hanya yang belum ada)
+            cache.clear()
+            missing = list(values)
+        if missing:
+            conn.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", ((v,) for v in missing))
+            for i in range(0, len(missing), SQL_MAX_PARAMS):
+                chunk = missing[i:i + SQL_MAX_PARAMS]
+                marks = ",".join("?" * len(chunk))
+                cache.update(conn.execute(f"SELECT {column}, id FROM {table} WHERE {column} IN ({marks})", chunk))
+        return {v: cache[v] for v in values}
+
+    def _insert_alerts(self, conn, rows):
+        path_ids = self._intern(conn, "paths", "path", list({p for row in rows for p in row[2]}))
+        ua_ids = self._intern(conn, "user_agents", "user_agent", list({row[3] for row in rows if row[3]}))
+        links = []
+        for ip, hits, paths, user_agent, example_entry in rows:
+            alert_id = conn.execute(
+                "INSERT INTO ip_alerts (ip, hits, user_agent_id, example_entry) VALUES (?, ?, ?, ?)",
+                (ip, hits, ua_ids.get(user_agent), example_entry),
+            ).lastrowid
+            links.extend((alert_id, path_ids[path], position) for position, path in enumerate(paths))
+        conn.executemany("INSERT INTO alert_paths (alert_id, path_id, position) VALUES (?, ?, ?)", links)
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _execute(self, conn, runs):
+        with conn:
+            for sql, rows in runs:
+                if sql is _ALERT:
+                    self._insert_alerts(conn, rows)
+                else:
+                    conn.executemany(sql, rows)
+
+    def _rollback(self, e, what):
+        # `with conn` sudah rollback; id kamus dari transaksi itu tidak valid lagi
+        for cache in self._ids.values():
+            cache.clear()
+        logger.error(f"Gagal commit {what} ke DB: {e}", exc_info=not isinstance(e, sqlite3.Error))
+
+    def _retry(self, conn, runs):
+        """Ulangi batch yang gagal per statement lalu per baris; hanya baris yang tetap gagal dibuang."""
+        for sql, rows in runs:
+            if len(runs) > 1:
+                try:
+                    self._execute(conn, [(sql, rows)])
+                    continue
+                except Exception as e:
+                    self._rollback(e, f"{len(rows)} baris satu statement")
+            if len(rows) == 1:
+                # Baris ini sudah gagal sendirian
+                self.failed_rows += 1
+                continue
+            for row in rows:
+                try:
+                    self._execute(conn, [(sql, [row])])
+                except Exception as e:
+                    self._rollback(e, "1 baris (dibuang)")
+                    self.failed_rows += 1
+
+    def _commit(self, conn, batch):
+        # Kelompokkan statement yang berurutan saja supaya urutan antar
+        # statement (mis. delete lalu upsert path yang sama) tetap terjaga
+        runs = []
+        for sql, params in batch:
+            if runs and runs[-1][0] == sql:
+                runs[-1][1].append(params)
+            else:
+                runs.append((sql, [params]))
+        started = time.perf_counter()
+        failed_before = self.failed_rows
+        try:
+            self._execute(conn, runs)
+        except Exception as e:
+            self.errors += 1
+            self._rollback(e, f"{len(batch)} baris")
+            # Batch berisi baris dari banyak caller (alert, fs_events, baseline):
+            # jangan buang semuanya karena satu baris rusak
+            self._retry(conn, runs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.rows += len(batch) - (self.failed_rows - failed_before)
+        self.commits += 1
+        self.last_commit_ms = elapsed_ms
+        self.max_commit_ms = max(self.max_commit_ms, elapsed_ms)
+        self._total_commit_ms += elapsed_ms
+
+    def _run(self):
+        conn = connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            running = True
+            while running:
+                rows, events = [], []
+                for item in self._drain(self.queue.get()):
+                    if item is self._stop:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        events.append(item)
+                    else:
+                        rows.append(item)
+                if rows:
+                    try:
+                        self._commit(conn, rows)
+                        if time.monotonic() >= self._next_stats:
+                            self._next_stats = time.monotonic() + WRITER_STATS_INTERVAL
+                            logger.info(f"DB writer: {self.stats()}")
+                    except Exception as e:
+                        # Thread writer hanya satu: jangan sampai mati dan membuat antrian tertahan
+                        self.errors += 1
+                        logger.error(f"DB writer error: {e}", exc_info=True)
+                # Penanda flush() baru di-set setelah baris sebelumnya ter-commit
+                for event in events:
+                    event.set()
+                if running and not events and self.flush_interval and self.queue.qsize() < self.batch_size:
+                    # Beri waktu item berikutnya terkumpul supaya commit berikutnya lebih besar
+                    time.sleep(self.flush_interval)
+        finally:
+            conn.close()
+
+    def flush(self, timeout=10):
+        """Tunggu sampai semua item yang sudah diantrikan ter-commit."""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        self.queue.put(self._stop)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "rows": self.rows,
+            "commits": self.commits,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "failed_rows": self.failed_rows,
+            "last_commit_ms": round(self.last_commit_ms, 2),
+            "avg_commit_ms": round(self._total_commit_ms / self.commits, 2) if self.commits else 0.0,
+            "max_commit_ms": round(self.max_commit_ms, 2),
+        }
+
+# Penanda item alert di antrian writer (lihat DBWriter.submit_alert)
+_ALERT = object()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Return DBWriter untuk DB_PATH aktif (dibuat saat pertama dipakai)."""
+    global _writer
+    writer = _writer
+    if writer is not None and writer.path == DB_PATH:
+        return writer
+    with _writer_lock:
+        if _writer is not None and _writer.path != DB_PATH:
+            # DB_PATH diganti (mis. benchmark/test): selesaikan writer lama dulu
+            _writer.close()
+            _writer = None
+        if _writer is None:
+            _writer = DBWriter(DB_PATH)
+        return _writer
+
+def flush_writes(timeout=10):
+    """Tunggu antrian insert ter-commit (dipakai sebelum membaca data yang baru ditulis)."""
+    if _writer is not None:
+        return _writer.flush(timeout)
+    return True
+
+def close_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+def writer_stats():
+    """Kedalaman antrian, jumlah commit dan latensi commit writer DB (None jika belum aktif)."""
+    return _writer.stats() if _writer is not None else None
+
+atexit.register(close_writer)
+
+def _backfill_alert_paths(conn):
+    """Pindahkan kolom lama ip_alerts.paths (dipisah koma) ke paths + alert_paths."""
+    rows = conn.execute("SELECT id, paths FROM ip_alerts WHERE paths IS NOT NULL AND paths != ''").fetchall()
+    links = []
+    for alert_id, joined in rows:
+        for position, path in enumerate(dict.fromkeys(joined.split(","))):
+            links.append((alert_id, path, position))
+    conn.executemany("INSERT OR IGNORE INTO paths (path) VALUES (?)", ((path,) for _, path, _ in links))
+    conn.executemany(
+        "INSERT OR IGNORE INTO alert_paths (alert_id, path_id, position) "
+        "SELECT ?, id, ? FROM paths WHERE path = ?",
+        ((alert_id, position, path) for alert_id, path, position in links),
+    )
+    conn.execute("UPDATE ip_alerts SET paths = NULL WHERE paths IS NOT NULL")
+
+# Migrasi skema berurutan; versi tersimpan di PRAGMA user_version.
+# DB lama (user_version 0) sudah punya tabel versi 1, jadi semua CREATE
+# memakai IF NOT EXISTS dan migrasi aman dijalankan ulang.
+MIGRATIONS = [
+    (1, [
+        """
         CREATE TABLE IF NOT EXISTS ip_alerts (
             id INTEGER PRIMARY KEY,
             ip TEXT NOT NULL,
@@ -18,8 +300,8 @@ def init_db():
             example_entry TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
-    """)
-    c.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS fs_events (
             id INTEGER PRIMARY KEY,
             event_type TEXT,
@@ -30,86 +312,363 @@ def init_db():
             checksum TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
-    """)
-    c.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS notifications_sent (
             id INTEGER PRIMARY KEY,
             target TEXT,
             message TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
-    """)
-    conn.commit()
-    conn.close()
+        """,
+    ]),
+    (2, [
+        # State terakhir per path: pengganti scan MAX(id) GROUP BY di fs_events
+        """
+        CREATE TABLE IF NOT EXISTS file_state (
+            path TEXT PRIMARY KEY,
+            is_dir INTEGER NOT NULL DEFAULT 0,
+            size INTEGER,
+            mtime REAL,
+            checksum TEXT,
+            last_event TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_fs_events_path ON fs_events(path)",
+        "CREATE INDEX IF NOT EXISTS idx_fs_events_timestamp ON fs_events(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_ip_alerts_ip_timestamp ON ip_alerts(ip, timestamp)",
+        # Isi awal dari riwayat yang sudah ada (event terakhir per path, kecuali yang terhapus)
+        """
+        INSERT OR REPLACE INTO file_state (path, is_dir, size, mtime, checksum, last_event, updated_at)
+        SELECT path, event_type = 'dir_created', size, mtime, checksum, event_type, timestamp
+        FROM fs_events
+        WHERE id IN (SELECT MAX(id) FROM fs_events GROUP BY path) AND event_type != 'deleted'
+        """,
+    ]),
+    (3, [
+        # Agregat per jam/hari untuk data mentah yang sudah melewati retensi
+        """
+        CREATE TABLE IF NOT EXISTS ip_alert_rollup (
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            ip TEXT NOT NULL,
+            alerts INTEGER NOT NULL DEFAULT 0,
+            hits INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket, ip)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS fs_event_rollup (
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            path_prefix TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            events INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket, path_prefix, event_type)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS notification_rollup (
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            target TEXT NOT NULL,
+            messages INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket, target)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_notifications_sent_timestamp ON notifications_sent(timestamp)",
+    ]),
+    (4, [
+        # Kamus path/user agent: URL scanner yang sama ditulis ribuan kali
+        "CREATE TABLE IF NOT EXISTS paths (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS user_agents (id INTEGER PRIMARY KEY, user_agent TEXT NOT NULL UNIQUE)",
+        """
+        CREATE TABLE IF NOT EXISTS alert_paths (
+            alert_id INTEGER NOT NULL,
+            path_id INTEGER NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (alert_id, path_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_alert_paths_path ON alert_paths(path_id, alert_id)",
+        "ALTER TABLE ip_alerts ADD COLUMN user_agent_id INTEGER",
+        _backfill_alert_paths,
+    ]),
+    (5, [
+        # Index covering untuk laporan per rentang waktu (reports.py): GROUP BY
+        # ip / event_type / path cukup membaca index tanpa menyentuh tabel
+        "CREATE INDEX IF NOT EXISTS idx_ip_alerts_timestamp_cover ON ip_alerts(timestamp, ip, hits)",
+        "CREATE INDEX IF NOT EXISTS idx_fs_events_timestamp_cover ON fs_events(timestamp, event_type, path)",
+    ]),
+    (6, [
+        # Cache checksum per inode (hashcache.py): file hanya di-hash ulang jika
+        # size/mtime_ns/ctime_ns berubah
+        """
+        CREATE TABLE IF NOT EXISTS hash_cache (
+            dev INTEGER NOT NULL,
+            ino INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            ctime_ns INTEGER NOT NULL,
+            checksum TEXT NOT NULL,
+            verified_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (dev, ino)
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (7, [
+        # Digest Merkle per direktori (merkle.py): subtree yang digest-nya sama dilewati saat scan
+        "ALTER TABLE file_state ADD COLUMN digest TEXT",
+    ]),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
 
-def log_ip_alert(ip, hits, paths, example_entry):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO ip_alerts (ip, hits, paths, example_entry) VALUES (?, ?, ?, ?)",
-        (ip, hits, ",".join(paths), example_entry)
-    )
-    conn.commit()
+def migrate(conn):
+    """Jalankan migrasi yang belum diterapkan, masing-masing dalam satu transaksi."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        conn.execute("BEGIN")
+        try:
+            for step in statements:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        logger.info(f"Skema DB dimigrasi ke versi {target}")
+    return max(version, SCHEMA_VERSION)
+
+def ensure_incremental_vacuum(conn):
+    """
+    Aktifkan auto_vacuum=INCREMENTAL supaya retensi bisa mengembalikan halaman
+    kosong sedikit demi sedikit. DB baru cukup set pragma sebelum tabel dibuat;
+    DB lama butuh VACUUM penuh sekali.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    has_tables = conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]
+    if has_tables:
+        logger.info("Mengaktifkan auto_vacuum=INCREMENTAL (VACUUM sekali, bisa lama untuk DB besar)")
+        conn.execute("VACUUM")
+
+def init_db():
+    os.makedirs("logs", exist_ok=True)
+    conn = connect()
+    # Harus sebelum tabel pertama dibuat agar tidak perlu VACUUM
+    ensure_incremental_vacuum(conn)
+    # WAL: reader (get_baseline, laporan) tidak terblok oleh writer
+    conn.execute("PRAGMA journal_mode=WAL")
+    migrate(conn)
     conn.close()
 
+def log_ip_alert(ip, hits, paths, example_entry, user_agent=None):
+    """Catat alert IP; path dan user agent disimpan lewat tabel kamus (paths, user_agents)."""
+    get_writer().submit_alert(ip, hits, paths, user_agent, example_entry)
+
+_SELECT_ALERTS = """
+    SELECT a.id, a.ip, a.hits, a.example_entry, u.user_agent, a.timestamp
+    FROM ip_alerts a LEFT JOIN user_agents u ON u.id = a.user_agent_id
+"""
+
+def _alert_rows(conn, where, params, limit):
+    rows = conn.execute(f"{_SELECT_ALERTS} WHERE {where} ORDER BY a.id DESC LIMIT ?", params + (limit,)).fetchall()
+    alerts = [
+        {"id": r[0], "ip": r[1], "hits": r[2], "example_entry": r[3], "user_agent": r[4],
+         "timestamp": r[5], "paths": []}
+        for r in rows
+    ]
+    by_id = {a["id"]: a for a in alerts}
+    ids = list(by_id)
+    for i in range(0, len(ids), SQL_MAX_PARAMS):
+        chunk = ids[i:i + SQL_MAX_PARAMS]
+        marks = ",".join("?" * len(chunk))
+        for alert_id, path in conn.execute(
+            f"SELECT ap.alert_id, p.path FROM alert_paths ap JOIN paths p ON p.id = ap.path_id "
+            f"WHERE ap.alert_id IN ({marks}) ORDER BY ap.alert_id, ap.position",
+            chunk,
+        ):
+            by_id[alert_id]["paths"].append(path)
+    return alerts
+
+def alerts_for_path(path, since=None, limit=100):
+    """Alert terbaru yang mencakup `path` persis (mis. "/.env"), lewat index alert_paths."""
+    flush_writes()
+    conn = connect()
+    try:
+        row = conn.execute("SELECT id FROM paths WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return []
+        where = "a.id IN (SELECT alert_id FROM alert_paths WHERE path_id = ?)"
+        params = (row[0],)
+        if since:
+            where += " AND a.timestamp >= ?"
+            params += (since,)
+        return _alert_rows(conn, where, params, limit)
+    finally:
+        conn.close()
+
+def alerts_for_ip(ip, since=None, limit=100):
+    """Alert terbaru untuk satu IP (atau CIDR subnet alert), lewat index (ip, timestamp)."""
+    flush_writes()
+    conn = connect()
+    try:
+        where = "a.ip = ?"
+        params = (ip,)
+        if since:
+            where += " AND a.timestamp >= ?"
+            params += (since,)
+        return _alert_rows(conn, where, params, limit)
+    finally:
+        conn.close()
+
+_INSERT_FS_EVENT = "INSERT INTO fs_events (event_type, path, size, mtime, checksum) VALUES (?, ?, ?, ?, ?)"
+_UPSERT_FILE_STATE = """
+    INSERT INTO file_state (path, is_dir, size, mtime, checksum, last_event, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(path) DO UPDATE SET
+        is_dir = excluded.is_dir, size = excluded.size, mtime = excluded.mtime,
+        checksum = excluded.checksum, last_event = excluded.last_event, updated_at = excluded.updated_at
+"""
+_DELETE_FILE_STATE = "DELETE FROM file_state WHERE path = ?"
+
+def _file_state_row(event_type, path, size, mtime, checksum):
+    return (path, 1 if event_type == "dir_created" else 0, size, mtime, checksum, event_type)
+
 def log_fs_event(event_type, path, size, mtime, checksum):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO fs_events (event_type, path, size, mtime, checksum) VALUES (?, ?, ?, ?, ?)",
-        (event_type, path, size, mtime, checksum)
-    )
-    conn.commit()
-    conn.close()
+    """Catat event ke riwayat fs_events dan perbarui file_state untuk path tersebut."""
+    writer = get_writer()
+    writer.submit(_INSERT_FS_EVENT, (event_type, path, size, mtime, checksum))
+    if event_type == "deleted":
+        writer.submit(_DELETE_FILE_STATE, (path,))
+    else:
+        writer.submit(_UPSERT_FILE_STATE, _file_state_row(event_type, path, size, mtime, checksum))
+
+_UPSERT_DIR_DIGEST = """
+    INSERT INTO file_state (path, is_dir, size, mtime, checksum, last_event, digest, updated_at)
+    VALUES (?, 1, 0, ?, NULL, 'dir_created', ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(path) DO UPDATE SET
+        is_dir = 1, mtime = excluded.mtime, digest = excluded.digest, updated_at = excluded.updated_at
+"""
+
+def log_dir_digest(path, mtime, digest):
+    """Simpan digest Merkle terbaru sebuah direktori di file_state (tanpa baris fs_events)."""
+    get_writer().submit(_UPSERT_DIR_DIGEST, (path, mtime, digest))
 
 def log_notification(target, message):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
+    get_writer().submit(
         "INSERT INTO notifications_sent (target, message) VALUES (?, ?)",
         (target, message)
     )
-    conn.commit()
-    conn.close()
 
 def get_baseline():
     """Ambil snapshot terakhir dari semua path dan mtime/checksum."""
-    conn = sqlite3.connect(DB_PATH)
+    flush_writes()
+    conn = connect()
     c = conn.cursor()
-    c.execute("SELECT path, event_type, mtime, checksum FROM fs_events WHERE id IN (SELECT MAX(id) FROM fs_events GROUP BY path)")
-    rows = c.fetchall()
-    conn.close()
+    c.execute("SELECT path, is_dir, mtime, checksum FROM file_state")
     baseline = {}
-    for row in rows:
-        path, etype, mtime, checksum = row
-        baseline[path] = {"mtime": mtime, "checksum": checksum, "is_dir": etype == "dir_created"}
+    for path, is_dir, mtime, checksum in c:
+        baseline[path] = {"mtime": mtime, "checksum": checksum, "is_dir": bool(is_dir)}
+    conn.close()
     return baseline
 
-def save_baseline_snapshot(root_dir):
-    """Simpan snapshot awal semua file & folder ke DB (sekali saja)."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    for dirpath, dirnames, filenames in os.walk(root_dir, followlinks=False):
-        rel_dir = os.path.relpath(dirpath, root_dir)
-        if rel_dir == ".":
-            rel_dir = ""
-        # Simpan folder
-        mtime = os.path.getmtime(dirpath)
-        c.execute(
-            "INSERT INTO fs_events (event_type, path, size, mtime, checksum) VALUES (?, ?, ?, ?, ?)",
-            ("dir_created", rel_dir or ".", 0, mtime, None)
-        )
-        for f in filenames:
-            filepath = os.path.join(dirpath, f)
-            rel_path = os.path.relpath(filepath, root_dir)
-            try:
-                stat = os.stat(filepath)
-                checksum = sha256sum(filepath)
-                c.execute(
-                    "INSERT INTO fs_events (event_type, path, size, mtime, checksum) VALUES (?, ?, ?, ?, ?)",
-                    ("created", rel_path, stat.st_size, stat.st_mtime, checksum)
-                )
-            except (OSError, IOError):
-                continue
-    conn.commit()
-    conn.close()
\ No newline at end of file
+SNAPSHOT_BATCH_SIZE = 5000
+
+# Karakter sesudah os.sep: "dir" + _SEP_NEXT adalah batas atas semua path di bawah "dir/"
+_SEP_NEXT = chr(ord(os.sep) + 1)
+
+def iter_children(conn, dirpath):
+    """
+    Baris file_state (path, is_dir, mtime, checksum, digest) anak langsung
+    `dirpath`, urut path.
+
+    Skip-scan lewat PRIMARY KEY: satu seek per anak, dan isi subdirektori
+    dilompati, jadi biayanya sebanding jumlah anak langsung, bukan isi subtree.
+    """
+    prefix = "" if dirpath == "." else dirpath + os.sep
+    sql = "SELECT path, is_dir, mtime, checksum, digest FROM file_state WHERE path >= ?"
+    if prefix:
+        sql += " AND path < ?"
+    sql += " ORDER BY path LIMIT 1"
+    bound = (dirpath + _SEP_NEXT,) if prefix else ()
+    start = prefix
+    while True:
+        row = conn.execute(sql, (start,) + bound).fetchone()
+        if row is None:
+            return
+        rest = row[0][len(prefix):]
+        cut = rest.find(os.sep)
+        if cut >= 0:
+            # Baris di dalam subdirektori: lompati seluruh subtree-nya
+            start = prefix + rest[:cut] + _SEP_NEXT
+            continue
+        if row[0] != ".":
+            yield row
+        start = row[0] + "\0"
+
+def iter_subtree(conn, dirpath):
+    """(path, is_dir) semua baris file_state di bawah `dirpath` (tanpa `dirpath` sendiri), urut path."""
+    return conn.execute(
+        "SELECT path, is_dir FROM file_state WHERE path > ? AND path < ? ORDER BY path",
+        (dirpath + os.sep, dirpath + _SEP_NEXT),
+    )
+
+def get_file_state(conn, path):
+    """Satu baris file_state (path, is_dir, mtime, checksum, digest) atau None."""
+    return conn.execute(
+        "SELECT path, is_dir, mtime, checksum, digest FROM file_state WHERE path = ?", (path,)
+    ).fetchone()
+
+def save_baseline_snapshot(root_dir, workers=None):
+    """
+    Simpan snapshot awal semua file & folder ke DB (fs_events + file_state).
+
+    Walk + hashing paralel lewat Scanner; hasil ditulis per batch
+    `SNAPSHOT_BATCH_SIZE` baris (satu transaksi per batch) tanpa menampung
+    seluruh tree di memori. Digest Merkle tiap direktori ikut disimpan.
+    Return statistik scan (files/s, MB/s).
+    """
+    from .scanner import Scanner, UNREADABLE
+    from .merkle import MerkleBuilder
+    scanner = Scanner(root_dir, workers=workers)
+    builder = MerkleBuilder()
+    # Event dari writer yang masih antre harus masuk lebih dulu
+    flush_writes()
+    conn = connect()
+    try:
+        events, digests = [], []
+        for rel_path, is_dir, st, checksum in scanner.scan():
+            if is_dir is UNREADABLE:
+                logger.warning(f"Isi folder {rel_path} tidak bisa dibaca, tidak masuk snapshot")
+            elif is_dir:
+                events.append(("dir_created", rel_path, 0, st.st_mtime, None))
+            else:
+                events.append(("created", rel_path, st.st_size, st.st_mtime, checksum))
+            digests.extend(_snapshot_digests(builder.add(rel_path, is_dir, st, checksum)))
+            if len(events) >= SNAPSHOT_BATCH_SIZE:
+                _write_snapshot_batch(conn, events, digests)
+                events, digests = [], []
+        digests.extend(_snapshot_digests(builder.finish()))
+        _write_snapshot_batch(conn, events, digests)
+    finally:
+        conn.close()
+    return scanner.stats()
+
+def _snapshot_digests(nodes):
+    # Subtree dengan direktori tak terbaca tidak diberi digest (selalu dibandingkan ulang)
+    return [(node.digest if node.complete else None, node.path) for node in nodes]
+
+def _write_snapshot_batch(conn, events, digests):
+    with conn:
+        conn.executemany(_INSERT_FS_EVENT, events)
+        conn.executemany(_UPSERT_FILE_STATE, (_file_state_row(*e) for e in events))
+        # Baris direktori selalu sudah ada: ditulis saat direktori pertama terlihat (pre-order)
+        conn.executemany("UPDATE file_state SET digest = ? WHERE path = ?", digests)
@@ -0,0 +1,153 @@
+# apache_monitor/fs_coalesce.py
+import time
+import logging
+import threading
+
+logger = logging.getLogger("FsCoalesce")
+
+DEFAULT_QUIET_SECONDS = 1.0
+DEFAULT_MAX_DELAY = 10.0
+DEFAULT_MAX_PENDING = 50000
+
+# (event bersih sebelumnya, event baru) -> event bersih; None = saling meniadakan.
+# Pasangan yang tidak ada di tabel: event baru yang menang.
+_FOLD = {
+    ("created", "modified"): "created",
+    ("created", "renamed"): "created",
+    ("created", "deleted"): None,          # file sementara: dibuat lalu dihapus/dipindah
+    ("modified", "deleted"): "deleted",
+    ("renamed", "modified"): "renamed",
+    ("renamed", "deleted"): "deleted",
+    ("deleted", "created"): "modified",    # file diganti (hapus + tulis ulang)
+    ("deleted", "modified"): "modified",
+    ("deleted", "renamed"): "modified",
+}
+
+
+def fold(previous, event_type):
+    """Gabungkan event baru dengan event bersih sebelumnya untuk path yang sama."""
+    if previous is None:
+        return event_type
+    return _FOLD.get((previous, event_type), event_type)
+
+
+class EventCoalescer:
+    """
+    Tahap penggabung antara callback watchdog dan pemrosesan event filesystem.
+
+    Callback observer hanya memanggil `add()` (ambil lock, update dict, tanpa
+    I/O). Event per path digabung menjadi efek bersihnya (lihat `_FOLD`) dan
+    baru diproses setelah path tersebut tenang `quiet_seconds`, atau paling
+    lambat `max_delay` detik sejak event pertama (file yang terus ditulis).
+    Thread terpisah memanggil `process_batch([(event_type, path), ...])`,
+    jadi hashing dan insert DB tidak menahan thread observer.
+    """
+
+    def __init__(self, process_batch, quiet_seconds=DEFAULT_QUIET_SECONDS, max_delay=DEFAULT_MAX_DELAY,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.process_batch = process_batch
+        self.quiet_seconds = quiet_seconds
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.received = 0
+        self.emitted = 0
+        self.cancelled = 0
+        self.batches = 0
+        self._pending = {}  # path -> [event bersih, waktu event pertama, waktu event terakhir]
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="FsCoalescer", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config, process_batch):
+        """Return EventCoalescer, atau None jika `fs_coalesce_quiet_seconds` = 0 (proses langsung)."""
+        quiet = config.get("fs_coalesce_quiet_seconds", DEFAULT_QUIET_SECONDS)
+        if not quiet:
+            return None
+        return cls(
+            process_batch,
+            quiet_seconds=quiet,
+            max_delay=config.get("fs_coalesce_max_delay", DEFAULT_MAX_DELAY),
+            max_pending=config.get("fs_coalesce_max_pending", DEFAULT_MAX_PENDING),
+        )
+
+    def add(self, event_type, path, now=None):
+        """Catat satu event dari watchdog (dipanggil di thread observer)."""
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            self.received += 1
+            state = self._pending.get(path)
+            if state is None:
+                self._pending[path] = [event_type, now, now]
+                # Thread pemroses hanya perlu dibangunkan jika sebelumnya menunggu tanpa batas
+                # waktu (antrian kosong) atau antrian sudah penuh
+                if len(self._pending) == 1 or len(self._pending) >= self.max_pending:
+                    self._cond.notify()
+                return
+            merged = fold(state[0], event_type)
+            if merged is None:
+                del self._pending[path]
+                self.cancelled += 1
+                return
+            state[0] = merged
+            state[2] = now
+
+    def _take_ready(self, now, everything=False):
+        """Keluarkan path yang sudah tenang; return (batch, detik sampai path berikutnya siap)."""
+        if everything or len(self._pending) >= self.max_pending:
+            ready = list(self._pending)
+        else:
+            ready = [path for path, (_, first, last) in self._pending.items()
+                     if now - last >= self.quiet_seconds or now - first >= self.max_delay]
+        batch = [(self._pending.pop(path)[0], path) for path in ready]
+        wait = None
+        if self._pending:
+            wait = min(min(last + self.quiet_seconds, first + self.max_delay)
+                       for _, first, last in self._pending.values()) - now
+        return batch, wait
+
+    def _emit(self, batch):
+        if not batch:
+            return
+        self.batches += 1
+        self.emitted += len(batch)
+        try:
+            self.process_batch(batch)
+        except Exception as e:
+            logger.error(f"Gagal memproses {len(batch)} event filesystem: {e}", exc_info=True)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch, wait = self._take_ready(time.monotonic(), everything=self._closed)
+                if not batch:
+                    if self._closed:
+                        return
+                    self._cond.wait(None if wait is None else max(wait, 0.01))
+                    continue
+            self._emit(batch)
+
+    def flush(self):
+        """Proses semua event yang masih tertunda sekarang juga (di thread pemanggil)."""
+        with self._cond:
+            batch, _ = self._take_ready(time.monotonic(), everything=True)
+        self._emit(batch)
+
+    def close(self, timeout=10):
+        """Proses sisa event lalu hentikan thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "received": self.received,
+            "emitted": self.emitted,
+            "cancelled": self.cancelled,
+            "batches": self.batches,
+            "pending": pending,
+        }
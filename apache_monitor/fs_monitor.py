@@ -2,17 +2,21 @@ import os
 import time
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from .utils import sha256sum, sanitize_for_telegram
+from .utils import sanitize_for_telegram
 from .db import log_fs_event
+from .hashcache import get_hash_cache
+from .fs_coalesce import EventCoalescer
 import logging
 
 logger = logging.getLogger("FsMonitor")
 
 class FsEventHandler(FileSystemEventHandler):
-    def __init__(self, alert_queue, target_dir, suspicious_exts):
+    def __init__(self, alert_queue, target_dir, suspicious_exts, hash_cache=None):
         self.alert_queue = alert_queue
         self.target_dir = target_dir
         self.suspicious_exts = suspicious_exts
+        self.hash_cache = hash_cache or get_hash_cache()
+        self.coalescer = None
 
     def _is_high_priority(self, filepath):
         if not os.path.isfile(filepath):
@@ -25,11 +29,15 @@ class FsEventHandler(FileSystemEventHandler):
         size = 0
         mtime = 0
         checksum = None
-        if os.path.exists(src_path):
+        try:
             stat = os.stat(src_path)
+        except OSError:
+            # File sudah hilang (mis. dihapus sebelum event diproses)
+            stat = None
+        if stat is not None:
             size = stat.st_size
             mtime = stat.st_mtime
-            checksum = sha256sum(src_path)
+            checksum = self.hash_cache.checksum(src_path, stat)
 
         log_fs_event(event_type, rel_path, size, mtime, checksum)
 
@@ -44,21 +52,39 @@ class FsEventHandler(FileSystemEventHandler):
             })
             logger.warning(f"[FS ALERT] High-priority change: {event_type} {rel_path}")
 
+    def process_batch(self, batch):
+        """Proses event hasil EventCoalescer (di thread coalescer, bukan thread observer)."""
+        for event_type, src_path in batch:
+            try:
+                self._log_and_alert(event_type, src_path)
+            except Exception as e:
+                # Satu event gagal tidak boleh menggugurkan sisa batch
+                logger.error(f"Gagal memproses event {event_type} {src_path}: {e}", exc_info=True)
+
+    def _submit(self, event_type, src_path):
+        if self.coalescer is not None:
+            self.coalescer.add(event_type, src_path)
+        else:
+            self._log_and_alert(event_type, src_path)
+
     def on_created(self, event):
         if not event.is_directory:
-            self._log_and_alert("created", event.src_path)
+            self._submit("created", event.src_path)
 
     def on_modified(self, event):
         if not event.is_directory:
-            self._log_and_alert("modified", event.src_path)
+            self._submit("modified", event.src_path)
 
     def on_deleted(self, event):
         if not event.is_directory:
-            self._log_and_alert("deleted", event.src_path)
+            self._submit("deleted", event.src_path)
 
     def on_moved(self, event):
         if not event.is_directory:
-            self._log_and_alert("renamed", event.dest_path)
+            if self.coalescer is not None:
+                # Sumber ikut dicatat agar file sementara (tulis .tmp lalu rename) saling meniadakan
+                self.coalescer.add("deleted", event.src_path)
+            self._submit("renamed", event.dest_path)
 
 class FsMonitor:
     def __init__(self, config, alert_queue, dry_run=False):
@@ -67,6 +93,7 @@ class FsMonitor:
         self.dry_run = dry_run
         self.observer = Observer()
         self.target_dir = self.config.get("target_dir")
+        self.coalescer = None
 
     def start(self):
         """Memulai filesystem monitoring dengan validasi path"""
@@ -97,8 +124,11 @@ class FsMonitor:
         handler = FsEventHandler(
             self.alert_queue,
             self.target_dir,
-            set(self.config.get("suspicious_extensions", [".php", ".phar"]))
+            set(self.config.get("suspicious_extensions", [".php", ".phar"])),
+            hash_cache=get_hash_cache(self.config),
         )
+        # Event digabung per path lalu diproses per batch di luar thread observer
+        handler.coalescer = self.coalescer = EventCoalescer.from_config(self.config, handler.process_batch)
         self.observer.schedule(
             handler,
             self.target_dir,
@@ -106,4 +136,11 @@ class FsMonitor:
         )
         self.observer.start()
         logger.info("Filesystem observer berhasil dimulai")
-        return self.observer
\ No newline at end of file
+        return self.observer
+
+    def stop(self, timeout=5):
+        """Hentikan observer lalu proses event yang masih tertahan di coalescer."""
+        self.observer.stop()
+        self.observer.join(timeout=timeout)
+        if self.coalescer is not None:
+            self.coalescer.close(timeout)
\ No newline at end of file
@@ -0,0 +1,146 @@
+# apache_monitor/hashcache.py
+import os
+import stat
+import time
+import logging
+import threading
+
+from . import db
+from .utils import sha256sum
+
+logger = logging.getLogger("HashCache")
+
+_UPSERT = """
+    INSERT INTO hash_cache (dev, ino, size, mtime_ns, ctime_ns, checksum, verified_at)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(dev, ino) DO UPDATE SET
+        size = excluded.size, mtime_ns = excluded.mtime_ns, ctime_ns = excluded.ctime_ns,
+        checksum = excluded.checksum, verified_at = excluded.verified_at
+"""
+
+# verified_at juga menandai "inode terakhir terlihat"; entri yang tidak
+# tersentuh lebih lama dari retensi dihapus RetentionManager.prune_hash_cache
+_TOUCH = "UPDATE hash_cache SET verified_at = CURRENT_TIMESTAMP WHERE dev = ? AND ino = ?"
+
+
+class HashCache:
+    """
+    Cache checksum SHA-256 persisten di tabel `hash_cache` (alerts.db).
+
+    Key adalah (st_dev, st_ino); entri hanya dipakai jika st_size,
+    st_mtime_ns dan st_ctime_ns masih sama. ctime ikut dicek karena ctime
+    tidak bisa di-set mundur dari userspace (berbeda dengan mtime lewat
+    touch -d), jadi file yang diubah lalu mtime-nya dipalsukan tetap
+    terdeteksi. Entri baru ditulis lewat DBWriter. Cache hit memperbarui
+    verified_at paling banyak sekali sehari, sehingga entri inode yang sudah
+    dihapus bisa dibuang oleh job retensi (`retention_hash_cache_days`).
+
+    Mode paranoid (`paranoid_buckets` > 0) membagi file ke N bucket menurut
+    inode; setiap hari satu bucket yang cache hit-nya tetap di-hash ulang
+    dan dibandingkan, sehingga seluruh tree terverifikasi ulang tiap N hari.
+    """
+
+    def __init__(self, path=None, paranoid_buckets=0):
+        self.path = path
+        self.paranoid_buckets = paranoid_buckets
+        self.hits = 0
+        self.misses = 0
+        self.verified = 0
+        self.mismatches = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(paranoid_buckets=config.get("hash_cache_paranoid_buckets", 0) or 0)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _conn(self):
+        # Dipakai dari thread observer watchdog dan thread pool scan, satu koneksi per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = db.connect(self.path or db.DB_PATH)
+        return conn
+
+    def _paranoid(self, ino):
+        if not self.paranoid_buckets:
+            return False
+        return ino % self.paranoid_buckets == int(time.time() // 86400) % self.paranoid_buckets
+
+    def checksum(self, filepath, st=None):
+        """
+        Return checksum file, dari cache jika stat masih sama. `st` boleh diisi
+        hasil os.stat/DirEntry.stat() yang sudah ada supaya tidak stat ulang.
+        None jika bukan file biasa atau tidak bisa dibaca.
+        """
+        try:
+            st = st or os.stat(filepath)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        checksum, row = self.lookup(st)
+        return checksum or self.compute(filepath, st, row)
+
+    def _row(self, st):
+        return self._conn().execute(
+            "SELECT size, mtime_ns, ctime_ns, checksum, verified_at FROM hash_cache WHERE dev = ? AND ino = ?",
+            (st.st_dev, st.st_ino),
+        ).fetchone()
+
+    def lookup(self, st):
+        """
+        Checksum dari cache tanpa membaca file. Return (checksum, row); checksum
+        None jika harus di-hash (miss atau giliran paranoid), row diteruskan ke
+        compute supaya tidak di-query ulang.
+        """
+        row = self._row(st)
+        if row is None or row[:3] != (st.st_size, st.st_mtime_ns, st.st_ctime_ns) or self._paranoid(st.st_ino):
+            return None, row
+        self._count("hits")
+        if not row[4] or row[4][:10] < time.strftime("%Y-%m-%d", time.gmtime()):
+            db.get_writer().submit(_TOUCH, (st.st_dev, st.st_ino))
+        return row[3], row
+
+    def compute(self, filepath, st, row=None):
+        """Hash file, bandingkan dengan cache (verifikasi paranoid) lalu simpan hasilnya."""
+        key = (st.st_dev, st.st_ino)
+        current = (st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+        checksum = sha256sum(filepath)
+        if row is not None and row[:3] == current:
+            self._count("verified")
+            if checksum is not None and checksum != row[3]:
+                self._count("mismatches")
+                logger.warning(f"[PARANOID] Isi {filepath} berubah tanpa perubahan size/mtime/ctime")
+        else:
+            self._count("misses")
+        if checksum is not None:
+            db.get_writer().submit(_UPSERT, key + current + (checksum,))
+        return checksum
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "verified": self.verified,
+            "mismatches": self.mismatches,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_hash_cache(config=None):
+    """HashCache bersama untuk scan manual dan watchdog (dibuat ulang jika DB_PATH berganti)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.path != db.DB_PATH:
+            _cache = HashCache.from_config(config or {})
+            _cache.path = db.DB_PATH
+        elif config is not None:
+            _cache.paranoid_buckets = config.get("hash_cache_paranoid_buckets", 0) or 0
+        return _cache
@@ -0,0 +1,161 @@
+# apache_monitor/ipfilter.py
+import os
+import time
+import logging
+
+from .iptrie import PrefixTrie, parse_ip, parse_cidr, format_prefix, IPV4_BITS, IPV6_BITS
+
+logger = logging.getLogger("IPFilter")
+
+ALLOW = "allow"
+BLOCK = "block"
+DEFAULT_CACHE_SIZE = 65536
+DEFAULT_RELOAD_INTERVAL = 30
+# Key config yang menentukan isi list (dibaca ulang saat reload dengan config baru)
+CONFIG_KEYS = ("ip_allowlist", "ip_blocklist", "ip_allowlist_file", "ip_blocklist_file")
+
+
+def _read_list_file(path):
+    """Baca satu CIDR per baris; komentar (#) dan baris kosong dilewati."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            value = raw.split("#", 1)[0].strip()
+            if value:
+                entries.append(value)
+    return entries
+
+
+class _Tables:
+    """Snapshot immutable hasil load: trie per keluarga, daftar entri, dan cache lookup."""
+
+    def __init__(self):
+        self.tries = {IPV4_BITS: PrefixTrie(IPV4_BITS), IPV6_BITS: PrefixTrie(IPV6_BITS)}
+        self.entries = []  # index (nilai di trie) -> (verdict, cidr)
+        self.cache = {}
+
+    def add(self, verdict, cidr):
+        bits, prefix, prefixlen = parse_cidr(cidr)
+        self.tries[bits].insert(prefix, prefixlen, len(self.entries))
+        self.entries.append((verdict, format_prefix(bits, prefix, prefixlen)))
+
+
+class IPFilter:
+    """
+    Allowlist / blocklist CIDR dengan longest prefix match.
+
+    Daftar berasal dari config (`ip_allowlist`, `ip_blocklist`) dan/atau file
+    (`ip_allowlist_file`, `ip_blocklist_file`, satu CIDR per baris). Jika
+    prefix yang sama ada di kedua daftar, blocklist menang; selain itu
+    prefix terpanjang yang menentukan. Hasil lookup di-cache per IP.
+
+    Reload membangun tabel baru lalu menukar referensinya sekaligus, jadi
+    aman dipanggil dari thread lain (mis. handler SIGHUP) selama tail berjalan.
+    File list dicek ulang (mtime) tiap `reload_interval` detik.
+    """
+
+    def __init__(self, allow=(), block=(), allow_file=None, block_file=None,
+                 cache_size=DEFAULT_CACHE_SIZE, reload_interval=DEFAULT_RELOAD_INTERVAL):
+        self.allow = list(allow or [])
+        self.block = list(block or [])
+        self.files = {ALLOW: allow_file, BLOCK: block_file}
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._mtimes = {}
+        self._next_check = time.monotonic() + reload_interval
+        self._tables = self._load()
+
+    @classmethod
+    def from_config(cls, config):
+        """Return IPFilter jika ada list/file yang dikonfigurasi, selain itu None."""
+        if not any(config.get(k) for k in CONFIG_KEYS):
+            return None
+        return cls(
+            config.get("ip_allowlist"),
+            config.get("ip_blocklist"),
+            allow_file=config.get("ip_allowlist_file"),
+            block_file=config.get("ip_blocklist_file"),
+            reload_interval=config.get("ip_list_reload_interval", DEFAULT_RELOAD_INTERVAL),
+        )
+
+    def _file_mtimes(self):
+        mtimes = {}
+        for path in self.files.values():
+            if path:
+                try:
+                    mtimes[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    mtimes[path] = None
+        return mtimes
+
+    def _load(self):
+        tables = _Tables()
+        self._mtimes = self._file_mtimes()
+        # Allow dulu, block terakhir: pada prefix yang sama block menimpa allow
+        for verdict, inline in ((ALLOW, self.allow), (BLOCK, self.block)):
+            values = list(inline)
+            path = self.files[verdict]
+            if path:
+                try:
+                    values.extend(_read_list_file(path))
+                except OSError as e:
+                    logger.warning(f"Gagal membaca {verdict}list {path}: {e}")
+            for cidr in values:
+                try:
+                    tables.add(verdict, str(cidr))
+                except ValueError as e:
+                    logger.warning(f"Entri {verdict}list dilewati: {e}")
+        counts = {v: sum(1 for e in tables.entries if e[0] == v) for v in (ALLOW, BLOCK)}
+        logger.info(f"IP filter dimuat: {counts[ALLOW]} allow, {counts[BLOCK]} block")
+        return tables
+
+    def reload(self, config=None):
+        """
+        Muat ulang semua list dan tukar tabel aktif. Jika `config` diberikan,
+        list inline dan path file diambil ulang dari config tersebut.
+        """
+        if config is not None:
+            self.allow = list(config.get("ip_allowlist") or [])
+            self.block = list(config.get("ip_blocklist") or [])
+            self.files = {ALLOW: config.get("ip_allowlist_file"), BLOCK: config.get("ip_blocklist_file")}
+        self._tables = self._load()
+        self.reloads += 1
+
+    def maybe_reload(self):
+        """Reload jika file list berubah; dicek paling sering tiap `reload_interval` detik."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.reload_interval
+        if self._file_mtimes() == self._mtimes:
+            return False
+        self.reload()
+        return True
+
+    def lookup(self, ip):
+        """Return (verdict, cidr) untuk ip, atau None jika tidak ada di kedua list."""
+        tables = self._tables
+        cache = tables.cache
+        try:
+            return cache[ip]
+        except KeyError:
+            pass
+        result = None
+        parsed = parse_ip(ip)
+        if parsed is not None:
+            index = tables.tries[parsed[0]].longest_match(parsed[1])
+            if index is not None:
+                result = tables.entries[index]
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        cache[ip] = result
+        return result
+
+    def stats(self):
+        tables = self._tables
+        return {
+            "entries": len(tables.entries),
+            "cached_ips": len(tables.cache),
+            "reloads": self.reloads,
+        }
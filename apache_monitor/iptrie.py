@@ -0,0 +1,124 @@
+# apache_monitor/iptrie.py
+import socket
+from array import array
+
+IPV4_BITS = 32
+IPV6_BITS = 128
+
+
+def parse_ip(ip):
+    """Return (bits, int) untuk alamat IPv4/IPv6, atau None jika tidak valid."""
+    try:
+        return IPV4_BITS, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, ValueError):
+        pass
+    try:
+        return IPV6_BITS, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip.split("%", 1)[0]), "big")
+    except (OSError, ValueError):
+        return None
+
+
+def parse_cidr(cidr):
+    """Return (bits, prefix_int, prefixlen) untuk string CIDR; raise ValueError jika salah."""
+    addr, _, length = cidr.strip().partition("/")
+    parsed = parse_ip(addr)
+    if parsed is None:
+        raise ValueError(f"Alamat tidak valid: {cidr}")
+    bits, value = parsed
+    prefixlen = int(length) if length else bits
+    if not 0 <= prefixlen <= bits:
+        raise ValueError(f"Prefix length tidak valid: {cidr}")
+    mask = ((1 << prefixlen) - 1) << (bits - prefixlen) if prefixlen else 0
+    return bits, value & mask, prefixlen
+
+
+def format_prefix(bits, prefix, prefixlen):
+    """Format (bits, prefix_int, prefixlen) kembali menjadi string CIDR."""
+    if bits == IPV4_BITS:
+        addr = socket.inet_ntop(socket.AF_INET, prefix.to_bytes(4, "big"))
+    else:
+        addr = socket.inet_ntop(socket.AF_INET6, prefix.to_bytes(16, "big"))
+    return f"{addr}/{prefixlen}"
+
+
+class PrefixTrie:
+    """
+    Trie biner (radix 2) untuk satu keluarga alamat, disimpan di array datar.
+
+    Node hanya berupa indeks ke array `left`/`right`/`value` (int32), jadi
+    tidak ada objek Python per node atau per alamat. Dipakai untuk longest
+    prefix match (allow/block list) dan sebagai indeks counter per subnet.
+    """
+
+    def __init__(self, bits):
+        self.bits = bits
+        self.left = array("i", [-1])
+        self.right = array("i", [-1])
+        self.value = array("i", [-1])
+
+    def __len__(self):
+        return len(self.value)
+
+    def _new_node(self):
+        self.left.append(-1)
+        self.right.append(-1)
+        self.value.append(-1)
+        return len(self.value) - 1
+
+    def node_for(self, prefix, prefixlen, create=True):
+        """Return indeks node untuk prefix (dibuat jika perlu), atau -1."""
+        node = 0
+        shift = self.bits - 1
+        left, right = self.left, self.right
+        for _ in range(prefixlen):
+            branch = right if (prefix >> shift) & 1 else left
+            child = branch[node]
+            if child < 0:
+                if not create:
+                    return -1
+                child = self._new_node()
+                branch[node] = child
+            node = child
+            shift -= 1
+        return node
+
+    def path_nodes(self, addr, depths):
+        """
+        Return indeks node untuk tiap panjang prefix di `depths` (urut naik)
+        sepanjang jalur addr, membuat node yang belum ada.
+        """
+        nodes = []
+        node = 0
+        shift = self.bits - 1
+        depth = 0
+        left, right = self.left, self.right
+        for target in depths:
+            while depth < target:
+                branch = right if (addr >> shift) & 1 else left
+                child = branch[node]
+                if child < 0:
+                    child = self._new_node()
+                    branch[node] = child
+                node = child
+                shift -= 1
+                depth += 1
+            nodes.append(node)
+        return nodes
+
+    def insert(self, prefix, prefixlen, value):
+        self.value[self.node_for(prefix, prefixlen)] = value
+
+    def longest_match(self, addr):
+        """Return value dari prefix terpanjang yang memuat addr, atau None."""
+        node = 0
+        best = self.value[0]
+        shift = self.bits - 1
+        left, right, values = self.left, self.right, self.value
+        while shift >= 0:
+            node = (right if (addr >> shift) & 1 else left)[node]
+            if node < 0:
+                break
+            if values[node] >= 0:
+                best = values[node]
+            shift -= 1
+        return best if best >= 0 else None
@@ -0,0 +1,207 @@
+# apache_monitor/log_format.py
+import re
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger("LogFormat")
+
+# Preset LogFormat bawaan Apache
+PRESETS = {
+    "common": '%h %l %u %t "%r" %>s %b',
+    "combined": '%h %l %u %t "%r" %>s %b "%{Referer}i" "%{User-Agent}i"',
+    "vhost_combined": '%v:%p %h %l %u %t "%r" %>s %O "%{Referer}i" "%{User-Agent}i"',
+}
+
+_DIRECTIVE = re.compile(r'%(?:[<>]|!?\d{3}(?:,\d{3})*)?(?:\{([^}]*)\})?([a-zA-Z%])')
+
+_TOKEN = r"\S+"
+# Loop "unrolled": jauh lebih cepat dari (?:[^"\\]|\\.)* untuk string panjang
+_QUOTED = r'[^"\\]*(?:\\.[^"\\]*)*'
+# Token dalam "%r": Apache menulis " di dalam request sebagai \"
+_REQUEST_TOKEN = r'(?:[^\s"\\]|\\.)+'
+_INT = r"\d+"
+_BYTES = r"\d+|-"
+
+
+def _to_int(value):
+    return int(value)
+
+
+def _to_bytes(value):
+    return 0 if value == "-" else int(value)
+
+
+def _time_converter(arg):
+    """
+    Converter `%{format}t` ke datetime aware (format strftime, atau sec/msec/usec).
+
+    Waktu tanpa offset (%z) dianggap waktu lokal server, seperti yang ditulis Apache.
+    """
+    arg = arg.split(":", 1)[1] if arg.startswith(("begin:", "end:")) else arg
+    divisor = {"sec": 1, "msec": 1000, "usec": 1000000}.get(arg)
+    if divisor:
+        return lambda value: datetime.fromtimestamp(int(value) / divisor, timezone.utc)
+
+    def convert(value):
+        parsed = datetime.strptime(value, arg)
+        return parsed if parsed.tzinfo else parsed.astimezone()
+    return convert
+
+
+def _header_field(name):
+    return "header_" + re.sub(r"\W", "_", name.lower())
+
+
+def _field_for(directive, arg, quoted):
+    """
+    Return (nama field, pola regex, converter) untuk satu directive.
+
+    Nama field None berarti nilainya dilewati (tidak di-capture).
+    """
+    free = _QUOTED if quoted else _TOKEN
+    if directive in ("h", "a"):
+        return "ip", _TOKEN, None
+    if directive == "t":
+        if arg:
+            if arg.endswith(("msec_frac", "usec_frac")):
+                # Hanya pecahan detik, bukan waktu lengkap
+                return None, _INT, None
+            # Format custom ditulis apa adanya (tanpa [ ]); [ ] milik user ikut sebagai literal
+            return "time", r".+?" if not quoted else r'[^"]+?', _time_converter(arg)
+        return "time", r"\[(?P<time>[^\]]+)\]", None
+    if directive == "r":
+        return "request", None, None
+    if directive == "s":
+        return "status", r"\d{3}", _to_int
+    if directive == "b":
+        return "size", _BYTES, _to_bytes
+    if directive in ("B", "O", "I", "S"):
+        return {"B": "size", "O": "bytes_out", "I": "bytes_in", "S": "bytes_total"}[directive], _BYTES, _to_bytes
+    if directive == "D":
+        return "duration_us", _INT, _to_int
+    if directive == "T":
+        return "duration_s", _INT, _to_int
+    if directive == "i" and arg:
+        name = {"referer": "referer", "user-agent": "user_agent"}.get(arg.lower(), _header_field(arg))
+        return name, free, None
+    if directive in ("v", "V"):
+        return "vhost", _TOKEN, None
+    if directive == "p" and not arg:
+        return "port", _INT, _to_int
+    if directive == "U":
+        return "url_path", _TOKEN, None
+    if directive == "q":
+        return "query", r"\S*", None
+    if directive == "m":
+        return "method", _TOKEN, None
+    if directive == "H":
+        return "protocol", _TOKEN, None
+    if directive == "%":
+        return None, "%", None
+    # Directive lain (%l, %u, %X, %{...}e, dst.) tidak dipakai oleh deteksi
+    return None, free, None
+
+
+class LogFormat:
+    """
+    Parser hasil kompilasi directive Apache `LogFormat`.
+
+    String format dikompilasi sekali menjadi satu regex yang hanya meng-capture
+    field yang dipakai, plus converter per field (int untuk status/durasi,
+    '-' -> 0 untuk ukuran). Baris yang gagal di-parse dihitung di `failures`.
+    """
+
+    def __init__(self, fmt, name=None, capture=None):
+        # Format dari httpd.conf biasanya memakai \" untuk tanda kutip
+        fmt = fmt.replace('\\"', '"')
+        self.format = fmt
+        self.name = name or fmt
+        self.failures = 0
+        self.parsed = 0
+        self.fields = []
+        self.request_is_first_quoted = False
+        self.ip_is_first = False  # True jika baris diawali %h/%a (IP bisa diambil tanpa parse)
+        # Field yang di-capture; None = semua. Sisanya dicocokkan tanpa group.
+        self.capture = frozenset(capture) if capture is not None else None
+        self._converters = []
+        self._regex = re.compile(self._compile(fmt))
+
+    @classmethod
+    def from_config(cls, config, capture=None):
+        """Buat parser dari `log_format` (nama preset atau string LogFormat)."""
+        value = config.get("log_format") or "combined"
+        if value in PRESETS:
+            return cls(PRESETS[value], name=value, capture=capture)
+        if "%" not in value:
+            raise ValueError(f"log_format tidak dikenal: {value} (preset: {', '.join(PRESETS)})")
+        return cls(value, capture=capture)
+
+    def _wanted(self, name):
+        return name not in self.fields and (self.capture is None or name in self.capture)
+
+    def _compile(self, fmt):
+        parts = ["^"]
+        quoted = False
+        first_quoted_seen = False
+        pos = 0
+        for m in _DIRECTIVE.finditer(fmt):
+            literal = fmt[pos:m.start()]
+            parts.append(re.escape(literal))
+            quoted ^= literal.count('"') % 2 == 1
+            pos = m.end()
+
+            arg, directive = m.group(1), m.group(2)
+            if m.start() == 0:
+                self.ip_is_first = directive in ("h", "a")
+            name, pattern, converter = _field_for(directive, arg, quoted)
+            if quoted and not first_quoted_seen:
+                first_quoted_seen = True
+                self.request_is_first_quoted = directive == "r"
+
+            if name == "request":
+                # Extractor khusus: METHOD PATH PROTOCOL
+                parts.append(r"{} {}(?: {})?".format(
+                    self._group("method", _REQUEST_TOKEN),
+                    self._group("path", _REQUEST_TOKEN),
+                    self._group("protocol", _QUOTED),
+                ))
+                continue
+            if name is None or not self._wanted(name):
+                if name == "time" and not arg:
+                    pattern = r"\[[^\]]+\]"
+                parts.append(f"(?:{pattern})")
+                continue
+            if name == "time" and not arg:
+                parts.append(pattern)
+            else:
+                parts.append(f"(?P<{name}>{pattern})")
+            self.fields.append(name)
+            if converter:
+                self._converters.append((name, converter))
+        parts.append(re.escape(fmt[pos:]))
+        return "".join(parts)
+
+    def _group(self, name, pattern):
+        if not self._wanted(name):
+            return f"(?:{pattern})"
+        self.fields.append(name)
+        return f"(?P<{name}>{pattern})"
+
+    def parse(self, line):
+        """Return dict field -> nilai, atau None jika baris tidak cocok."""
+        match = self._regex.match(line)
+        if not match:
+            self.failures += 1
+            return None
+        data = match.groupdict()
+        try:
+            for name, converter in self._converters:
+                data[name] = converter(data[name])
+        except (TypeError, ValueError):
+            self.failures += 1
+            return None
+        self.parsed += 1
+        return data
+
+    def stats(self):
+        return {"format": self.name, "parsed": self.parsed, "failures": self.failures}
@@ -1,93 +1,449 @@
-import re
 import time
 import os
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
+import glob
+from datetime import datetime, timezone
 import threading
 import queue
 import logging
 
-from .utils import now_str
+from .utils import now_str, ApacheTimeCache
 from .db import log_ip_alert
+from .tailer import MultiTailer, DEFAULT_CHUNK_SIZE
+from .rules import PathMatcher
+from .window import IPWindowStore
+from .checkpoint import CheckpointStore
+from .log_format import LogFormat
+from .sketch import SketchDetector
+from .subnet import SubnetCounter
+from .rule_engine import RuleEngine, SuspiciousPathRule
+from .ipfilter import IPFilter, ALLOW, CONFIG_KEYS as IP_LIST_KEYS
 
 logger = logging.getLogger("LogMonitor")
 
-# Format log Apache combined
-APACHE_COMBINED_REGEX = re.compile(
-    r'(?P<ip>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>\S+) (?P<path>\S+) \S+" (?P<status>\d{3}) (?P<size>\S+) "(?P<referer>[^"]*)" "(?P<user_agent>[^"]*)"'
-)
+# Field LogFormat yang dipakai oleh deteksi; field lain tidak di-capture
+PARSED_FIELDS = ("ip", "time", "path", "url_path", "user_agent", "status", "vhost")
+
+def extract_request_path(line):
+    """
+    Ambil path request dari baris log hanya dengan operasi string.
+
+    Dipakai sebagai pre-filter murah sebelum regex penuh + strptime.
+    Return None jika baris tidak berbentuk `... "METHOD PATH PROTO" ...`.
+    """
+    quote = line.find('"')
+    if quote < 0:
+        return None
+    close = line.find('"', quote + 1)
+    # Tanda kutip di dalam request ditulis Apache sebagai \"
+    while close > 0 and line[close - 1] == "\\":
+        close = line.find('"', close + 1)
+    if close < 0:
+        return None
+    start = line.find(" ", quote + 1, close)
+    if start < 0:
+        return None
+    start += 1
+    end = line.find(" ", start, close)
+    if end <= start:
+        return None
+    return line[start:end]
 
 class LogMonitor:
-    def __init__(self, config, alert_queue, dry_run=False):
+    def __init__(self, config, alert_queue, dry_run=False, persist_alerts=True):
         self.config = config
         self.alert_queue = alert_queue
         self.dry_run = dry_run
-        self.ip_window = defaultdict(deque)  # IP -> deque of timestamps
-        self.alerted_ips = {}  # IP -> last alert time
+        self.persist_alerts = persist_alerts
+        self.log_format = LogFormat.from_config(config, capture=PARSED_FIELDS)
+        self.engine = config.get("detection_engine", "exact")
+        if self.engine not in ("exact", "sketch"):
+            raise ValueError(f"detection_engine tidak dikenal: {self.engine} (exact/sketch)")
+        self.ip_window = IPWindowStore.from_config(config)  # IP -> hit dalam window
+        self.sketch = SketchDetector.from_config(config) if self.engine == "sketch" else None
+        self.alerted_ips = self.sketch.alerted if self.sketch else self.ip_window.alerted  # IP -> epoch alert terakhir
+        self.subnets = SubnetCounter.from_config(config)  # None jika subnet_prefixes kosong
+        self.ip_filter = IPFilter.from_config(config)  # None jika allow/blocklist kosong
+        self.blocklist_alerted = {}  # IP -> epoch alert blocklist terakhir
         self.file_inode = None
         self.file_offset = 0
         self.running = True
+        self.tailer = None
+        self.pipeline = None
+        self.prefilter = config.get("prefilter", True)
+        if self.prefilter and not self.log_format.request_is_first_quoted:
+            # Pre-filter mengambil path dari field berkutip pertama
+            logger.info(f"Pre-filter dinonaktifkan: %r bukan field berkutip pertama di {self.log_format.name}")
+            self.prefilter = False
+        self.matcher = PathMatcher.from_config(config)
+        self.time_cache = ApacheTimeCache()
+        # None jika detection_rules kosong: hanya rule path suspicious (dengan pre-filter)
+        self.rule_engine = RuleEngine.from_config(
+            config, self.emit_rule_alert, base_rules=[SuspiciousPathRule(self.record_hit)]
+        )
+
+    @property
+    def parse_failures(self):
+        """Jumlah baris yang gagal di-parse dengan `log_format` aktif."""
+        return self.log_format.failures
 
     def parse_line(self, line):
-        match = APACHE_COMBINED_REGEX.match(line)
-        if not match:
+        data = self.log_format.parse(line.rstrip("\r\n"))
+        if data is None:
             return None
-        data = match.groupdict()
-        try:
-            # Parse time: 01/Nov/2025:02:34:12 +0000
-            log_time = datetime.strptime(data["time"].split()[0], "%d/%b/%Y:%H:%M:%S")
-        except ValueError:
-            log_time = datetime.utcnow()
+        path = data.get("path") or data.get("url_path")
+        if not path:
+            return None
+        # Parse time: 01/Nov/2025:02:34:12 +0000 (offset dipertahankan);
+        # %{format}t sudah dikonversi LogFormat menjadi datetime
+        value = data.get("time")
+        if isinstance(value, datetime):
+            parsed = (int(value.timestamp()), value)
+        else:
+            parsed = self.time_cache.get(value) if value else None
+        if parsed is None:
+            now = datetime.now(timezone.utc)
+            parsed = (int(now.timestamp()), now)
         return {
-            "ip": data["ip"],
-            "path": data["path"],
-            "user_agent": data["user_agent"],
-            "timestamp": log_time,
+            "ip": data.get("ip", "-"),
+            "path": path,
+            "user_agent": data.get("user_agent", ""),
+            "status": data.get("status"),
+            "vhost": data.get("vhost"),
+            "epoch": parsed[0],
+            "timestamp": parsed[1],
             "raw": line.strip()
         }
 
+    def match_rule(self, path):
+        """Return nama rule yang match untuk path (lihat PathMatcher), atau None."""
+        return self.matcher.match(path)
+
     def is_suspicious_path(self, path):
-        ext = os.path.splitext(path)[1].lower()
-        if ext in self.config.get("suspicious_extensions", [".php", ".phar"]):
-            return True
-        for pattern in self.config.get("dangerous_patterns", []):
-            if re.search(pattern, path):
-                return True
-        return False
+        return self.matcher.match(path) is not None
 
     def check_threshold(self, ip, current_time):
-        window = self.config["window_seconds"]
+        """Cek threshold untuk IP; `current_time` adalah epoch detik (int)."""
         threshold = self.config["threshold"]
-        cutoff = current_time - timedelta(seconds=window)
-        dq = self.ip_window[ip]
-
         # Hapus entri lama
-        while dq and dq[0]["timestamp"] < cutoff:
-            dq.popleft()
+        hits = self.ip_window.expire(ip, current_time)
 
-        if len(dq) >= threshold:
+        if hits >= threshold:
             # Cek cooldown
-            last_alert = self.alerted_ips.get(ip)
-            cooldown = self.config["alert_cooldown"]
-            if not last_alert or (current_time - last_alert).total_seconds() > cooldown:
-                paths = list(set(e["path"] for e in dq))
-                example = dq[-1]["raw"]
-                self.alerted_ips[ip] = current_time
-                log_ip_alert(ip, len(dq), paths, example)
-                logger.warning(f"[ALERT] Suspicious IP {ip} with {len(dq)} hits")
-                self.alert_queue.put({
-                    "type": "ip_alert",
-                    "ip": ip,
-                    "hits": len(dq),
-                    "paths": paths[:3],
-                    "example_path": paths[0] if paths else "",
-                    "timestamp": now_str(),
-                    "raw": example
-                })
+            if not self.ip_window.in_cooldown(ip, current_time):
+                self.ip_window.mark_alerted(ip, current_time)
+                self.emit_ip_alert(ip, hits, self.ip_window.paths_for(ip), self.ip_window.last_raw(ip), current_time)
                 return True
         return False
 
+    def user_agent_of(self, raw):
+        """User agent dari baris log mentah (None jika format log tidak memuatnya)."""
+        entry = self.parse_line(raw) if raw else None
+        return (entry and entry.get("user_agent")) or None
+
+    def emit_ip_alert(self, ip, hits, paths, example, current_time):
+        """Catat alert IP ke DB (jika persist_alerts) dan kirim ke alert_queue."""
+        rules = sorted(set(filter(None, (self.match_rule(p) for p in paths))))
+        if self.persist_alerts:
+            log_ip_alert(ip, hits, paths, example, self.user_agent_of(example))
+        logger.warning(f"[ALERT] Suspicious IP {ip} with {hits} hits (rules: {', '.join(rules)})")
+        self.alert_queue.put({
+            "type": "ip_alert",
+            "ip": ip,
+            "hits": hits,
+            "paths": paths[:3],
+            "example_path": paths[0] if paths else "",
+            "rules": rules,
+            "timestamp": now_str(),
+            "epoch": current_time,
+            "raw": example
+        })
+
+    def emit_subnet_alert(self, subnet, hits, ip, path, raw, current_time):
+        """Catat alert subnet ke DB (jika persist_alerts) dan kirim ke alert_queue."""
+        if self.persist_alerts:
+            log_ip_alert(subnet, hits, [path], raw, self.user_agent_of(raw))
+        logger.warning(f"[ALERT] Suspicious subnet {subnet} with {hits} hits (contoh IP: {ip})")
+        self.alert_queue.put({
+            "type": "subnet_alert",
+            "subnet": subnet,
+            "hits": hits,
+            "example_ip": ip,
+            "example_path": path,
+            "timestamp": now_str(),
+            "epoch": current_time,
+            "raw": raw
+        })
+
+    def emit_rule_alert(self, rule, key, hits, entry):
+        """Alert dari RuleEngine; hanya rule ber-key IP yang dicatat ke ip_alerts."""
+        if self.persist_alerts and rule.key_field == "ip":
+            log_ip_alert(key, hits, [entry["path"]], entry["raw"], entry.get("user_agent") or None)
+        logger.warning(f"[ALERT] Rule {rule.name}: {rule.key_field}={key} with {hits} hits")
+        self.alert_queue.put({
+            "type": "rule_alert",
+            "rule": rule.name,
+            "key_field": rule.key_field,
+            "key": key,
+            "hits": hits,
+            "window_seconds": rule.window_seconds,
+            "ip": entry["ip"],
+            "example_path": entry["path"],
+            "timestamp": now_str(),
+            "epoch": entry["epoch"],
+            "raw": entry["raw"]
+        })
+
+    def emit_blocklist_alert(self, ip, cidr, path, raw, current_time):
+        """Alert langsung untuk IP di blocklist (sekali per alert_cooldown per IP)."""
+        cooldown = self.config.get("alert_cooldown", 3600)
+        last_alert = self.blocklist_alerted.get(ip)
+        if last_alert is not None and current_time - last_alert <= cooldown:
+            return False
+        if len(self.blocklist_alerted) >= 10000:
+            for key in [k for k, ts in self.blocklist_alerted.items() if current_time - ts > cooldown]:
+                del self.blocklist_alerted[key]
+        self.blocklist_alerted[ip] = current_time
+        if self.persist_alerts:
+            log_ip_alert(ip, 1, [path], raw, self.user_agent_of(raw))
+        logger.warning(f"[ALERT] Blocklisted IP {ip} ({cidr}) mengakses {path}")
+        self.alert_queue.put({
+            "type": "blocklist_alert",
+            "ip": ip,
+            "cidr": cidr,
+            "example_path": path,
+            "timestamp": now_str(),
+            "epoch": current_time,
+            "raw": raw
+        })
+        return True
+
+    def screen_ip(self, ip, epoch, path, raw):
+        """
+        Cek IP terhadap allow/blocklist. Return True jika IP ada di salah satu
+        list (allow: dilewati tanpa windowing, block: alert langsung).
+        """
+        listed = self.ip_filter.lookup(ip)
+        if listed is None:
+            return False
+        if listed[0] != ALLOW:
+            self.emit_blocklist_alert(ip, listed[1], path, raw, epoch)
+        return True
+
+    def reload_ip_lists(self, config=None):
+        """
+        Muat ulang allow/blocklist tanpa menghentikan thread tail. Jika `config`
+        (hasil baca ulang config.yaml) diberikan, list inline dan path file ikut
+        diperbarui; pool worker pipeline dibuat ulang dengan config baru.
+        """
+        if config is not None:
+            for key in IP_LIST_KEYS:
+                if key in config:
+                    self.config[key] = config[key]
+                else:
+                    self.config.pop(key, None)
+            if self.ip_filter is None:
+                self.ip_filter = IPFilter.from_config(self.config)
+                return
+        if self.ip_filter:
+            self.ip_filter.reload(self.config if config is not None else None)
+        if config is not None and self.pipeline:
+            self.pipeline.reload()
+
+    def screen_line(self, line):
+        """
+        Cek IP baris terhadap allow/blocklist sebelum deteksi path.
+
+        Return None jika baris selesai di sini (IP di allowlist atau baris tidak
+        valid), selain itu (listed, entry): listed = (verdict, cidr) untuk IP di
+        blocklist atau None, entry = hasil parse atau None jika IP cukup diambil
+        dari awal baris. Untuk IP di blocklist entry selalu terisi.
+        """
+        entry = None
+        if self.log_format.ip_is_first:
+            # IP ada di awal baris: dicek tanpa parse penuh
+            listed = self.ip_filter.lookup(line.partition(" ")[0])
+            if listed is None:
+                return None, None
+        else:
+            entry = self.parse_line(line)
+            if entry is None:
+                return None
+            listed = self.ip_filter.lookup(entry["ip"])
+            if listed is None:
+                return None, entry
+        if listed[0] == ALLOW:
+            return None
+        if entry is None:
+            entry = self.parse_line(line)
+            if entry is None:
+                return None
+        return listed, entry
+
+    def match_record(self, line):
+        """
+        Versi `process_line` untuk worker pipeline/replay (tanpa window dan alert).
+
+        Return None, atau record (epoch, ip, path, raw, cidr) untuk `apply_record`:
+        cidr terisi jika IP ada di blocklist, None untuk hit path suspicious.
+        """
+        entry = None
+        if self.ip_filter:
+            screened = self.screen_line(line)
+            if screened is None:
+                return None
+            listed, entry = screened
+            if listed is not None:
+                return entry["epoch"], entry["ip"], entry["path"], entry["raw"], listed[1]
+        entry = self.match_line(line, entry)
+        if entry is None:
+            return None
+        return entry["epoch"], entry["ip"], entry["path"], entry["raw"], None
+
+    def apply_record(self, epoch, ip, path, raw, cidr=None):
+        """Terapkan record dari `match_record` di thread yang memegang window."""
+        if cidr is not None:
+            self.emit_blocklist_alert(ip, cidr, path, raw, epoch)
+            return False
+        return self.record_hit(ip, epoch, path, raw)
+
+    def match_entry(self, line):
+        """
+        Versi `match_record` jika RuleEngine aktif (rule tambahan butuh setiap baris).
+
+        Return None, record blocklist (lihat match_record), atau entry hasil
+        parse_line (dengan "rule") untuk `apply_item`.
+        """
+        entry = None
+        if self.ip_filter:
+            screened = self.screen_line(line)
+            if screened is None:
+                return None
+            listed, entry = screened
+            if listed is not None:
+                return entry["epoch"], entry["ip"], entry["path"], entry["raw"], listed[1]
+        if entry is None:
+            entry = self.parse_line(line)
+            if entry is None:
+                return None
+        entry["rule"] = self.match_rule(entry["path"])
+        return entry
+
+    def apply_item(self, item):
+        """Terapkan hasil `match_entry`/`match_record`: entry ke RuleEngine, record ke apply_record."""
+        if isinstance(item, dict):
+            self.rule_engine.process(item)
+        else:
+            self.apply_record(*item)
+
+    def rule_stats(self):
+        """Counter dan biaya (ns/baris) per rule, None jika RuleEngine tidak aktif."""
+        return self.rule_engine.stats() if self.rule_engine else None
+
+    def window_stats(self):
+        """Counter ukuran state deteksi (IP, entri, path, cooldown / sketch, subnet)."""
+        stats = self.sketch.stats() if self.sketch else self.ip_window.stats()
+        if self.subnets:
+            stats["subnet"] = self.subnets.stats()
+        return stats
+
+    def match_line(self, line, entry=None):
+        """
+        Parse baris (kecuali `entry` hasil parse sudah ada) dan return entry
+        (dengan "rule") jika path suspicious, selain itu None.
+        """
+        path = rule = None
+        if entry is None:
+            if self.prefilter:
+                # Fast-reject: mayoritas baris tidak suspicious, lewati parse penuh
+                path = extract_request_path(line)
+                if path is None:
+                    return None
+                rule = self.match_rule(path)
+                if rule is None:
+                    return None
+            entry = self.parse_line(line)
+            if not entry:
+                return None
+        # Path hasil pre-filter sudah dicek; cek ulang hanya jika berbeda
+        if entry["path"] != path:
+            rule = self.match_rule(entry["path"])
+        if not rule:
+            return None
+        entry["rule"] = rule
+        return entry
+
+    def record_hit(self, ip, epoch, path, raw):
+        """Masukkan hit suspicious ke window (atau sketch) dan cek threshold."""
+        if self.ip_filter and self.screen_ip(ip, epoch, path, raw):
+            return False
+        if self.subnets:
+            for subnet, hits in self.subnets.add(ip, epoch):
+                self.emit_subnet_alert(subnet, hits, ip, path, raw, epoch)
+        if self.sketch:
+            result = self.sketch.add(ip, epoch, path, raw)
+            if result is None:
+                return False
+            hits, paths, example = result
+            self.emit_ip_alert(ip, hits, paths, example, epoch)
+            return True
+        self.ip_window.add(ip, epoch, path, raw)
+        return self.check_threshold(ip, epoch)
+
+    def process_line(self, line):
+        # Allow/blocklist dicek untuk setiap baris, bukan hanya path suspicious.
+        # Rule tambahan (status, user agent, path unik) butuh setiap baris, jadi
+        # parse sekali lalu bagikan entry ke semua rule
+        item = self.match_entry(line) if self.rule_engine else self.match_record(line)
+        if item is not None:
+            self.apply_item(item)
+
+    def process_lines(self, lines):
+        if self.ip_filter:
+            self.ip_filter.maybe_reload()
+        for line in lines:
+            if line:
+                self.process_line(line)
+
     def tail_file(self, filepath):
+        """Tail file sesuai `tail_mode` ("chunked" default, atau "readline")."""
+        if self.config.get("tail_mode", "chunked") == "readline":
+            return self.tail_file_readline(filepath)
+        return self.tail_files([filepath])
+
+    def tail_files(self, patterns):
+        """
+        Tail semua path/glob dalam satu loop (lihat MultiTailer); window dipakai bersama.
+
+        Jika `pipeline_workers` > 0, parse dijalankan di process pool (lihat
+        ParsePipeline) dan thread ini hanya membaca serta membentuk batch.
+        """
+        from .pipeline import ParsePipeline
+        self.pipeline = ParsePipeline.from_config(self)
+        checkpoint = CheckpointStore.from_config(self.config)
+        if self.pipeline:
+            logger.info(f"Pipeline parse aktif dengan {self.pipeline.workers} worker")
+            checkpoint = self.pipeline.wrap_checkpoint(checkpoint)
+        self.tailer = MultiTailer(
+            patterns,
+            self.pipeline.submit if self.pipeline else self.process_lines,
+            encoding=self.config.get("log_encoding", "utf-8"),
+            chunk_size=self.config.get("tail_chunk_size", DEFAULT_CHUNK_SIZE),
+            use_inotify=self.config.get("tail_use_inotify", True),
+            stats_interval=self.config.get("tail_stats_interval", 60),
+            rescan_interval=self.config.get("tail_rescan_interval", 30),
+            checkpoint=checkpoint,
+            on_idle=self.pipeline.flush if self.pipeline else None,
+        )
+        try:
+            self.tailer.run()
+        finally:
+            if self.pipeline:
+                self.pipeline.close()
+                if checkpoint:
+                    # Offset batch terakhir baru tersedia setelah aggregator selesai
+                    checkpoint.flush()
+
+    def tail_file_readline(self, filepath):
         """Tail file safely across rotation using inode tracking."""
         while self.running:
             try:
@@ -109,26 +465,42 @@ class LogMonitor:
                         line = f.readline()
                         if line:
                             self.file_offset = f.tell()
-                            entry = self.parse_line(line)
-                            if entry and self.is_suspicious_path(entry["path"]):
-                                now = entry["timestamp"]
-                                key = (entry["ip"], entry["user_agent"], entry["path"])
-                                self.ip_window[entry["ip"]].append(entry)
-                                self.check_threshold(entry["ip"], now)
+                            self.process_lines([line])
                         else:
                             time.sleep(0.5)
             except (OSError, IOError) as e:
                 logger.error(f"Error reading log file: {e}")
                 time.sleep(2)
 
-    def start(self):
-        """Memulai log monitoring dengan validasi path"""
-        log_path = self.config.get("target_log_path")
-        
+    def tail_stats(self):
+        """Statistik tail (lines/sec dll), None untuk mode readline."""
+        if not self.tailer:
+            return None
+        stats = self.tailer.stats()
+        if self.pipeline:
+            stats["pipeline"] = self.pipeline.stats()
+        return stats
+
+    def stop(self):
+        self.running = False
+        if self.tailer:
+            self.tailer.stop()
+
+    @staticmethod
+    def log_patterns(config):
+        """Normalisasi `target_log_path` (string, glob, atau list) menjadi list."""
+        log_path = config.get("target_log_path")
         if not log_path:
-            logger.error("target_log_path tidak dikonfigurasi di config.yaml")
-            raise ValueError("target_log_path tidak dikonfigurasi")
-        
+            return []
+        if isinstance(log_path, str):
+            return [log_path]
+        return [p for p in log_path if p]
+
+    def _validate_log_path(self, log_path):
+        if glob.has_magic(log_path):
+            if not glob.glob(log_path):
+                logger.warning(f"Belum ada file log yang cocok dengan: {log_path}")
+            return
         # Validasi path (warning saja, karena file log mungkin belum ada saat startup)
         if not os.path.exists(log_path):
             logger.warning(f"File log tidak ditemukan: {log_path}")
@@ -138,8 +510,25 @@ class LogMonitor:
                 raise ValueError(f"target_log_path harus berupa file, bukan directory: {log_path}")
             if not os.access(log_path, os.R_OK):
                 logger.warning(f"Tidak memiliki permission read untuk: {log_path}")
-        
-        logger.info(f"Memulai log monitoring untuk: {log_path}")
-        thread = threading.Thread(target=self.tail_file, args=(log_path,), daemon=True)
+
+    def start(self):
+        """Memulai log monitoring dengan validasi path"""
+        patterns = self.log_patterns(self.config)
+
+        if not patterns:
+            logger.error("target_log_path tidak dikonfigurasi di config.yaml")
+            raise ValueError("target_log_path tidak dikonfigurasi")
+
+        for log_path in patterns:
+            self._validate_log_path(log_path)
+
+        logger.info(f"Memulai log monitoring untuk: {', '.join(patterns)}")
+        single_file = len(patterns) == 1 and not glob.has_magic(patterns[0])
+        if self.config.get("tail_mode", "chunked") == "readline" and single_file:
+            thread = threading.Thread(target=self.tail_file_readline, args=(patterns[0],), daemon=True)
+        else:
+            if self.config.get("tail_mode", "chunked") == "readline":
+                logger.warning("tail_mode readline hanya mendukung satu file, memakai mode chunked")
+            thread = threading.Thread(target=self.tail_files, args=(patterns,), daemon=True)
         thread.start()
-        return thread
\ No newline at end of file
+        return thread
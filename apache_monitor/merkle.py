@@ -0,0 +1,118 @@
+# apache_monitor/merkle.py
+import os
+import hashlib
+
+from .scanner import UNREADABLE
+
+
+def file_leaf(name, st, checksum):
+    """Leaf file: (nama, size, mtime_ns, checksum). Nama tidak mungkin berisi NUL, jadi aman sebagai pemisah."""
+    return b"f\0%s\0%d\0%d\0%s\0" % (os.fsencode(name), st.st_size, st.st_mtime_ns, (checksum or "").encode())
+
+
+def dir_leaf(name, digest):
+    return b"d\0%s\0%s\0" % (os.fsencode(name), digest.encode())
+
+
+def dir_digest(leaves):
+    """Digest direktori = SHA-256 atas leaf anak-anaknya yang diurutkan (tidak bergantung urutan scandir)."""
+    h = hashlib.sha256()
+    for leaf in sorted(leaves):
+        h.update(leaf)
+    return h.hexdigest()
+
+
+class DirNode:
+    """
+    Direktori yang sedang/selesai diproses: leaf anak, record anak langsung, dan
+    digest akhir. `complete` False jika ada direktori tak terbaca di subtree-nya
+    (digest-nya tidak mewakili isi sebenarnya).
+    """
+
+    __slots__ = ("path", "stat", "leaves", "files", "dirs", "pending", "digest", "complete")
+
+    def __init__(self, path, st):
+        self.path = path
+        self.stat = st
+        self.leaves = []
+        self.files = []  # (rel_path, stat, checksum) file langsung di direktori ini
+        self.dirs = []  # (rel_path, stat) subdirektori langsung
+        self.pending = {}  # nama -> DirNode subdirektori yang isinya belum mulai di-walk
+        self.digest = None
+        self.complete = True
+
+
+class MerkleBuilder:
+    """
+    Hitung digest Merkle tiap direktori dari record Scanner.walk/scan.
+
+    Record harus dalam urutan path (root "." pertama, isi subdirektori
+    berurutan di bawah `nama/`). Record subdirektori boleh mendahului
+    saudaranya yang lain (mis. "a", "a.txt", lalu "a/x"): subdirektori
+    baru dibuka saat isi pertamanya muncul. Hanya direktori di jalur root ->
+    posisi saat ini yang disimpan, jadi memori sebanding kedalaman x isi
+    satu direktori, bukan jumlah file. `add()` dan `finish()` mengembalikan
+    DirNode yang subtree-nya sudah lengkap (anak selalu sebelum induknya).
+    """
+
+    def __init__(self):
+        self._stack = []
+
+    @staticmethod
+    def _contains(parent, path):
+        return parent == "." or path.startswith(parent + os.sep)
+
+    def _close(self):
+        node = self._stack.pop()
+        # Subdirektori yang tidak pernah dibuka = direktori kosong
+        done = list(node.pending.values())
+        for child in done:
+            child.digest = dir_digest(())
+            child.leaves = None
+            node.complete = node.complete and child.complete
+            node.leaves.append(dir_leaf(os.path.basename(child.path), child.digest))
+        node.pending = None
+        node.digest = dir_digest(node.leaves)
+        node.leaves = None
+        if self._stack:
+            parent = self._stack[-1]
+            parent.leaves.append(dir_leaf(os.path.basename(node.path), node.digest))
+            parent.complete = parent.complete and node.complete
+        done.append(node)
+        return done
+
+    def add(self, rel_path, is_dir, st, checksum=None):
+        done = []
+        if not self._stack:
+            if is_dir:
+                self._stack.append(DirNode(rel_path, st))
+            return done
+        while len(self._stack) > 1 and not self._contains(self._stack[-1].path, rel_path):
+            done.extend(self._close())
+        if is_dir is UNREADABLE and rel_path == self._stack[-1].path:
+            # Root tidak terbaca
+            self._stack[-1].complete = False
+            return done
+        parent = self._stack[-1]
+        parent_path = os.path.dirname(rel_path) or "."
+        if parent.path != parent_path:
+            # Isi subdirektori mulai: buka node-nya
+            parent = parent.pending.pop(os.path.basename(parent_path))
+            self._stack.append(parent)
+        name = os.path.basename(rel_path)
+        if is_dir is UNREADABLE:
+            # Penanda dari Scanner.walk: subdirektori tidak pernah dibuka, tandai tidak lengkap
+            parent.pending[name].complete = False
+        elif is_dir:
+            parent.pending[name] = DirNode(rel_path, st)
+            parent.dirs.append((rel_path, st))
+        else:
+            parent.leaves.append(file_leaf(name, st, checksum))
+            parent.files.append((rel_path, st, checksum))
+        return done
+
+    def finish(self):
+        done = []
+        while self._stack:
+            done.extend(self._close())
+        return done
@@ -100,6 +100,35 @@ class Notifier:
                 f"📍 IP: {event.get('ip', 'N/A')}\n"
                 f"🔢 Hits: {event.get('hits', 0)} dalam {self.config.get('window_seconds', 60)}s\n"
                 f"📂 Path: {event.get('example_path', 'N/A')}\n"
+                f"🎯 Rule: {', '.join(event.get('rules') or []) or 'N/A'}\n"
+                f"⏰ Time: {event.get('timestamp', 'N/A')}"
+            )
+            return msg
+        elif event["type"] == "subnet_alert":
+            msg = (
+                f"🟠 [ALERT] Serangan terdistribusi dari satu subnet\n"
+                f"🌐 Subnet: {event.get('subnet', 'N/A')}\n"
+                f"🔢 Hits: {event.get('hits', 0)} dalam {self.config.get('window_seconds', 60)}s\n"
+                f"📍 Contoh IP: {event.get('example_ip', 'N/A')}\n"
+                f"📂 Path: {event.get('example_path', 'N/A')}\n"
+                f"⏰ Time: {event.get('timestamp', 'N/A')}"
+            )
+            return msg
+        elif event["type"] == "blocklist_alert":
+            msg = (
+                f"⛔ [ALERT] Akses dari IP blocklist\n"
+                f"📍 IP: {event.get('ip', 'N/A')} ({event.get('cidr', 'N/A')})\n"
+                f"📂 Path: {event.get('example_path', 'N/A')}\n"
+                f"⏰ Time: {event.get('timestamp', 'N/A')}"
+            )
+            return msg
+        elif event["type"] == "rule_alert":
+            msg = (
+                f"🟡 [ALERT] Rule {event.get('rule', 'N/A')} terpicu\n"
+                f"🔑 {event.get('key_field', 'key')}: {event.get('key', 'N/A')}\n"
+                f"🔢 Hits: {event.get('hits', 0)} dalam {event.get('window_seconds', 60)}s\n"
+                f"📍 IP: {event.get('ip', 'N/A')}\n"
+                f"📂 Path: {event.get('example_path', 'N/A')}\n"
                 f"⏰ Time: {event.get('timestamp', 'N/A')}"
             )
             return msg
@@ -0,0 +1,250 @@
+# apache_monitor/pipeline.py
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .log_monitor import LogMonitor
+
+logger = logging.getLogger("Pipeline")
+
+DEFAULT_BATCH_LINES = 2000
+
+# Monitor per proses worker (dibuat sekali per proses, bukan per batch)
+_worker_monitor = None
+
+
+def worker_monitor(config):
+    """Return LogMonitor milik proses worker ini (dibuat ulang jika config berbeda)."""
+    global _worker_monitor
+    if _worker_monitor is None or _worker_monitor.config != config:
+        _worker_monitor = LogMonitor(config, None, persist_alerts=False)
+    return _worker_monitor
+
+
+def _init_worker(config):
+    worker_monitor(config)
+
+
+def _new_pool(workers, config):
+    # forkserver: worker tidak mewarisi lock logging/sqlite dari thread yang
+    # sudah jalan (DBWriter, observer, bot); monitor dibangun ulang dari config
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,),
+                               mp_context=multiprocessing.get_context("forkserver"))
+
+
+def _match_text(monitor, text):
+    failures_before = monitor.parse_failures
+    records = []
+    lines = 0
+    for line in text.split("\n"):
+        if not line:
+            continue
+        lines += 1
+        record = monitor.match_record(line)
+        if record is not None:
+            records.append(record)
+    return lines, monitor.parse_failures - failures_before, records
+
+
+def match_batch(text):
+    """
+    Parse + cocokkan path suspicious dan allow/blocklist untuk satu batch di worker.
+
+    Batch dikirim sebagai satu string (baris digabung newline) karena jauh
+    lebih murah di-pickle daripada list string. Config hanya dikirim saat
+    worker dibuat (pool dibuat ulang setelah reload). Return (jumlah baris
+    tidak kosong, jumlah gagal parse, list record LogMonitor.match_record).
+    """
+    monitor = _worker_monitor
+    if monitor.ip_filter:
+        monitor.ip_filter.maybe_reload()
+    return _match_text(monitor, text)
+
+
+class _DeferredCheckpoint:
+    """
+    Pembungkus CheckpointStore untuk MultiTailer yang memakai ParsePipeline.
+
+    Offset dari tailer ikut batch berikutnya dan baru diteruskan ke store
+    setelah batch itu selesai di-aggregate, jadi checkpoint tidak pernah
+    mendahului baris yang masih diproses worker (crash berarti baca ulang,
+    bukan kehilangan baris). Store tetap hanya disentuh thread tailer.
+    """
+
+    def __init__(self, store, pipeline):
+        self.store = store
+        self.pipeline = pipeline
+
+    def get(self, path):
+        return self.store.get(path)
+
+    def update(self, path, inode, offset, lines=0):
+        self.pipeline.add_mark((path, inode, offset, lines))
+
+    def _apply(self):
+        for mark in self.pipeline.pop_done():
+            self.store.update(*mark)
+
+    def maybe_flush(self):
+        self._apply()
+        return self.store.maybe_flush()
+
+    def flush(self):
+        self._apply()
+        self.store.flush()
+
+
+class ParsePipeline:
+    """
+    Pipeline tiga tahap untuk tail live di banyak core.
+
+    1. Reader (thread MultiTailer) mengumpulkan baris menjadi batch.
+    2. Process pool menjalankan parse + pencocokan path per batch dan hanya
+       mengembalikan record yang cocok.
+    3. Satu thread aggregator memegang ip_window dan check_threshold milik
+       `monitor` (lewat record_hit).
+
+    Future dikonsumsi aggregator sesuai urutan submit, jadi urutan baris per
+    file (dan antar batch) tetap terjaga. Jumlah batch in-flight dibatasi
+    `max_inflight` sehingga reader tertahan jika worker tertinggal. Batch
+    yang gagal di worker diproses ulang di thread aggregator, dan checkpoint
+    dari `wrap_checkpoint` baru maju setelah batch-nya di-aggregate.
+    """
+
+    def __init__(self, monitor, workers, batch_lines=DEFAULT_BATCH_LINES, max_inflight=None):
+        self.monitor = monitor
+        self.workers = workers
+        self.batch_lines = batch_lines
+        self.pool = _new_pool(workers, monitor.config)
+        self._reload = False
+        self._futures = queue.Queue(maxsize=max_inflight or workers * 4)
+        self._pending = []
+        self._pending_count = 0
+        self._marks = []  # offset checkpoint yang menunggu batch berikutnya
+        self._done = deque()  # offset checkpoint yang batch-nya sudah di-aggregate
+        self.batches = 0
+        self.lines = 0
+        self.parse_failures = 0
+        self.records = 0
+        self.failed_batches = 0
+        self._aggregator = threading.Thread(target=self._aggregate, name="PipelineAggregator", daemon=True)
+        self._aggregator.start()
+
+    @classmethod
+    def from_config(cls, monitor):
+        """Return ParsePipeline jika `pipeline_workers` > 0, selain itu None."""
+        config = monitor.config
+        workers = config.get("pipeline_workers") or 0
+        if workers == "auto":
+            workers = os.cpu_count() or 1
+        if workers <= 0:
+            return None
+        if monitor.rule_engine:
+            # Rule tambahan butuh setiap baris, bukan hanya record yang cocok
+            logger.warning("pipeline_workers diabaikan: detection_rules aktif, memakai mode satu thread")
+            return None
+        return cls(
+            monitor,
+            workers,
+            batch_lines=config.get("pipeline_batch_lines", DEFAULT_BATCH_LINES),
+            max_inflight=config.get("pipeline_max_inflight"),
+        )
+
+    def wrap_checkpoint(self, store):
+        """Return checkpoint untuk MultiTailer yang offset-nya menunggu batch selesai."""
+        return _DeferredCheckpoint(store, self) if store is not None else None
+
+    def add_mark(self, mark):
+        """Catat offset checkpoint (path, inode, offset, lines) untuk batch berikutnya."""
+        self._marks.append(mark)
+
+    def pop_done(self):
+        """Ambil offset checkpoint yang batch-nya sudah di-aggregate (urut)."""
+        done = self._done
+        while done:
+            yield done.popleft()
+
+    def reload(self):
+        """Minta pool dibuat ulang dengan config monitor terbaru (mis. setelah reload_ip_lists)."""
+        self._reload = True
+
+    def _swap_pool(self):
+        # Di thread reader: batch yang sudah dikirim tetap selesai di pool lama
+        self._reload = False
+        old, self.pool = self.pool, _new_pool(self.workers, self.monitor.config)
+        old.shutdown(wait=False)
+
+    def submit(self, lines):
+        """Callback on_lines untuk MultiTailer: tampung baris dan kirim per batch."""
+        self._pending.append("\n".join(lines))
+        self._pending_count += len(lines)
+        if self._pending_count >= self.batch_lines:
+            self.flush()
+
+    def flush(self):
+        """Kirim baris yang masih tertampung (dipanggil juga saat tailer idle)."""
+        marks, self._marks = self._marks, []
+        if not self._pending:
+            if marks:
+                # Tidak ada baris baru: offset cukup menunggu batch sebelumnya
+                self._futures.put((None, None, marks))
+            return
+        text = "\n".join(self._pending)
+        self._pending = []
+        self._pending_count = 0
+        self.batches += 1
+        if self._reload:
+            self._swap_pool()
+        # Blok jika antrian penuh (backpressure ke reader)
+        self._futures.put((self.pool.submit(match_batch, text), text, marks))
+
+    def _aggregate(self):
+        apply_record = self.monitor.apply_record
+        ip_filter = self.monitor.ip_filter
+        while True:
+            item = self._futures.get()
+            if item is None:
+                return
+            future, text, marks = item
+            if future is not None:
+                if ip_filter:
+                    ip_filter.maybe_reload()
+                try:
+                    lines, failures, records = future.result()
+                except Exception as e:
+                    # Mis. worker mati: proses di thread ini supaya barisnya tidak hilang
+                    self.failed_batches += 1
+                    logger.error(f"Batch pipeline gagal di worker ({e}), diproses ulang di aggregator")
+                    try:
+                        lines, failures, records = _match_text(self.monitor, text)
+                    except Exception as e:
+                        logger.error(f"Batch pipeline gagal diproses: {e}", exc_info=True)
+                        lines, failures, records = 0, 0, []
+                self.lines += lines
+                self.parse_failures += failures
+                self.records += len(records)
+                for record in records:
+                    apply_record(*record)
+            self._done.extend(marks)
+
+    def close(self):
+        """Flush sisa batch, tunggu aggregator selesai, lalu matikan pool."""
+        self.flush()
+        self._futures.put(None)
+        self._aggregator.join()
+        self.pool.shutdown()
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "batches": self.batches,
+            "lines": self.lines,
+            "parse_failures": self.parse_failures,
+            "records": self.records,
+            "failed_batches": self.failed_batches,
+            "inflight": self._futures.qsize(),
+        }
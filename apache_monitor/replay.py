@@ -0,0 +1,207 @@
+# apache_monitor/replay.py
+import os
+import re
+import glob
+import gzip
+import time
+import queue
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from .log_monitor import LogMonitor
+from .pipeline import worker_monitor
+
+logger = logging.getLogger("Replay")
+
+DEFAULT_RANGE_BYTES = 64 * 1024 * 1024
+_ROTATED_SUFFIX = re.compile(r"\.(\d+)(\.gz)?$")
+
+
+def collect_log_files(patterns):
+    """
+    Kumpulkan file log live beserta hasil rotasinya (access.log.N, access.log.N.gz).
+
+    Diurutkan dari yang paling lama (N terbesar) sampai file live.
+    """
+    files = []
+    seen = set()
+    for pattern in patterns:
+        live_files = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for live in live_files:
+            rotated = []
+            for candidate in glob.glob(glob.escape(live) + ".*"):
+                m = _ROTATED_SUFFIX.search(candidate[len(live):])
+                if m and m.start() == 0:
+                    rotated.append((int(m.group(1)), candidate))
+            ordered = [path for _, path in sorted(rotated, reverse=True)]
+            if os.path.isfile(live):
+                ordered.append(live)
+            for path in ordered:
+                if path not in seen:
+                    seen.add(path)
+                    files.append(path)
+    return files
+
+
+def plan_units(files, range_bytes=DEFAULT_RANGE_BYTES):
+    """Pecah file menjadi unit kerja (path, start, end); file .gz selalu satu unit."""
+    units = []
+    for path in files:
+        size = os.path.getsize(path)
+        if path.endswith(".gz") or size <= range_bytes:
+            units.append((path, 0, None))
+            continue
+        for start in range(0, size, range_bytes):
+            units.append((path, start, min(start + range_bytes, size)))
+    return units
+
+
+def _iter_unit_lines(path, start, end):
+    """Iterasi baris biner milik unit: baris yang dimulai di [start, end)."""
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            yield from f
+        return
+    with open(path, "rb") as f:
+        if start:
+            # Baris yang terpotong milik unit sebelumnya
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        for line in f:
+            if end is not None and pos >= end:
+                break
+            pos += len(line)
+            yield line
+
+
+def scan_unit(config, unit):
+    """
+    Jalankan parse + pencocokan path suspicious untuk satu unit di worker.
+
+    Return (jumlah baris, jumlah gagal parse, list item). Item adalah record
+    LogMonitor.match_record, atau jika detection_rules aktif hasil
+    LogMonitor.match_entry (entry setiap baris untuk RuleEngine).
+    """
+    monitor = worker_monitor(config)
+    match = monitor.match_entry if monitor.rule_engine else monitor.match_record
+    encoding = config.get("log_encoding", "utf-8")
+    path, start, end = unit
+
+    lines = 0
+    failures_before = monitor.parse_failures
+    records = []
+    for raw in _iter_unit_lines(path, start, end):
+        lines += 1
+        record = match(raw.decode(encoding, "replace"))
+        if record is not None:
+            records.append(record)
+    return lines, monitor.parse_failures - failures_before, records
+
+
+def _scan_unit_star(args):
+    return scan_unit(*args)
+
+
+def _epoch(item):
+    return item["epoch"] if isinstance(item, dict) else item[0]
+
+
+def _suspicious(item):
+    return item.get("rule") is not None if isinstance(item, dict) else True
+
+
+def replay(config, files=None, workers=None, range_bytes=None):
+    """
+    Proses ulang log historis secara paralel dan kembalikan alert yang akan terjadi.
+
+    Unit kerja dibagi ke process pool per file (dan per rentang byte untuk file
+    besar), hasilnya digabung berurutan waktu lalu dilewatkan ke aturan deteksi
+    yang sama dengan mode live (tanpa menulis ke DB).
+    """
+    if files is None:
+        files = collect_log_files(LogMonitor.log_patterns(config))
+    range_bytes = range_bytes or config.get("replay_range_bytes", DEFAULT_RANGE_BYTES)
+    workers = workers or config.get("replay_workers") or os.cpu_count() or 1
+    units = plan_units(files, range_bytes)
+
+    started = time.perf_counter()
+    total_lines = 0
+    total_failed = 0
+    records = []
+    logger.info(f"Replay {len(files)} file dalam {len(units)} unit dengan {workers} worker")
+    if workers <= 1 or len(units) <= 1:
+        results = (scan_unit(config, unit) for unit in units)
+        for lines, failed, unit_records in results:
+            total_lines += lines
+            total_failed += failed
+            records.extend(unit_records)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() menjaga urutan unit, jadi urutan per file tetap terjaga
+            for lines, failed, unit_records in pool.map(_scan_unit_star, ((config, u) for u in units)):
+                total_lines += lines
+                total_failed += failed
+                records.extend(unit_records)
+
+    # Sort stabil: record dengan detik yang sama tetap urut sesuai file/offset
+    records.sort(key=_epoch)
+
+    alert_queue = queue.Queue()
+    monitor = LogMonitor(config, alert_queue, persist_alerts=False)
+    for record in records:
+        monitor.apply_item(record)
+
+    alerts = []
+    while not alert_queue.empty():
+        alerts.append(alert_queue.get_nowait())
+
+    elapsed = time.perf_counter() - started
+    return {
+        "files": files,
+        "units": len(units),
+        "workers": workers,
+        "lines": total_lines,
+        "parse_failures": total_failed,
+        "suspicious": sum(1 for r in records if _suspicious(r)),
+        "rules": [rule.name for rule in monitor.rule_engine.rules] if monitor.rule_engine else ["suspicious_path"],
+        "alerts": alerts,
+        "elapsed": elapsed,
+        "lines_per_sec": total_lines / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def format_report(result):
+    """Format hasil replay sebagai laporan teks."""
+    out = [
+        "=== Replay Report ===",
+        f"File          : {len(result['files'])}",
+        f"Unit kerja    : {result['units']} ({result['workers']} worker)",
+        f"Baris         : {result['lines']} ({result['parse_failures']} gagal parse)",
+        f"Suspicious    : {result['suspicious']}",
+        f"Rule deteksi  : {', '.join(result['rules'])}",
+        f"Alert         : {len(result['alerts'])}",
+        f"Durasi        : {result['elapsed']:.2f}s ({result['lines_per_sec']:,.0f} lines/s)",
+    ]
+    for path in result["files"]:
+        out.append(f"  - {path}")
+    if result["alerts"]:
+        out.append("")
+        out.append("Waktu (UTC)          IP                                       Hits  Rules / Paths")
+    for alert in result["alerts"]:
+        when = datetime.fromtimestamp(alert["epoch"], timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        if alert["type"] == "subnet_alert":
+            out.append(f"{when}  {alert['subnet']:<40} {alert['hits']:>5}  subnet | {alert['example_path']}")
+            continue
+        if alert["type"] == "rule_alert":
+            out.append(f"{when}  {alert['ip']:<40} {alert['hits']:>5}  {alert['rule']} "
+                       f"({alert['key_field']}={alert['key']}) | {alert['example_path']}")
+            continue
+        if alert["type"] == "blocklist_alert":
+            out.append(f"{when}  {alert['ip']:<40} {'-':>5}  blocklist {alert['cidr']} | {alert['example_path']}")
+            continue
+        rules = ", ".join(alert.get("rules") or [])
+        paths = ", ".join(alert.get("paths") or [])
+        out.append(f"{when}  {alert['ip']:<40} {alert['hits']:>5}  {rules} | {paths}")
+    return "\n".join(out)
@@ -0,0 +1,326 @@
+# apache_monitor/reports.py
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from . import db
+from .retention import DEFAULT_PATH_DEPTH, path_prefix
+
+logger = logging.getLogger("Reports")
+
+DEFAULT_CACHE_TTL = 60
+DEFAULT_LIMIT = 10
+DEFAULT_DEPTH = 2
+DEFAULT_RANGE = "24h"
+
+_RELATIVE = re.compile(r"^(\d+)\s*([mhdw])$")
+_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def resolve_time(spec, now=None):
+    """
+    Ubah spesifikasi waktu menjadi string timestamp SQLite (UTC).
+
+    Menerima durasi relatif ke sekarang ("90m", "24h", "7d", "2w") atau
+    tanggal/jam ISO ("2025-01-31", "2025-01-31 10:00", dengan atau tanpa
+    offset; tanpa offset dianggap UTC). None tetap None.
+    """
+    if spec is None or spec == "":
+        return None
+    now = now or datetime.now(timezone.utc)
+    text = str(spec).strip()
+    match = _RELATIVE.match(text)
+    if match:
+        moment = now - timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+    else:
+        try:
+            moment = datetime.fromisoformat(text)
+        except ValueError:
+            raise ValueError(f"Format waktu tidak dikenal: {spec!r} (contoh: 24h, 7d, 2025-01-31 10:00)")
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+    return moment.strftime(_TIME_FORMAT)
+
+
+def dir_prefix(directory, depth):
+    """Potong key direktori (hasil path_prefix) menjadi paling banyak `depth` komponen."""
+    if not directory or directory == ".":
+        return directory
+    return "/".join(directory.split("/")[:depth])
+
+
+# Alert per IP di rentang: data mentah + rollup (parameter: start, end, parameter WHERE rollup)
+_ALERTS_BY_IP = """
+    SELECT ip, SUM(alerts) AS alerts, SUM(hits) AS hits FROM (
+        SELECT ip, COUNT(*) AS alerts, COALESCE(SUM(hits), 0) AS hits
+        FROM ip_alerts WHERE timestamp >= ? AND timestamp < ? GROUP BY ip
+        UNION ALL
+        SELECT ip, alerts, hits FROM ip_alert_rollup WHERE {where}
+    ) GROUP BY ip
+"""
+
+
+class Reporter:
+    """
+    Laporan riwayat dari alerts.db: top IP, top path, alert per jam dan
+    event filesystem per direktori untuk rentang waktu bebas.
+
+    Data mentah dibaca lewat index covering (timestamp, ...) sehingga hanya
+    baris di rentang yang disentuh. Data yang sudah dihapus retensi diambil
+    dari tabel rollup: per jam selama masih ada, per hari untuk yang lebih
+    tua. Top path hanya dari data mentah (rollup tidak menyimpan path).
+    Rollup event filesystem disimpan per direktori sedalam
+    `retention_path_depth`, jadi hanya dipakai jika `depth` laporan tidak
+    lebih dalam dari itu.
+
+    Hasil di-cache `cache_ttl` detik per (laporan, argumen asli), jadi
+    "24h" yang diminta berulang dari bot tidak query ulang ke DB.
+    """
+
+    def __init__(self, path=None, cache_ttl=DEFAULT_CACHE_TTL, rollup_depth=DEFAULT_PATH_DEPTH):
+        self.path = path
+        self.cache_ttl = cache_ttl
+        self.rollup_depth = rollup_depth
+        self.queries = 0
+        self.cache_hits = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            cache_ttl=config.get("report_cache_ttl", DEFAULT_CACHE_TTL),
+            rollup_depth=config.get("retention_path_depth", DEFAULT_PATH_DEPTH),
+        )
+
+    def _cached(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] > now:
+                self.cache_hits += 1
+                return hit[1]
+        value = compute()
+        with self._lock:
+            self.queries += 1
+            if len(self._cache) >= 256:
+                self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            self._cache[key] = (now + self.cache_ttl, value)
+        return value
+
+    def _connect(self):
+        conn = db.connect(self.path)
+        conn.create_function("path_prefix", 2, path_prefix, deterministic=True)
+        conn.create_function("dir_prefix", 2, dir_prefix, deterministic=True)
+        return conn
+
+    @staticmethod
+    def _bounds(since, until):
+        return resolve_time(since) or "0000", resolve_time(until) or "9999"
+
+    @staticmethod
+    def _rollup_filter(conn, table, start, end):
+        """WHERE untuk baris rollup di rentang: per jam jika masih ada, per hari untuk yang lebih tua."""
+        oldest_hour = conn.execute(f"SELECT MIN(bucket) FROM {table} WHERE period = 'hour'").fetchone()[0]
+        hour_start = start[:13] + ":00"
+        day_end = end
+        if oldest_hour:
+            day_end = oldest_hour[:10]
+            if oldest_hour[11:] != "00:00":
+                # Hari batas hanya tersisa sebagian jam (dipangkas di tengah hari):
+                # hari itu diambil utuh dari rollup harian, jam mulai hari berikutnya
+                day_end = (datetime.strptime(day_end, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+                hour_start = max(hour_start, day_end + " 00:00")
+            day_end = min(day_end, end)
+        return (
+            "((period = 'hour' AND bucket >= ? AND bucket < ?) OR (period = 'day' AND bucket >= ? AND bucket < ?))",
+            (hour_start, end, start[:10], day_end),
+        )
+
+    def top_ips(self, since=DEFAULT_RANGE, until=None, limit=DEFAULT_LIMIT):
+        """[(ip, jumlah alert, total hits)] diurutkan dari alert terbanyak."""
+        def compute():
+            start, end = self._bounds(since, until)
+            conn = self._connect()
+            try:
+                where, params = self._rollup_filter(conn, "ip_alert_rollup", start, end)
+                return conn.execute(
+                    _ALERTS_BY_IP.format(where=where) + " ORDER BY alerts DESC, hits DESC LIMIT ?",
+                    (start, end) + params + (limit,),
+                ).fetchall()
+            finally:
+                conn.close()
+        return self._cached(("top_ips", since, until, limit), compute)
+
+    def top_paths(self, since=DEFAULT_RANGE, until=None, limit=DEFAULT_LIMIT):
+        """[(path, jumlah alert, jumlah IP unik)] dari data mentah yang belum terkena retensi."""
+        def compute():
+            start, end = self._bounds(since, until)
+            conn = self._connect()
+            try:
+                return conn.execute(
+                    """
+                    SELECT p.path, COUNT(*) AS alerts, COUNT(DISTINCT a.ip) AS ips
+                    FROM ip_alerts a
+                    JOIN alert_paths ap ON ap.alert_id = a.id
+                    JOIN paths p ON p.id = ap.path_id
+                    WHERE a.timestamp >= ? AND a.timestamp < ?
+                    GROUP BY ap.path_id ORDER BY alerts DESC, ips DESC LIMIT ?
+                    """,
+                    (start, end, limit),
+                ).fetchall()
+            finally:
+                conn.close()
+        return self._cached(("top_paths", since, until, limit), compute)
+
+    def alerts_per_hour(self, since=DEFAULT_RANGE, until=None):
+        """[(jam "YYYY-MM-DD HH:00", jumlah alert, total hits)] urut waktu."""
+        def compute():
+            start, end = self._bounds(since, until)
+            conn = self._connect()
+            try:
+                return conn.execute(
+                    """
+                    SELECT bucket, SUM(alerts), SUM(hits) FROM (
+                        SELECT strftime('%Y-%m-%d %H:00', timestamp) AS bucket, COUNT(*) AS alerts,
+                               COALESCE(SUM(hits), 0) AS hits
+                        FROM ip_alerts WHERE timestamp >= ? AND timestamp < ? GROUP BY bucket
+                        UNION ALL
+                        SELECT bucket, SUM(alerts), SUM(hits) FROM ip_alert_rollup
+                        WHERE period = 'hour' AND bucket >= ? AND bucket < ? GROUP BY bucket
+                    ) GROUP BY bucket ORDER BY bucket
+                    """,
+                    (start, end, start[:13] + ":00", end),
+                ).fetchall()
+            finally:
+                conn.close()
+        return self._cached(("alerts_per_hour", since, until), compute)
+
+    def fs_events_per_dir(self, since=DEFAULT_RANGE, until=None, depth=DEFAULT_DEPTH, limit=DEFAULT_LIMIT):
+        """
+        [(direktori, total, {event_type: jumlah})] diurutkan dari event terbanyak.
+
+        Jika `depth` lebih dalam dari `rollup_depth`, hanya data mentah yang
+        dihitung (rollup tidak bisa dipecah ke direktori yang lebih dalam).
+        """
+        def compute():
+            start, end = self._bounds(since, until)
+            conn = self._connect()
+            try:
+                sql = """
+                    SELECT path_prefix(path, ?) AS dir, event_type, COUNT(*) AS events
+                    FROM fs_events WHERE timestamp >= ? AND timestamp < ? GROUP BY dir, event_type
+                """
+                params = (depth, start, end)
+                if depth <= self.rollup_depth:
+                    where, rollup_params = self._rollup_filter(conn, "fs_event_rollup", start, end)
+                    sql += f"""
+                        UNION ALL
+                        SELECT dir_prefix(path_prefix, ?), event_type, events FROM fs_event_rollup WHERE {where}
+                    """
+                    params += (depth,) + rollup_params
+                rows = conn.execute(
+                    f"SELECT dir, event_type, SUM(events) FROM ({sql}) GROUP BY dir, event_type", params
+                ).fetchall()
+            finally:
+                conn.close()
+            dirs = {}
+            for directory, event_type, count in rows:
+                dirs.setdefault(directory, {})[event_type] = count
+            ranked = sorted(dirs.items(), key=lambda item: (-sum(item[1].values()), item[0]))
+            return [(directory, sum(events.values()), events) for directory, events in ranked[:limit]]
+        return self._cached(("fs_events_per_dir", since, until, depth, limit), compute)
+
+    def summary(self, since=DEFAULT_RANGE, until=None, limit=5):
+        """Ringkasan untuk /stats: total alert/hits/IP, event filesystem, top IP dan top path."""
+        def compute():
+            start, end = self._bounds(since, until)
+            conn = self._connect()
+            try:
+                # Total dihitung dari sumber yang sama dengan top_ips (mentah + rollup)
+                where, params = self._rollup_filter(conn, "ip_alert_rollup", start, end)
+                ips, alerts, hits = conn.execute(
+                    f"SELECT COUNT(*), COALESCE(SUM(alerts), 0), COALESCE(SUM(hits), 0) "
+                    f"FROM ({_ALERTS_BY_IP.format(where=where)})",
+                    (start, end) + params,
+                ).fetchone()
+                where, params = self._rollup_filter(conn, "fs_event_rollup", start, end)
+                fs_events = dict(conn.execute(
+                    f"""
+                    SELECT event_type, SUM(events) FROM (
+                        SELECT event_type, COUNT(*) AS events FROM fs_events
+                        WHERE timestamp >= ? AND timestamp < ? GROUP BY event_type
+                        UNION ALL
+                        SELECT event_type, events FROM fs_event_rollup WHERE {where}
+                    ) GROUP BY event_type
+                    """,
+                    (start, end) + params,
+                ).fetchall())
+            finally:
+                conn.close()
+            return {
+                "since": start if since else None,
+                "until": end if until else None,
+                "alerts": alerts,
+                "hits": hits,
+                "unique_ips": ips,
+                "fs_events": fs_events,
+                "top_ips": self.top_ips(since, until, limit),
+                "top_paths": self.top_paths(since, until, limit),
+            }
+        return self._cached(("summary", since, until, limit), compute)
+
+    def stats(self):
+        return {"queries": self.queries, "cache_hits": self.cache_hits, "cached": len(self._cache)}
+
+
+def _range_label(since, until):
+    return f"{since or 'awal'} s/d {until or 'sekarang'}"
+
+
+def format_top_ips(rows, since=DEFAULT_RANGE, until=None):
+    lines = [f"🏴 Top IP ({_range_label(since, until)})"]
+    if not rows:
+        lines.append("Tidak ada alert")
+    for i, (ip, alerts, hits) in enumerate(rows, 1):
+        lines.append(f"{i}. {ip} - {alerts} alert, {hits} hits")
+    return "\n".join(lines)
+
+
+def format_stats(summary, since=DEFAULT_RANGE, until=None):
+    """Teks ringkasan untuk CLI dan bot Telegram."""
+    fs_events = summary["fs_events"]
+    lines = [
+        f"📊 Statistik ({_range_label(since, until)})",
+        f"🚨 Alert IP: {summary['alerts']} ({summary['hits']} hits, {summary['unique_ips']} IP unik)",
+        f"📁 Event filesystem: {sum(fs_events.values())}"
+        + (f" ({', '.join(f'{k}: {v}' for k, v in sorted(fs_events.items()))})" if fs_events else ""),
+    ]
+    if summary["top_ips"]:
+        lines.append("\nTop IP:")
+        lines.extend(f"  {ip} - {alerts} alert, {hits} hits" for ip, alerts, hits in summary["top_ips"])
+    if summary["top_paths"]:
+        lines.append("\nTop path:")
+        lines.extend(f"  {path} - {alerts} alert, {ips} IP" for path, alerts, ips in summary["top_paths"])
+    return "\n".join(lines)
+
+
+def format_report(reporter, since=DEFAULT_RANGE, until=None, limit=DEFAULT_LIMIT, depth=DEFAULT_DEPTH):
+    """Laporan lengkap untuk `main.py report`."""
+    lines = [format_stats(reporter.summary(since, until, limit), since, until)]
+    per_hour = reporter.alerts_per_hour(since, until)
+    if per_hour:
+        lines.append("\nAlert per jam (UTC):")
+        lines.extend(f"  {bucket}  {alerts:>6} alert  {hits:>8} hits" for bucket, alerts, hits in per_hour)
+    dirs = reporter.fs_events_per_dir(since, until, depth, limit)
+    if dirs:
+        lines.append("\nEvent filesystem per direktori:")
+        if depth > reporter.rollup_depth:
+            lines.append(f"  (hanya data mentah: depth {depth} > retention_path_depth {reporter.rollup_depth})")
+        for directory, total, events in dirs:
+            detail = ", ".join(f"{k}: {v}" for k, v in sorted(events.items()))
+            lines.append(f"  {directory} - {total} ({detail})")
+    return "\n".join(lines)
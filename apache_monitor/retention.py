@@ -0,0 +1,204 @@
+# apache_monitor/retention.py
+import time
+import logging
+import threading
+
+from . import db
+
+logger = logging.getLogger("Retention")
+
+DEFAULT_RETENTION_DAYS = {"ip_alerts": 90, "fs_events": 30, "notifications_sent": 30}
+DEFAULT_HOURLY_ROLLUP_DAYS = 90
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_INTERVAL = 3600
+DEFAULT_PATH_DEPTH = 2
+DEFAULT_VACUUM_PAGES = 500
+DEFAULT_HASH_CACHE_DAYS = 30
+
+_BUCKETS = (("hour", "%Y-%m-%d %H:00"), ("day", "%Y-%m-%d"))
+
+# Rollup per tabel: (tabel tujuan, kolom key, ekspresi key, kolom agregat, ekspresi agregat)
+_ROLLUPS = {
+    "ip_alerts": ("ip_alert_rollup", ("ip",), ("ip",), ("alerts", "hits"), ("COUNT(*)", "COALESCE(SUM(hits), 0)")),
+    "fs_events": ("fs_event_rollup", ("path_prefix", "event_type"), ("path_prefix(path, ?)", "event_type"),
+                  ("events",), ("COUNT(*)",)),
+    "notifications_sent": ("notification_rollup", ("target",), ("target",), ("messages",), ("COUNT(*)",)),
+}
+
+# Tabel anak yang barisnya ikut dihapus bersama induknya: (tabel, kolom id induk)
+_CHILDREN = {"ip_alerts": ("alert_paths", "alert_id")}
+
+
+def path_prefix(path, depth):
+    """Ambil `depth` komponen pertama path relatif (mis. wp-content/uploads)."""
+    if not path:
+        return ""
+    parts = path.replace("\\", "/").strip("/").split("/")
+    return "/".join(parts[:depth]) if len(parts) > depth else "/".join(parts[:-1]) or "."
+
+
+def _rollup_sql(table, period, fmt):
+    target, keys, exprs, aggs, agg_exprs = _ROLLUPS[table]
+    columns = ", ".join(("period", "bucket") + keys + aggs)
+    selects = ", ".join((f"'{period}'", f"strftime('{fmt}', timestamp)") + exprs + agg_exprs)
+    group = ", ".join(str(i) for i in range(2, 3 + len(keys)))
+    conflict = ", ".join(("period", "bucket") + keys)
+    updates = ", ".join(f"{a} = {a} + excluded.{a}" for a in aggs)
+    return (
+        f"INSERT INTO {target} ({columns}) SELECT {selects} FROM {table} "
+        f"WHERE id <= ? AND timestamp < ? GROUP BY {group} "
+        f"ON CONFLICT({conflict}) DO UPDATE SET {updates}"
+    )
+
+
+class RetentionManager:
+    """
+    Retensi per tabel dengan rollup per jam/hari sebelum baris mentah dihapus.
+
+    Baris lebih tua dari `retention_days[tabel]` diproses per batch kecil
+    (urut id, jadi baris tertua duluan): rollup ke tabel agregat dan delete
+    dalam satu transaksi pendek, supaya writer tidak tertahan lama. Setelah
+    itu halaman kosong dikembalikan dengan `PRAGMA incremental_vacuum`.
+
+    Entri hash_cache tidak di-rollup: entri yang inode-nya tidak terlihat
+    scan/watchdog selama `hash_cache_days` hari (file sudah dihapus) dibuang.
+    """
+
+    def __init__(self, retention_days=None, hourly_rollup_days=DEFAULT_HOURLY_ROLLUP_DAYS,
+                 batch_size=DEFAULT_BATCH_SIZE, path_depth=DEFAULT_PATH_DEPTH,
+                 vacuum_pages=DEFAULT_VACUUM_PAGES, hash_cache_days=DEFAULT_HASH_CACHE_DAYS, pause=0.05):
+        self.retention_days = dict(DEFAULT_RETENTION_DAYS)
+        self.retention_days.update(retention_days or {})
+        unknown = set(self.retention_days) - set(_ROLLUPS)
+        if unknown:
+            raise ValueError(f"Tabel retensi tidak dikenal: {', '.join(sorted(unknown))}")
+        self.hourly_rollup_days = hourly_rollup_days
+        self.batch_size = batch_size
+        self.path_depth = path_depth
+        self.vacuum_pages = vacuum_pages
+        self.hash_cache_days = hash_cache_days
+        self.pause = pause
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            retention_days=config.get("retention_days"),
+            hourly_rollup_days=config.get("retention_hourly_rollup_days", DEFAULT_HOURLY_ROLLUP_DAYS),
+            batch_size=config.get("retention_batch_size", DEFAULT_BATCH_SIZE),
+            path_depth=config.get("retention_path_depth", DEFAULT_PATH_DEPTH),
+            hash_cache_days=config.get("retention_hash_cache_days", DEFAULT_HASH_CACHE_DAYS),
+        )
+
+    def _connect(self):
+        conn = db.connect()
+        conn.create_function("path_prefix", 2, path_prefix, deterministic=True)
+        return conn
+
+    def _cutoff(self, conn, days):
+        return conn.execute("SELECT datetime('now', ?)", (f"-{int(days)} days",)).fetchone()[0]
+
+    def prune_table(self, conn, table, days):
+        """Rollup + hapus baris `table` yang lebih tua dari `days` hari. Return jumlah baris."""
+        if days is None or days <= 0:
+            return 0
+        cutoff = self._cutoff(conn, days)
+        statements = [_rollup_sql(table, period, fmt) for period, fmt in _BUCKETS]
+        extra = (self.path_depth,) if table == "fs_events" else ()
+        removed = 0
+        while True:
+            row = conn.execute(
+                f"SELECT MAX(id), COUNT(*) FROM (SELECT id FROM {table} WHERE timestamp < ? ORDER BY id LIMIT ?)",
+                (cutoff, self.batch_size),
+            ).fetchone()
+            max_id, count = row
+            if not count:
+                break
+            with conn:
+                for sql in statements:
+                    conn.execute(sql, extra + (max_id, cutoff))
+                if table in _CHILDREN:
+                    child, column = _CHILDREN[table]
+                    conn.execute(
+                        f"DELETE FROM {child} WHERE {column} IN "
+                        f"(SELECT id FROM {table} WHERE id <= ? AND timestamp < ?)",
+                        (max_id, cutoff),
+                    )
+                conn.execute(f"DELETE FROM {table} WHERE id <= ? AND timestamp < ?", (max_id, cutoff))
+            removed += count
+            if count < self.batch_size:
+                break
+            # Beri jeda supaya DBWriter bisa commit di antara batch
+            time.sleep(self.pause)
+        return removed
+
+    def prune_hash_cache(self, conn):
+        """Hapus entri hash_cache yang tidak terlihat lebih dari `hash_cache_days` hari."""
+        if not self.hash_cache_days or self.hash_cache_days <= 0:
+            return 0
+        cutoff = self._cutoff(conn, self.hash_cache_days)
+        removed = 0
+        while True:
+            with conn:
+                count = conn.execute(
+                    "DELETE FROM hash_cache WHERE (dev, ino) IN "
+                    "(SELECT dev, ino FROM hash_cache WHERE verified_at < ? LIMIT ?)",
+                    (cutoff, self.batch_size),
+                ).rowcount
+            removed += count
+            if count < self.batch_size:
+                break
+            time.sleep(self.pause)
+        return removed
+
+    def prune_hourly_rollups(self, conn):
+        """Rollup per jam lebih tua dari `hourly_rollup_days` dihapus; rollup harian disimpan."""
+        if not self.hourly_rollup_days:
+            return 0
+        # Dipotong di batas hari supaya laporan bisa memakai rollup harian utuh
+        # sampai hari sebelum rollup per jam tertua (lihat Reporter._rollup_filter)
+        cutoff = conn.execute("SELECT date('now', ?)", (f"-{int(self.hourly_rollup_days)} days",)).fetchone()[0]
+        removed = 0
+        with conn:
+            for target, *_ in _ROLLUPS.values():
+                removed += conn.execute(
+                    f"DELETE FROM {target} WHERE period = 'hour' AND bucket < ?", (cutoff,)
+                ).rowcount
+        return removed
+
+    def run_once(self):
+        """Jalankan satu putaran retensi untuk semua tabel. Return dict jumlah baris yang dihapus."""
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            result = {}
+            for table, days in self.retention_days.items():
+                result[table] = self.prune_table(conn, table, days)
+            result["hourly_rollups"] = self.prune_hourly_rollups(conn)
+            result["hash_cache"] = self.prune_hash_cache(conn)
+            if any(result.values()):
+                conn.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})").fetchall()
+        finally:
+            conn.close()
+        if any(result.values()):
+            logger.info(f"Retensi selesai dalam {time.perf_counter() - started:.2f}s: {result}")
+        return result
+
+
+def start_retention(config):
+    """Jalankan RetentionManager periodik di thread daemon (`retention_interval` detik)."""
+    interval = config.get("retention_interval", DEFAULT_INTERVAL)
+    if not interval:
+        return None
+    manager = RetentionManager.from_config(config)
+
+    def loop():
+        while True:
+            try:
+                manager.run_once()
+            except Exception as e:
+                logger.error(f"Retensi gagal: {e}", exc_info=True)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="Retention", daemon=True)
+    thread.start()
+    return thread
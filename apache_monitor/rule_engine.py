@@ -0,0 +1,356 @@
+# apache_monitor/rule_engine.py
+import abc
+import math
+import time
+import logging
+from array import array
+
+logger = logging.getLogger("RuleEngine")
+
+DEFAULT_BUCKETS = 6
+DEFAULT_MAX_KEYS = 100000
+DEFAULT_HLL_PRECISION = 6
+
+
+class HyperLogLog:
+    """
+    Estimator kardinalitas HyperLogLog kecil (2^precision register 1 byte).
+
+    Dengan precision 6 (64 byte) error standar ~13%, cukup untuk membedakan
+    scanner (puluhan-ratusan path unik) dari pengunjung biasa.
+    """
+
+    __slots__ = ("precision", "registers", "zeros", "_count")
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self.zeros = 1 << precision
+        self._count = 0
+
+    def add(self, value):
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        p = self.precision
+        index = h >> (64 - p)
+        rest = (h << p) & 0xFFFFFFFFFFFFFFFF
+        rank = 65 - rest.bit_length() if rest else 65 - p
+        old = self.registers[index]
+        if rank > old:
+            if not old:
+                self.zeros -= 1
+            self.registers[index] = rank
+            self._count = None
+
+    def count(self):
+        # Estimasi hanya dihitung ulang jika ada register yang berubah
+        if self._count is None:
+            self._count = self._estimate()
+        return self._count
+
+    def _estimate(self):
+        m = len(self.registers)
+        if self.zeros:
+            # Rentang kecil: linear counting, tanpa menjumlah semua register
+            estimate = m * math.log(m / self.zeros)
+            if estimate <= 2.5 * m:
+                return int(round(estimate))
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        return int(round(estimate))
+
+    def reset(self):
+        self.registers = bytearray(len(self.registers))
+        self.zeros = len(self.registers)
+        self._count = 0
+
+
+class Rule(abc.ABC):
+    """
+    Basis rule: threshold dan cooldown sendiri, state per key dipegang RuleEngine.
+
+    Subclass mengisi `key_field` (field entry yang jadi key), `new_state()`,
+    `expires()` dan `observe()` yang mengembalikan hitungan saat ini untuk
+    key (atau None jika baris tidak relevan). Waktu eksekusi per rule
+    diakumulasi di `cost_ns`.
+    """
+
+    name = "rule"
+    key_field = "ip"
+    stateful = True  # False: rule tidak butuh state per key dari engine
+
+    def __init__(self, threshold, window_seconds=60, cooldown=3600, max_keys=DEFAULT_MAX_KEYS):
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.cooldown = cooldown
+        self.max_keys = max_keys
+        self.keys = 0  # jumlah key yang state-nya sedang dipegang engine
+        self.alerted = {}  # key -> epoch alert terakhir
+        self.calls = 0
+        self.cost_ns = 0
+        self.alerts = 0
+
+    @classmethod
+    def from_config(cls, options, defaults):
+        options = dict(options or {})
+        return cls(
+            options.pop("threshold", defaults.get("threshold", 15)),
+            window_seconds=options.pop("window_seconds", defaults.get("window_seconds", 60)),
+            cooldown=options.pop("cooldown", defaults.get("alert_cooldown", 3600)),
+            max_keys=options.pop("max_keys", DEFAULT_MAX_KEYS),
+            **options,
+        )
+
+    def matches(self, entry):
+        """False jika baris tidak relevan (state key tidak dibuat)."""
+        return True
+
+    def new_state(self):
+        return None
+
+    def expires(self, state):
+        """Epoch saat state key sudah seluruhnya di luar window (dibuang sweep engine)."""
+        return 0
+
+    @abc.abstractmethod
+    def observe(self, state, entry, epoch):
+        """Perbarui state key untuk satu baris dan return hitungan saat ini."""
+
+    def check(self, state, key, entry, epoch):
+        """Return hitungan jika key melewati threshold dan tidak sedang cooldown."""
+        count = self.observe(state, entry, epoch)
+        if count is None or count < self.threshold:
+            return None
+        last_alert = self.alerted.get(key)
+        if last_alert is not None and epoch - last_alert <= self.cooldown:
+            return None
+        self.alerted.pop(key, None)
+        self.alerted[key] = epoch
+        if len(self.alerted) > self.max_keys:
+            del self.alerted[next(iter(self.alerted))]
+        self.alerts += 1
+        return count
+
+    def stats(self):
+        return {
+            "keys": self.keys,
+            "alerts": self.alerts,
+            "calls": self.calls,
+            "cost_ms": round(self.cost_ns / 1e6, 3),
+            "ns_per_line": round(self.cost_ns / self.calls) if self.calls else 0,
+        }
+
+
+class CountRule(Rule):
+    """
+    Hitungan per key dalam sliding window bucket.
+
+    State per key: array `buckets` counter + bucket terakhir yang diisi,
+    bukan list timestamp per hit.
+    """
+
+    def __init__(self, threshold, window_seconds=60, cooldown=3600, max_keys=DEFAULT_MAX_KEYS,
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(threshold, window_seconds, cooldown, max_keys)
+        self.buckets = buckets
+        self.bucket_seconds = max(1, -(-window_seconds // buckets))
+
+    def new_state(self):
+        return [None, array("I", bytes(4 * self.buckets))]
+
+    def expires(self, state):
+        return (state[0] + self.buckets) * self.bucket_seconds
+
+    def observe(self, state, entry, epoch):
+        bucket = epoch // self.bucket_seconds
+        last, counts = state
+        if last is None or bucket - last >= self.buckets:
+            counts = state[1] = array("I", bytes(4 * self.buckets))
+        elif bucket > last:
+            for b in range(last + 1, bucket + 1):
+                counts[b % self.buckets] = 0
+        elif bucket < last:
+            bucket = last  # Baris terlambat: hitung di bucket terbaru
+        state[0] = bucket
+        counts[bucket % self.buckets] += 1
+        return sum(counts)
+
+
+class StatusStormRule(CountRule):
+    """Banyak response 403/404 dari satu IP (directory brute force, probing)."""
+
+    name = "status_storm"
+    key_field = "ip"
+
+    def __init__(self, threshold, window_seconds=60, cooldown=3600, max_keys=DEFAULT_MAX_KEYS,
+                 buckets=DEFAULT_BUCKETS, statuses=(403, 404)):
+        super().__init__(threshold, window_seconds, cooldown, max_keys, buckets)
+        self.statuses = frozenset(int(s) for s in statuses)
+
+    def matches(self, entry):
+        return entry.get("status") in self.statuses
+
+
+class UserAgentBurstRule(CountRule):
+    """Lonjakan request dari satu User-Agent (bot/tool yang memutar IP)."""
+
+    name = "ua_burst"
+    key_field = "user_agent"
+
+    def matches(self, entry):
+        return bool(entry.get("user_agent")) and entry["user_agent"] != "-"
+
+
+class PathHotnessRule(CountRule):
+    """Path yang mendadak sangat sering diakses (target serangan atau hotlink)."""
+
+    name = "path_hot"
+    key_field = "path"
+
+
+class DistinctPathsRule(Rule):
+    """
+    Jumlah path unik per IP (fingerprint scanner) dengan estimator HyperLogLog.
+
+    Window bersifat tumbling (reset tiap `window_seconds`), karena HLL tidak
+    bisa dikurangi.
+    """
+
+    name = "distinct_paths"
+    key_field = "ip"
+
+    def __init__(self, threshold, window_seconds=60, cooldown=3600, max_keys=DEFAULT_MAX_KEYS,
+                 precision=DEFAULT_HLL_PRECISION):
+        super().__init__(threshold, window_seconds, cooldown, max_keys)
+        self.precision = precision
+
+    def new_state(self):
+        return [None, HyperLogLog(self.precision)]
+
+    def expires(self, state):
+        return (state[0] + 1) * self.window_seconds
+
+    def observe(self, state, entry, epoch):
+        window = epoch // self.window_seconds
+        if state[0] != window:
+            state[0] = window
+            state[1].reset()
+        state[1].add(entry["path"])
+        return state[1].count()
+
+
+class SuspiciousPathRule(Rule):
+    """
+    Rule bawaan (N hit path suspicious per IP) sebagai anggota engine.
+
+    Window, threshold dan alert tetap ditangani LogMonitor.record_hit (exact
+    atau sketch); rule ini hanya meneruskan hit agar ikut di-profil.
+    """
+
+    name = "suspicious_path"
+    key_field = "ip"
+    stateful = False
+
+    def __init__(self, record_hit):
+        super().__init__(threshold=None)
+        self.record_hit = record_hit
+
+    def observe(self, state, entry, epoch):
+        return None
+
+    def check(self, state, key, entry, epoch):
+        if entry.get("rule"):
+            if self.record_hit(key, epoch, entry["path"], entry["raw"]):
+                self.alerts += 1
+        return None
+
+
+_KEY_INDEX = {"ip": 0, "user_agent": 1, "path": 2}
+
+RULE_TYPES = {cls.name: cls for cls in (StatusStormRule, DistinctPathsRule, UserAgentBurstRule, PathHotnessRule)}
+
+
+class RuleEngine:
+    """
+    Menjalankan beberapa rule terhadap satu hasil parse per baris.
+
+    Entry di-parse sekali oleh LogMonitor, lalu setiap rule membaca field
+    yang dibutuhkan (ip, user_agent, path, status). State window semua rule
+    ada di satu dict LRU milik engine dengan key (index rule, key): eviction
+    key paling lama dan sweep state kedaluwarsa (sekali per `sweep_interval`
+    detik waktu log) dilakukan sekali untuk semua rule.
+    """
+
+    def __init__(self, rules, on_alert, sweep_interval=60):
+        self.rules = list(rules)
+        self.on_alert = on_alert
+        self.sweep_interval = sweep_interval
+        self.max_keys = sum(rule.max_keys for rule in self.rules if rule.stateful)
+        self.state = {}  # (index rule, key) -> [epoch kedaluwarsa, state rule]; urutan = update terakhir
+        self.lines = 0
+        self._next_sweep = None
+
+    @classmethod
+    def from_config(cls, config, on_alert, base_rules=()):
+        """
+        Buat engine dari `detection_rules` (nama rule -> opsi) ditambah
+        `base_rules`; None jika tidak ada rule tambahan yang aktif.
+        """
+        rules = []
+        for name, options in (config.get("detection_rules") or {}).items():
+            options = dict(options or {})
+            if not options.pop("enabled", True):
+                continue
+            if name not in RULE_TYPES:
+                raise ValueError(f"Rule deteksi tidak dikenal: {name} ({', '.join(RULE_TYPES)})")
+            rules.append(RULE_TYPES[name].from_config(options, config))
+        if not rules:
+            return None
+        return cls(list(base_rules) + rules, on_alert, sweep_interval=config.get("window_seconds", 60))
+
+    def _touch(self, index, rule, key):
+        """Ambil state (rule, key) dan pindahkan ke akhir dict (LRU); buang yang paling lama jika penuh."""
+        state = self.state.pop((index, key), None)
+        if state is None:
+            if len(self.state) >= self.max_keys:
+                self._evict(next(iter(self.state)))
+            state = [0, rule.new_state()]
+            rule.keys += 1
+        self.state[(index, key)] = state
+        return state
+
+    def _evict(self, state_key):
+        del self.state[state_key]
+        self.rules[state_key[0]].keys -= 1
+
+    def sweep(self, epoch):
+        """Buang state semua rule yang sudah di luar window."""
+        for state_key in [k for k, s in self.state.items() if s[0] <= epoch]:
+            self._evict(state_key)
+
+    def process(self, entry):
+        """Evaluasi semua rule untuk satu entry hasil parse_line."""
+        self.lines += 1
+        epoch = entry["epoch"]
+        if self._next_sweep is None or epoch >= self._next_sweep:
+            self._next_sweep = epoch + self.sweep_interval
+            self.sweep(epoch)
+        key = (entry["ip"], entry["user_agent"], entry["path"])
+        clock = time.perf_counter_ns
+        for index, rule in enumerate(self.rules):
+            started = clock()
+            rule_key = key[_KEY_INDEX[rule.key_field]]
+            count = None
+            if not rule.stateful:
+                count = rule.check(None, rule_key, entry, epoch)
+            elif rule.matches(entry):
+                state = self._touch(index, rule, rule_key)
+                count = rule.check(state[1], rule_key, entry, epoch)
+                state[0] = rule.expires(state[1])
+            rule.calls += 1
+            rule.cost_ns += clock() - started
+            if count is not None:
+                self.on_alert(rule, rule_key, count, entry)
+
+    def stats(self):
+        return {"lines": self.lines, "keys": len(self.state),
+                "rules": {rule.name: rule.stats() for rule in self.rules}}
@@ -0,0 +1,92 @@
+# apache_monitor/rules.py
+import os
+import re
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger("Rules")
+
+DEFAULT_EXTENSIONS = [".php", ".phar"]
+DEFAULT_CACHE_SIZE = 10000
+
+
+class PathMatcher:
+    """
+    Matcher path suspicious yang dikompilasi sekali dari config.
+
+    Ekstensi dicek lewat set lookup, dangerous_patterns digabung menjadi satu
+    regex alternation dengan named group per pattern sehingga rule yang match
+    bisa diketahui. Hasil disimpan di LRU terbatas yang di-key oleh path.
+    """
+
+    def __init__(self, extensions=None, patterns=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.extensions = frozenset(e.lower() for e in (extensions if extensions is not None else DEFAULT_EXTENSIONS))
+        self.patterns = list(patterns or [])
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self._combined = None
+        self._fallback = []
+        combinable = []
+        for i, pattern in enumerate(self.patterns):
+            regex = re.compile(pattern)
+            if regex.groups or not self._can_wrap(pattern):
+                # Group milik pattern (mis. backreference \1) bergeser nomornya jika digabung,
+                # inline flag global tidak boleh di tengah: pattern ini dicek terpisah
+                self._fallback.append((pattern, regex))
+            else:
+                combinable.append(f"(?P<r{i}>{pattern})")
+        if combinable:
+            self._combined = re.compile("|".join(combinable))
+        if self._fallback:
+            logger.info(f"{len(self._fallback)} dangerous_patterns dicek terpisah (tidak bisa digabung)")
+
+    @staticmethod
+    def _can_wrap(pattern):
+        try:
+            re.compile(f"(?P<r0>{pattern})")
+        except re.error:
+            return False
+        return True
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get("suspicious_extensions", DEFAULT_EXTENSIONS),
+            config.get("dangerous_patterns", []),
+            config.get("path_cache_size", DEFAULT_CACHE_SIZE),
+        )
+
+    def _evaluate(self, path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext in self.extensions:
+            return f"ext:{ext}"
+        if self._combined is not None:
+            m = self._combined.search(path)
+            if m:
+                return f"pattern:{self.patterns[int(m.lastgroup[1:])]}"
+        for pattern, regex in self._fallback:
+            if regex.search(path):
+                return f"pattern:{pattern}"
+        return None
+
+    def match(self, path):
+        """Return nama rule yang match (mis. "ext:.php"), atau None."""
+        cache = self._cache
+        try:
+            rule = cache[path]
+        except KeyError:
+            self.misses += 1
+            rule = self._evaluate(path)
+            cache[path] = rule
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+            return rule
+        self.hits += 1
+        cache.move_to_end(path)
+        return rule
+
+    def stats(self):
+        return {"cache_size": len(self._cache), "hits": self.hits, "misses": self.misses}
@@ -1,93 +1,168 @@
 # apache_monitor/scan_manual.py
 import os
 import logging
-from .db import get_baseline, log_fs_event
-from .utils import sha256sum
+from operator import itemgetter
+from .db import connect, flush_writes, get_file_state, iter_children, iter_subtree, log_dir_digest, log_fs_event
+from .hashcache import get_hash_cache
+from .merkle import MerkleBuilder
+from .scanner import Scanner, UNREADABLE
 
 logger = logging.getLogger("ScanManual")
 
-def manual_scan(target_dir):
+NEW = "new"
+MODIFIED = "modified"
+DELETED = "deleted"
+UNCHANGED = "unchanged"
+
+def merge_baseline(records, rows):
+    """
+    Merge-join record walk dengan baris baseline, keduanya urut path.
+
+    records: (rel_path, is_dir, stat, checksum) anak langsung satu direktori.
+    rows: (path, is_dir, mtime, checksum, digest) dari db.iter_children.
+    Yield (status, path, record atau None, baris baseline atau None).
+    """
+    rows = iter(rows)
+    row = next(rows, None)
+    for record in records:
+        path = record[0]
+        while row is not None and row[0] < path:
+            yield DELETED, row[0], None, row
+            row = next(rows, None)
+        old = None
+        if row is not None and row[0] == path:
+            old, row = row, next(rows, None)
+        if old is None or bool(old[1]) != record[1]:
+            status = NEW
+        elif record[1] or (old[2] == record[2].st_mtime and old[3] == record[3]):
+            status = UNCHANGED
+        else:
+            status = MODIFIED
+        yield status, path, record, old
+    while row is not None:
+        yield DELETED, row[0], None, row
+        row = next(rows, None)
+
+def manual_scan(target_dir, hash_cache=None, workers=None):
     """
     Melakukan scan manual filesystem dan membandingkan dengan baseline
-    
+
+    Setiap direktori dibandingkan saat subtree-nya selesai di-walk. Direktori
+    yang digest Merkle-nya sama dengan baseline dilewati tanpa membaca baris
+    file_state isinya; untuk direktori yang berbeda, anak langsungnya
+    di-merge-join dengan baris baseline (skip-scan db.iter_children), sehingga
+    file baru, berubah dan terhapus ditemukan dengan biaya sebanding jumlah
+    direktori yang berubah. Isi direktori yang tidak bisa dibaca dibiarkan
+    apa adanya di baseline.
+
     Args:
         target_dir: Directory yang akan di-scan
-    
+        hash_cache: HashCache untuk checksum (default: cache bersama)
+        workers: Jumlah thread hashing (default: scanner.DEFAULT_WORKERS)
+
     Returns:
         Dictionary dengan hasil scan
     """
     if not os.path.exists(target_dir):
         raise ValueError(f"Directory tidak ditemukan: {target_dir}")
-    
+
     if not os.path.isdir(target_dir):
         raise ValueError(f"Path bukan directory: {target_dir}")
-    
-    baseline = get_baseline()
-    logger.info(f"Starting manual scan of: {target_dir}")
-    
-    total_files = 0
-    total_dirs = 0
+
+    hash_cache = hash_cache or get_hash_cache()
+    cache_before = hash_cache.stats()
+    scanner = Scanner(target_dir, hash_cache=hash_cache, workers=workers)
+    builder = MerkleBuilder()
+    logger.info(f"Starting manual scan of: {target_dir} ({scanner.workers} hashing threads)")
+
     new_files = 0
     modified_files = 0
+    deleted_files = 0
+    deleted_dirs = 0
+    unchanged_dirs = 0
     changed_dirs = {}  # rel_path -> status
+    unreadable = set()  # direktori yang isinya gagal dibaca
 
-    # Walk current filesystem
-    try:
-        for dirpath, dirnames, filenames in os.walk(target_dir, followlinks=False):
-            try:
-                rel_dir = os.path.relpath(dirpath, target_dir)
-                if rel_dir == ".":
-                    rel_dir = ""
-                
-                # Hitung directory
-                total_dirs += 1
-
-                # Cek folder
-                try:
-                    mtime = os.path.getmtime(dirpath)
-                    key = rel_dir or "."
-                    
-                    if key not in baseline or baseline[key].get("is_dir") is False:
-                        # Folder baru
-                        changed_dirs[rel_dir or "root"] = "baru"
-                    elif baseline[key].get("mtime") != mtime:
-                        # Folder dimodifikasi
-                        changed_dirs[rel_dir or "root"] = "diedit"
-                except (OSError, IOError) as e:
-                    logger.debug(f"Error checking directory {dirpath}: {e}")
-                    continue
-
-                # Cek file
-                for f in filenames:
-                    filepath = os.path.join(dirpath, f)
-                    try:
-                        rel_path = os.path.relpath(filepath, target_dir)
-                        total_files += 1
-                        
-                        stat = os.stat(filepath)
-                        checksum = sha256sum(filepath)
-                        
-                        if rel_path not in baseline:
-                            # File baru
-                            new_files += 1
-                            log_fs_event("created", rel_path, stat.st_size, stat.st_mtime, checksum)
-                        else:
-                            # Cek apakah file berubah
-                            old = baseline[rel_path]
-                            if old.get("mtime") != stat.st_mtime or old.get("checksum") != checksum:
-                                modified_files += 1
-                                log_fs_event("modified", rel_path, stat.st_size, stat.st_mtime, checksum)
-                    except (OSError, IOError, PermissionError) as e:
-                        logger.debug(f"Error processing file {filepath}: {e}")
-                        continue
-                        
-            except (OSError, PermissionError) as e:
-                logger.warning(f"Error accessing directory {dirpath}: {e}")
+    def delete(path, is_dir):
+        nonlocal deleted_files, deleted_dirs
+        log_fs_event("deleted", path, 0, 0, None)
+        if is_dir:
+            deleted_dirs += 1
+        else:
+            deleted_files += 1
+
+    def compare_dir(node):
+        nonlocal new_files, modified_files, unchanged_dirs
+        if node.path in unreadable:
+            # Baseline subtree dan digest-nya dibiarkan sampai folder bisa dibaca lagi
+            return
+        old_dir = get_file_state(conn, node.path)
+        if node.complete and old_dir is not None and old_dir[1] and old_dir[4] == node.digest:
+            # Subtree identik dengan baseline
+            unchanged_dirs += 1
+            return
+        children = sorted(
+            [(rel_path, False, stat, checksum) for rel_path, stat, checksum in node.files]
+            + [(rel_path, True, stat, None) for rel_path, stat in node.dirs],
+            key=itemgetter(0),
+        )
+        folder = "root" if node.path == "." else node.path
+        for status, path, record, old in merge_baseline(children, iter_children(conn, node.path)):
+            if status == UNCHANGED:
+                continue
+            if status == DELETED:
+                delete(path, old[1])
+                if old[1]:
+                    # Folder dihapus: isinya ikut dihapus dari baseline tanpa dilaporkan satu per satu
+                    changed_dirs[path] = "dihapus"
+                    for sub_path, sub_is_dir in iter_subtree(conn, path):
+                        delete(sub_path, sub_is_dir)
+                else:
+                    changed_dirs.setdefault(folder, "diedit")
+                continue
+
+            rel_path, is_dir, stat, checksum = record
+            if is_dir:
+                # Folder baru (baris dan digest-nya sudah ditulis saat subtree-nya selesai)
+                changed_dirs[path] = "baru"
                 continue
-    
+            if old is not None and old[1]:
+                # Dulu folder, sekarang file
+                for sub_path, sub_is_dir in iter_subtree(conn, path):
+                    delete(sub_path, sub_is_dir)
+            changed_dirs.setdefault(folder, "diedit")
+            if status == NEW:
+                # File baru
+                new_files += 1
+                log_fs_event("created", path, stat.st_size, stat.st_mtime, checksum)
+            else:
+                # File berubah
+                modified_files += 1
+                log_fs_event("modified", path, stat.st_size, stat.st_mtime, checksum)
+        if node.complete:
+            log_dir_digest(node.path, node.stat.st_mtime, node.digest)
+
+    # Event dari writer yang masih antre harus masuk baseline lebih dulu
+    flush_writes()
+    conn = connect()
+    try:
+        # Satu transaksi baca: semua lookup melihat baseline sebelum scan ini menulis apa pun
+        conn.execute("BEGIN")
+        for record in scanner.scan():
+            if record[1] is UNREADABLE:
+                unreadable.add(record[0])
+            for node in builder.add(*record):
+                compare_dir(node)
+        for node in builder.finish():
+            compare_dir(node)
     except Exception as e:
         logger.error(f"Error during filesystem walk: {e}", exc_info=True)
         raise
+    finally:
+        conn.close()
+
+    if unreadable:
+        logger.warning(f"{len(unreadable)} folder tidak bisa dibaca dan dilewati: {sorted(unreadable)[:10]}")
 
     # Format daftar folder berubah
     folder_list = []
@@ -95,12 +170,30 @@ def manual_scan(target_dir):
         display_name = folder if folder != "root" else "(root)"
         folder_list.append(f"  • {display_name} ({status})")
 
-    logger.info(f"Scan completed: {total_files} files, {total_dirs} dirs, {new_files} new, {modified_files} modified")
-    
+    scan_stats = scanner.stats()
+    cache_stats = {k: v - cache_before[k] for k, v in hash_cache.stats().items()}
+    logger.info(f"Scan completed: {scan_stats['files']} files, {scan_stats['dirs']} dirs, {new_files} new, "
+                f"{modified_files} modified, {deleted_files} deleted, {len(changed_dirs)} folder berubah, "
+                f"{unchanged_dirs} tidak berubah, {scan_stats['files_per_sec']:.0f} files/s, "
+                f"{scan_stats['mb_per_sec']:.1f} MB/s di-hash, hash cache {cache_stats['hits']} hit / {cache_stats['misses']} miss")
+
     return {
-        "total_files": total_files,
-        "total_dirs": total_dirs,
+        "total_files": scan_stats["files"],
+        "total_dirs": scan_stats["dirs"],
         "new_files": new_files,
         "modified_files": modified_files,
-        "changed_folders": folder_list
-    }
\ No newline at end of file
+        "deleted_files": deleted_files,
+        "deleted_dirs": deleted_dirs,
+        "changed_folders": folder_list,
+        "unchanged_dirs": unchanged_dirs,
+        "unreadable_dirs": len(unreadable),
+        "total_bytes": scan_stats["bytes"],
+        "hashed_bytes": scan_stats["hashed_bytes"],
+        "elapsed_seconds": scan_stats["elapsed_seconds"],
+        "files_per_sec": scan_stats["files_per_sec"],
+        "mb_per_sec": scan_stats["mb_per_sec"],
+        "hash_cache_hits": cache_stats["hits"],
+        "hash_cache_misses": cache_stats["misses"],
+        "hash_cache_verified": cache_stats["verified"],
+        "hash_cache_mismatches": cache_stats["mismatches"],
+    }
@@ -0,0 +1,170 @@
+# apache_monitor/scanner.py
+import os
+import stat
+import time
+import logging
+from collections import deque
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+
+from .hashcache import get_hash_cache
+
+logger = logging.getLogger("Scanner")
+
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+# Nilai is_dir pada record penanda: direktori ada tapi isinya tidak bisa dibaca
+# (scandir gagal). Dipakai supaya isi baseline-nya tidak dianggap terhapus.
+UNREADABLE = "unreadable"
+
+
+class Scanner:
+    """
+    Walk web root dengan os.scandir dan hashing paralel.
+
+    `walk()` memakai stat dari DirEntry (tidak ada getmtime/stat ulang per
+    path). `scan()` mengecek cache hash langsung di thread walk; hanya file
+    yang harus di-hash dikirim ke thread pool (hashlib melepas GIL, jadi
+    beberapa file dibaca dan di-hash bersamaan). Record dihasilkan sesuai
+    urutan walk dan jumlah file in-flight dibatasi `max_inflight`, sehingga
+    memori tetap kecil untuk tree sebesar apa pun.
+
+    Seperti os.walk(followlinks=False): symlink ke direktori tidak dimasuki,
+    symlink ke file di-stat/di-hash mengikuti targetnya. Direktori yang
+    isinya gagal dibaca menghasilkan record penanda (rel_path, UNREADABLE, ...)
+    di posisi isinya.
+    """
+
+    def __init__(self, root, hash_cache=None, workers=None, max_inflight=None):
+        self.root = root
+        self.hash_cache = hash_cache or get_hash_cache()
+        self.workers = workers or DEFAULT_WORKERS
+        self.max_inflight = max_inflight or self.workers * 16
+        self.files = 0
+        self.dirs = 0
+        self.bytes = 0
+        self.hashed_bytes = 0  # hanya file yang benar-benar dibaca (cache miss/verifikasi)
+        self.errors = 0
+        self.elapsed = 0.0
+
+    @classmethod
+    def from_config(cls, root, config, hash_cache=None):
+        return cls(root, hash_cache=hash_cache, workers=config.get("scan_workers") or None)
+
+    def _list(self, dirpath, rel_dir):
+        """
+        Isi langsung satu direktori sebagai list (key urut, record, expand).
+
+        Setiap subdirektori muncul dua kali: record-nya di key `nama` dan
+        penanda expand (turun ke isinya) di key `nama + os.sep`, sehingga
+        urutan hasil walk sama dengan urutan path lengkap (mis. "a" < "a-b" <
+        "a.txt" < "a/x"), yaitu urutan BINARY SQLite untuk file_state.path.
+        None jika direktori tidak bisa dibaca.
+        """
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError as e:
+            self.errors += 1
+            logger.warning(f"Error accessing directory {dirpath}: {e}")
+            return None
+        items = []
+        for entry in entries:
+            rel_path = rel_dir + entry.name
+            try:
+                if entry.is_dir():
+                    if entry.is_symlink():
+                        continue
+                    record = (rel_path, True, entry.path, entry.stat(follow_symlinks=False))
+                    items.append((entry.name, record, False))
+                    items.append((entry.name + os.sep, record, True))
+                else:
+                    items.append((entry.name, (rel_path, False, entry.path, entry.stat()), False))
+            except OSError as e:
+                self.errors += 1
+                logger.debug(f"Error processing file {entry.path}: {e}")
+        items.sort(key=itemgetter(0))
+        return items
+
+    def walk(self):
+        """
+        Yield (rel_path, is_dir, path, stat) untuk root (".") lalu semua isinya
+        dalam urutan path (lihat `_list`). Memori sebanding kedalaman x isi
+        satu direktori, bukan jumlah file di tree.
+        """
+        root = self.root
+        st = os.stat(root)
+        yield ".", True, root, st
+        items = self._list(root, "")
+        if items is None:
+            yield ".", UNREADABLE, root, st
+            return
+        stack = [iter(items)]
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+                continue
+            _, record, expand = item
+            if expand:
+                items = self._list(record[2], record[0] + os.sep)
+                if items is None:
+                    yield record[0], UNREADABLE, record[2], record[3]
+                else:
+                    stack.append(iter(items))
+            else:
+                yield record
+
+    def scan(self):
+        """Yield (rel_path, is_dir, stat, checksum) dengan checksum dihitung di thread pool."""
+        started = time.perf_counter()
+        lookup, compute = self.hash_cache.lookup, self.hash_cache.compute
+        pending = deque()
+
+        def finish(item):
+            rel_path, is_dir, st, future, checksum = item
+            if is_dir is UNREADABLE:
+                return rel_path, UNREADABLE, st, None
+            if is_dir:
+                self.dirs += 1
+                return rel_path, True, st, None
+            self.files += 1
+            self.bytes += st.st_size
+            if future is None:
+                return rel_path, False, st, checksum
+            checksum = future.result()
+            if checksum is not None:
+                self.hashed_bytes += st.st_size
+            return rel_path, False, st, checksum
+
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="ScanHash") as pool:
+                for rel_path, is_dir, path, st in self.walk():
+                    future = checksum = None
+                    if not is_dir and stat.S_ISREG(st.st_mode):
+                        checksum, row = lookup(st)
+                        if checksum is None:
+                            future = pool.submit(compute, path, st, row)
+                    pending.append((rel_path, is_dir, st, future, checksum))
+                    # Keluarkan record yang sudah selesai; blok hanya jika in-flight penuh
+                    while pending and (len(pending) > self.max_inflight or pending[0][3] is None
+                                       or pending[0][3].done()):
+                        yield finish(pending.popleft())
+                while pending:
+                    yield finish(pending.popleft())
+        finally:
+            self.elapsed = time.perf_counter() - started
+
+    def stats(self):
+        elapsed = self.elapsed or 1e-9
+        return {
+            "files": self.files,
+            "dirs": self.dirs,
+            "bytes": self.bytes,
+            "hashed_bytes": self.hashed_bytes,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "files_per_sec": round(self.files / elapsed, 1),
+            # Throughput hashing: file dari cache tidak dibaca, jadi tidak dihitung
+            "mb_per_sec": round(self.hashed_bytes / 1e6 / elapsed, 2),
+        }
@@ -0,0 +1,219 @@
+# apache_monitor/sketch.py
+import heapq
+import logging
+import operator
+from array import array
+from collections import deque
+
+logger = logging.getLogger("Sketch")
+
+DEFAULT_WIDTH = 65536
+DEFAULT_DEPTH = 4
+DEFAULT_BUCKETS = 6
+DEFAULT_TOP_K = 1000
+DEFAULT_MAX_ALERTED = 100000
+_SAMPLE_PATHS = 5
+
+
+class WindowedCountMin:
+    """
+    Count-Min sketch yang dibagi per bucket waktu (ring buffer).
+
+    Window `window_seconds` dipecah menjadi `buckets` bucket. Selain counter per
+    bucket, disimpan juga total seluruh bucket yang masih hidup sehingga
+    estimasi hanya butuh `depth` lookup; bucket yang keluar dari window
+    dikurangkan dari total sekali saja. Estimasi selalu >= hitungan sebenarnya
+    (tidak pernah under-count), dengan granularitas window sebesar satu bucket.
+    """
+
+    def __init__(self, window_seconds, width=DEFAULT_WIDTH, depth=DEFAULT_DEPTH, buckets=DEFAULT_BUCKETS):
+        self.width = width
+        self.depth = depth
+        self.buckets = buckets
+        self.bucket_seconds = max(1, -(-window_seconds // buckets))
+        self._slots = [self._zeros() for _ in range(buckets)]
+        self._slot_bucket = [None] * buckets
+        self._total = self._zeros()
+        self.current_bucket = None
+
+    def _zeros(self):
+        return array("I", bytes(4 * self.width * self.depth))
+
+    def _columns(self, key):
+        h = hash(key)
+        h1 = h & 0xFFFFFFFF
+        h2 = ((h >> 32) & 0xFFFFFFFF) | 1
+        width = self.width
+        return [r * width + (h1 + r * h2) % width for r in range(self.depth)]
+
+    def _advance(self, bucket):
+        """Geser window ke `bucket`; kurangi total dengan bucket yang kedaluwarsa."""
+        self.current_bucket = bucket
+        oldest = bucket - self.buckets + 1
+        for slot, slot_bucket in enumerate(self._slot_bucket):
+            if slot_bucket is not None and slot_bucket < oldest:
+                self._total = array("I", map(operator.sub, self._total, self._slots[slot]))
+                self._slots[slot] = self._zeros()
+                self._slot_bucket[slot] = None
+
+    def add(self, key, epoch, count=1):
+        """Tambah hitungan untuk key. Return estimasi jumlah dalam window."""
+        bucket = epoch // self.bucket_seconds
+        if self.current_bucket is None or bucket > self.current_bucket:
+            self._advance(bucket)
+        elif bucket <= self.current_bucket - self.buckets:
+            # Terlalu lama, sudah di luar window
+            return self.estimate(key)
+        slot = bucket % self.buckets
+        self._slot_bucket[slot] = bucket
+        counts = self._slots[slot]
+        total = self._total
+        columns = self._columns(key)
+        for col in columns:
+            counts[col] += count
+            total[col] += count
+        return min(total[col] for col in columns)
+
+    def estimate(self, key):
+        total = self._total
+        return min(total[col] for col in self._columns(key))
+
+    def memory_bytes(self):
+        return sum(s.itemsize * len(s) for s in self._slots) + self._total.itemsize * len(self._total)
+
+
+class _Candidate:
+    __slots__ = ("estimate", "paths", "last_raw")
+
+    def __init__(self):
+        self.estimate = 0
+        self.paths = deque(maxlen=_SAMPLE_PATHS)
+        self.last_raw = ""
+
+
+class SketchDetector:
+    """
+    Deteksi heavy-hitter dengan memori konstan.
+
+    Hitungan per IP diestimasi oleh WindowedCountMin, sedangkan K IP dengan
+    estimasi tertinggi disimpan (beserta contoh path & baris raw) untuk
+    laporan alert. Memori tidak bergantung pada jumlah IP unik.
+    """
+
+    def __init__(self, window_seconds, threshold, cooldown=3600, width=DEFAULT_WIDTH,
+                 depth=DEFAULT_DEPTH, buckets=DEFAULT_BUCKETS, top_k=DEFAULT_TOP_K,
+                 max_alerted=DEFAULT_MAX_ALERTED):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.top_k = top_k
+        self.max_alerted = max_alerted
+        self.sketch = WindowedCountMin(window_seconds, width, depth, buckets)
+        self.candidates = {}  # IP -> _Candidate (maks top_k)
+        self.alerted = {}  # IP -> epoch alert terakhir (maks max_alerted)
+        self.updates = 0
+        self._heap = []  # min-heap (estimasi, IP) dengan lazy deletion
+        self._bucket = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get("window_seconds", 60),
+            config.get("threshold", 15),
+            cooldown=config.get("alert_cooldown", 3600),
+            width=config.get("sketch_width", DEFAULT_WIDTH),
+            depth=config.get("sketch_depth", DEFAULT_DEPTH),
+            buckets=config.get("sketch_buckets", DEFAULT_BUCKETS),
+            top_k=config.get("sketch_top_k", DEFAULT_TOP_K),
+        )
+
+    def _weakest(self):
+        """Return (estimasi, IP) kandidat terlemah; buang entri heap yang basi."""
+        heap = self._heap
+        while heap:
+            estimate, ip = heap[0]
+            cand = self.candidates.get(ip)
+            if cand is not None and cand.estimate == estimate:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _track(self, ip, estimate):
+        cand = self.candidates.get(ip)
+        if cand is None:
+            if len(self.candidates) >= self.top_k:
+                weakest = self._weakest()
+                if weakest is not None:
+                    if estimate <= weakest[0]:
+                        return None
+                    heapq.heappop(self._heap)
+                    del self.candidates[weakest[1]]
+            cand = self.candidates[ip] = _Candidate()
+        cand.estimate = estimate
+        heapq.heappush(self._heap, (estimate, ip))
+        if len(self._heap) > 4 * self.top_k:
+            self._rebuild_heap()
+        return cand
+
+    def _rebuild_heap(self):
+        self._heap = [(c.estimate, ip) for ip, c in self.candidates.items()]
+        heapq.heapify(self._heap)
+
+    def _refresh(self):
+        """Perbarui estimasi kandidat saat bucket bergeser; buang yang sudah nol."""
+        for ip in list(self.candidates):
+            estimate = self.sketch.estimate(ip)
+            if estimate:
+                self.candidates[ip].estimate = estimate
+            else:
+                del self.candidates[ip]
+        self._rebuild_heap()
+
+    def add(self, ip, epoch, path, raw):
+        """
+        Catat satu hit. Return (hits, paths, raw) jika IP melewati threshold
+        dan tidak sedang cooldown, selain itu None.
+        """
+        self.updates += 1
+        estimate = self.sketch.add(ip, epoch)
+        if self.sketch.current_bucket != self._bucket:
+            self._bucket = self.sketch.current_bucket
+            self._refresh()
+        cand = self._track(ip, estimate)
+        if cand is not None:
+            if path not in cand.paths:
+                cand.paths.append(path)
+            cand.last_raw = raw
+        if estimate < self.threshold:
+            return None
+        last_alert = self.alerted.get(ip)
+        if last_alert is not None and epoch - last_alert <= self.cooldown:
+            return None
+        self._mark_alerted(ip, epoch)
+        if cand is None:
+            return estimate, [path], raw
+        return estimate, list(cand.paths), cand.last_raw
+
+    def _mark_alerted(self, ip, epoch):
+        if len(self.alerted) >= self.max_alerted:
+            expired = [k for k, ts in self.alerted.items() if epoch - ts > self.cooldown]
+            for k in expired:
+                del self.alerted[k]
+            if len(self.alerted) >= self.max_alerted:
+                # Buang entri cooldown paling lama
+                del self.alerted[next(iter(self.alerted))]
+        self.alerted.pop(ip, None)
+        self.alerted[ip] = epoch
+
+    def heavy_hitters(self, n=10):
+        """IP dengan estimasi tertinggi saat ini."""
+        ranked = sorted(self.candidates.items(), key=lambda kv: kv[1].estimate, reverse=True)
+        return [(ip, c.estimate) for ip, c in ranked[:n]]
+
+    def stats(self):
+        return {
+            "engine": "sketch",
+            "updates": self.updates,
+            "candidates": len(self.candidates),
+            "alerted_ips": len(self.alerted),
+            "sketch_bytes": self.sketch.memory_bytes(),
+        }
@@ -0,0 +1,200 @@
+# apache_monitor/subnet.py
+import logging
+import operator
+from array import array
+
+from .iptrie import PrefixTrie, parse_ip, format_prefix, IPV4_BITS, IPV6_BITS
+
+logger = logging.getLogger("Subnet")
+
+DEFAULT_PREFIXES = {"ipv4": [24], "ipv6": [64]}
+DEFAULT_BUCKETS = 6
+DEFAULT_MAX_NODES = 2000000
+# Setelah dipadatkan trie paling banyak max_nodes / COMPACT_HEADROOM node, jadi
+# pemadatan berikutnya baru terjadi setelah trie tumbuh lagi (tidak tiap bucket)
+COMPACT_HEADROOM = 1.5
+
+
+class _FamilyCounters:
+    """Trie satu keluarga alamat + counter per bucket waktu yang di-indeks node."""
+
+    def __init__(self, bits, depths, buckets):
+        self.bits = bits
+        self.depths = sorted(set(depths))
+        self.trie = PrefixTrie(bits)
+        self.slots = [array("I") for _ in range(buckets)]
+        self.total = array("I")
+        self._grow()
+
+    def _grow(self):
+        missing = len(self.trie) - len(self.total)
+        if missing > 0:
+            # Tumbuh berlipat supaya extend tidak terjadi di tiap node baru
+            extra = max(missing, len(self.total) // 2, 1024)
+            zeros = bytes(4 * extra)
+            self.total.frombytes(zeros)
+            for counts in self.slots:
+                counts.frombytes(zeros)
+
+    def nodes_for(self, addr):
+        nodes = self.trie.path_nodes(addr, self.depths)
+        self._grow()
+        return nodes
+
+    def expire_slot(self, slot):
+        counts = self.slots[slot]
+        self.total = array("I", map(operator.sub, self.total, counts))
+        self.slots[slot] = array("I", bytes(4 * len(counts)))
+
+    def live_prefixes(self):
+        """Iterasi (prefix_int, prefixlen, node) untuk node di kedalaman terpantau dengan hitungan > 0."""
+        depths = set(self.depths)
+        max_depth = self.depths[-1]
+        left, right, total = self.trie.left, self.trie.right, self.total
+        stack = [(0, 0, 0)]
+        while stack:
+            node, prefix, depth = stack.pop()
+            if depth in depths and total[node]:
+                yield prefix << (self.bits - depth), depth, node
+            if depth < max_depth:
+                if left[node] >= 0:
+                    stack.append((left[node], prefix << 1, depth + 1))
+                if right[node] >= 0:
+                    stack.append((right[node], (prefix << 1) | 1, depth + 1))
+
+    def compact(self, max_nodes=None):
+        """
+        Bangun ulang trie hanya dengan prefix yang masih punya hitungan.
+
+        Jika prefix hidup butuh lebih dari `max_nodes` node, prefix dengan
+        hitungan terkecil dibuang. Return (counter baru, jumlah prefix dibuang).
+        """
+        fresh = _FamilyCounters(self.bits, self.depths, len(self.slots))
+        live = list(self.live_prefixes())
+        if max_nodes is not None:
+            live.sort(key=lambda item: self.total[item[2]], reverse=True)
+        evicted = 0
+        for i, (prefix, depth, node) in enumerate(live):
+            if max_nodes is not None and len(fresh.trie) >= max_nodes:
+                evicted = len(live) - i
+                break
+            new_node = fresh.trie.node_for(prefix, depth)
+            fresh._grow()
+            fresh.total[new_node] = self.total[node]
+            for old, new in zip(self.slots, fresh.slots):
+                new[new_node] = old[node]
+        return fresh, evicted
+
+
+class SubnetCounter:
+    """
+    Hitungan hit per subnet (CIDR) dalam sliding window.
+
+    Alamat dipetakan ke node trie biner di tiap panjang prefix yang
+    dikonfigurasi (mis. /24 untuk IPv4, /64 untuk IPv6). Counter disimpan di
+    array per bucket waktu yang di-indeks node, jadi tidak ada objek Python
+    per alamat maupun per level prefix. Trie dipadatkan ulang jika node
+    melebihi `max_nodes`; jika prefix yang masih aktif tetap terlalu banyak
+    (mis. churn IPv6 /64), prefix dengan hitungan terkecil dibuang
+    (`evicted_prefixes`) sampai trie di bawah max_nodes / COMPACT_HEADROOM.
+    """
+
+    def __init__(self, window_seconds, threshold, prefixes=None, cooldown=3600,
+                 buckets=DEFAULT_BUCKETS, max_nodes=DEFAULT_MAX_NODES):
+        prefixes = prefixes if prefixes is not None else DEFAULT_PREFIXES
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.buckets = buckets
+        self.max_nodes = max_nodes
+        self.bucket_seconds = max(1, -(-window_seconds // buckets))
+        self.families = {}
+        for key, bits in (("ipv4", IPV4_BITS), ("ipv6", IPV6_BITS)):
+            depths = [d for d in (prefixes.get(key) or []) if 0 < d <= bits]
+            if depths:
+                self.families[bits] = _FamilyCounters(bits, depths, buckets)
+        self._slot_bucket = [None] * buckets
+        self.current_bucket = None
+        self.alerted = {}  # (bits, prefix, prefixlen) -> epoch alert terakhir
+        self.compactions = 0
+        self.evicted_prefixes = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Return SubnetCounter jika `subnet_prefixes` dikonfigurasi, selain itu None."""
+        prefixes = config.get("subnet_prefixes")
+        if not prefixes:
+            return None
+        return cls(
+            config.get("window_seconds", 60),
+            config.get("subnet_threshold", 100),
+            prefixes=prefixes,
+            cooldown=config.get("alert_cooldown", 3600),
+            max_nodes=config.get("subnet_max_nodes", DEFAULT_MAX_NODES),
+        )
+
+    def _advance(self, bucket):
+        self.current_bucket = bucket
+        oldest = bucket - self.buckets + 1
+        for slot, slot_bucket in enumerate(self._slot_bucket):
+            if slot_bucket is not None and slot_bucket < oldest:
+                for fam in self.families.values():
+                    fam.expire_slot(slot)
+                self._slot_bucket[slot] = None
+        for bits, fam in self.families.items():
+            if len(fam.trie) > self.max_nodes:
+                self.families[bits], evicted = fam.compact(int(self.max_nodes / COMPACT_HEADROOM))
+                self.compactions += 1
+                self.evicted_prefixes += evicted
+                logger.info(f"Trie subnet IPv{4 if bits == IPV4_BITS else 6} dipadatkan: "
+                            f"{len(fam.trie)} -> {len(self.families[bits].trie)} node, {evicted} prefix dibuang")
+        expired = [k for k, ts in self.alerted.items() if bucket * self.bucket_seconds - ts > self.cooldown]
+        for k in expired:
+            del self.alerted[k]
+
+    def add(self, ip, epoch):
+        """Catat hit dari ip. Return list (cidr, hits) subnet yang baru melewati threshold."""
+        parsed = parse_ip(ip)
+        if parsed is None:
+            return []
+        bits, addr = parsed
+        fam = self.families.get(bits)
+        if fam is None:
+            return []
+        bucket = epoch // self.bucket_seconds
+        if self.current_bucket is None or bucket > self.current_bucket:
+            self._advance(bucket)
+            fam = self.families[bits]
+        elif bucket <= self.current_bucket - self.buckets:
+            return []
+        slot = bucket % self.buckets
+        self._slot_bucket[slot] = bucket
+        nodes = fam.nodes_for(addr)
+        counts = fam.slots[slot]
+        total = fam.total
+
+        alerts = []
+        for depth, node in zip(fam.depths, nodes):
+            counts[node] += 1
+            total[node] += 1
+            hits = total[node]
+            if hits < self.threshold:
+                continue
+            shift = bits - depth
+            key = (bits, (addr >> shift) << shift, depth)
+            last_alert = self.alerted.get(key)
+            if last_alert is not None and epoch - last_alert <= self.cooldown:
+                continue
+            self.alerted[key] = epoch
+            alerts.append((format_prefix(*key), hits))
+        return alerts
+
+    def stats(self):
+        return {
+            "trie_nodes": sum(len(f.trie) for f in self.families.values()),
+            "counter_bytes": sum(
+                f.total.itemsize * len(f.total) * (1 + len(f.slots)) for f in self.families.values()
+            ),
+            "alerted_subnets": len(self.alerted),
+            "compactions": self.compactions,
+            "evicted_prefixes": self.evicted_prefixes,
+        }
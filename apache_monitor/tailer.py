@@ -0,0 +1,433 @@
+# apache_monitor/tailer.py
+import os
+import glob
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+logger = logging.getLogger("Tailer")
+
+# Konstanta inotify (lihat <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+FILE_EVENTS = IN_MODIFY | IN_ATTRIB | IN_MOVE_SELF | IN_DELETE_SELF
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class Inotify:
+    """Wrapper minimal inotify lewat ctypes (hanya Linux)."""
+
+    _HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 gagal: {os.strerror(err)}")
+        self.fd = fd
+
+    @classmethod
+    def create(cls):
+        """Buat instance Inotify, atau None jika platform tidak mendukung."""
+        try:
+            return cls()
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify tidak tersedia, fallback ke polling: {e}")
+            return None
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch gagal untuk {path}: {os.strerror(err)}")
+        return wd
+
+    def rm_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout):
+        """Tunggu event sampai `timeout` detik. Return list (wd, mask, name)."""
+        try:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+        except InterruptedError:
+            return []
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        pos = 0
+        header_size = self._HEADER.size
+        while pos + header_size <= len(buf):
+            wd, mask, _cookie, name_len = self._HEADER.unpack_from(buf, pos)
+            pos += header_size
+            name = buf[pos:pos + name_len].rstrip(b"\0").decode("utf-8", "replace")
+            pos += name_len
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class TailedFile:
+    """State tail satu file: inode, offset, handle, dan sisa baris parsial."""
+
+    def __init__(self, path, encoding="utf-8", chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.inode = None
+        self.offset = 0  # offset byte setelah baris lengkap terakhir
+        self.fh = None
+        self.wd = None
+        self.partial = b""
+        self.lines_total = 0
+        self.bytes_total = 0
+        self.resumed = False  # True jika inode/offset berasal dari checkpoint
+
+    def open(self):
+        """Buka file dan seek ke offset (reset jika inode berubah/truncate)."""
+        fh = open(self.path, "rb", buffering=0)
+        stat = os.fstat(fh.fileno())
+        if self.inode != stat.st_ino:
+            # File baru atau hasil rotasi
+            self.inode = stat.st_ino
+            self.offset = 0
+        elif stat.st_size < self.offset:
+            # File di-truncate (copytruncate)
+            logger.info(f"File {self.path} di-truncate, membaca ulang dari awal")
+            self.offset = 0
+        fh.seek(self.offset)
+        self.fh = fh
+        self.partial = b""
+
+    def close(self):
+        if self.fh:
+            self.fh.close()
+        self.fh = None
+
+    def _emit(self, data, on_lines):
+        lines = data.decode(self.encoding, "replace").split("\n")
+        self.lines_total += len(lines)
+        on_lines(lines)
+
+    def read_available(self, on_lines, max_chunks=None):
+        """
+        Baca data yang tersedia (maks `max_chunks` blok). Return True jika ada data baru.
+        """
+        got_data = False
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            chunk = self.fh.read(self.chunk_size)
+            if not chunk:
+                break
+            got_data = True
+            chunks += 1
+            self.bytes_total += len(chunk)
+            data = self.partial + chunk if self.partial else chunk
+            cut = data.rfind(b"\n")
+            if cut < 0:
+                self.partial = data
+                continue
+            self.partial = data[cut + 1:]
+            self.offset = self.fh.tell() - len(self.partial)
+            self._emit(data[:cut], on_lines)
+        return got_data
+
+    def flush_partial(self, on_lines):
+        """Kirim sisa baris tanpa newline (dipakai saat file lama ditinggalkan)."""
+        if self.partial:
+            self.offset += len(self.partial)
+            self._emit(self.partial, on_lines)
+            self.partial = b""
+
+    def rotated(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return stat.st_ino != self.inode or stat.st_size < self.offset
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "inode": self.inode,
+            "offset": self.offset,
+            "lines_total": self.lines_total,
+            "bytes_total": self.bytes_total,
+        }
+
+
+def _is_glob(pattern):
+    return glob.has_magic(pattern)
+
+
+class MultiTailer:
+    """
+    Tail banyak file log dalam satu loop.
+
+    `patterns` berisi path atau glob; file baru yang cocok dengan glob diambil
+    saat runtime. Tiap file dibaca dalam blok biner besar, baris dipecah sendiri
+    dan sisa baris parsial dibawa ke pembacaan berikutnya. Saat semua file EOF,
+    loop tidur di satu fd inotify (IN_MODIFY/IN_MOVE_SELF pada file, IN_CREATE
+    pada direktori) alih-alih polling. Rotasi dideteksi lewat perubahan inode.
+    """
+
+    # Batas blok per file per putaran supaya satu vhost ramai tidak memonopoli loop
+    MAX_CHUNKS_PER_TURN = 16
+
+    def __init__(self, patterns, on_lines, encoding="utf-8", chunk_size=DEFAULT_CHUNK_SIZE,
+                 poll_interval=0.5, use_inotify=True, stats_interval=60, rescan_interval=30,
+                 checkpoint=None, on_idle=None):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.patterns = list(patterns)
+        self.on_lines = on_lines
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.stats_interval = stats_interval
+        self.rescan_interval = rescan_interval
+        self.checkpoint = checkpoint
+        self.on_idle = on_idle  # dipanggil saat semua file EOF, sebelum menunggu
+        self.running = True
+
+        self.files = {}  # path -> TailedFile
+        self._inotify = None
+        self._dir_wds = set()
+        self._rescan_pending = True
+        self._last_rescan = 0.0
+
+        self._started = None
+        self._stats_lines = 0
+        self._stats_time = None
+
+    # ------------------------------------------------------------------ stats
+    @property
+    def lines_total(self):
+        return sum(tf.lines_total for tf in self.files.values())
+
+    def lines_per_sec(self):
+        """Rata-rata lines/sec sejak tailer mulai (semua file)."""
+        if not self._started:
+            return 0.0
+        elapsed = time.monotonic() - self._started
+        return self.lines_total / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        return {
+            "files": [tf.stats() for tf in self.files.values()],
+            "lines_total": self.lines_total,
+            "lines_per_sec": round(self.lines_per_sec(), 1),
+            "inotify": self._inotify is not None,
+        }
+
+    def _maybe_log_stats(self):
+        if not self.stats_interval:
+            return
+        now = time.monotonic()
+        elapsed = now - self._stats_time
+        if elapsed >= self.stats_interval:
+            total = self.lines_total
+            rate = (total - self._stats_lines) / elapsed
+            logger.info(f"Tail {len(self.files)} file: {rate:.1f} lines/s ({total} total)")
+            self._stats_lines = total
+            self._stats_time = now
+
+    # -------------------------------------------------------------- discovery
+    def _expand(self):
+        paths = []
+        for pattern in self.patterns:
+            if _is_glob(pattern):
+                paths.extend(sorted(p for p in glob.glob(pattern) if os.path.isfile(p)))
+            else:
+                # Path literal tetap dipantau walau belum ada
+                paths.append(pattern)
+        return paths
+
+    def add_file(self, path):
+        """Daftarkan file untuk di-tail; return TailedFile-nya."""
+        tf = self.files.get(path)
+        if tf is None:
+            tf = self.files[path] = TailedFile(path, self.encoding, self.chunk_size)
+            saved = self.checkpoint.get(path) if self.checkpoint else None
+            if saved:
+                tf.inode, tf.offset = saved
+                tf.resumed = True
+                logger.info(f"Mulai tail file: {path} (lanjut dari offset {tf.offset})")
+            else:
+                logger.info(f"Mulai tail file: {path}")
+        return tf
+
+    def _rescan(self):
+        for path in self._expand():
+            if path not in self.files:
+                self.add_file(path)
+        if self._inotify:
+            for pattern in self.patterns:
+                directory = os.path.dirname(pattern) or "."
+                if _is_glob(directory) or not os.path.isdir(directory):
+                    continue
+                try:
+                    self._dir_wds.add(self._inotify.add_watch(directory, IN_CREATE | IN_MOVED_TO))
+                except OSError as e:
+                    logger.debug(f"Gagal watch direktori {directory}: {e}")
+        self._rescan_pending = False
+        self._last_rescan = time.monotonic()
+
+    # ------------------------------------------------------------- file state
+    def _drain_predecessor(self, tf):
+        """
+        Habiskan file hasil rotasi (mis. access.log.1) dari offset checkpoint.
+
+        Dipakai saat startup jika inode file sudah berbeda dari checkpoint,
+        artinya rotasi terjadi ketika monitor mati.
+        """
+        directory = os.path.dirname(tf.path) or "."
+        base = os.path.basename(tf.path)
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            return False
+        for name in names:
+            if name == base or not name.startswith(base):
+                continue
+            candidate = os.path.join(directory, name)
+            try:
+                if os.stat(candidate).st_ino != tf.inode:
+                    continue
+            except OSError:
+                continue
+            old = TailedFile(candidate, self.encoding, self.chunk_size)
+            old.inode, old.offset = tf.inode, tf.offset
+            old.open()
+            try:
+                while old.read_available(self.on_lines):
+                    pass
+                old.flush_partial(self.on_lines)
+            finally:
+                old.close()
+            tf.lines_total += old.lines_total
+            logger.info(f"Sisa {old.lines_total} baris dibaca dari file rotasi {candidate}")
+            return True
+        logger.warning(f"File rotasi untuk {tf.path} (inode {tf.inode}) tidak ditemukan, "
+                       f"sisa baris yang belum dibaca hilang")
+        return False
+
+    def _open(self, tf):
+        if not os.path.exists(tf.path):
+            return False
+        if tf.resumed:
+            tf.resumed = False
+            if os.stat(tf.path).st_ino != tf.inode:
+                self._drain_predecessor(tf)
+        tf.open()
+        if self._inotify:
+            try:
+                tf.wd = self._inotify.add_watch(tf.path, FILE_EVENTS)
+            except OSError as e:
+                logger.debug(f"Gagal menambah watch inotify: {e}")
+                tf.wd = None
+        return True
+
+    def _close(self, tf):
+        if tf.wd is not None and self._inotify:
+            try:
+                self._inotify.rm_watch(tf.wd)
+            except OSError:
+                pass
+        tf.wd = None
+        tf.close()
+
+    def _service(self, tf):
+        """Proses satu file. Return True jika ada pekerjaan yang dilakukan."""
+        if tf.fh is None and not self._open(tf):
+            return False
+        lines_before = tf.lines_total
+        if tf.read_available(self.on_lines, self.MAX_CHUNKS_PER_TURN):
+            self._checkpoint(tf, tf.lines_total - lines_before)
+            return True
+        if not tf.rotated():
+            return False
+        # Habiskan sisa file lama sebelum pindah ke file baru
+        while tf.read_available(self.on_lines):
+            pass
+        tf.flush_partial(self.on_lines)
+        self._close(tf)
+        self._checkpoint(tf, tf.lines_total - lines_before)
+        logger.info(f"Rotasi terdeteksi untuk {tf.path}")
+        if tf.path not in self.patterns and not os.path.exists(tf.path):
+            # File hasil glob yang hilang: berhenti dipantau sampai muncul lagi
+            del self.files[tf.path]
+        return True
+
+    def _checkpoint(self, tf, lines):
+        if self.checkpoint:
+            self.checkpoint.update(tf.path, tf.inode, tf.offset, lines)
+            self.checkpoint.maybe_flush()
+
+    def _wait(self):
+        if self._inotify:
+            for wd, _mask, _name in self._inotify.read_events(self.poll_interval * 2):
+                if wd in self._dir_wds:
+                    self._rescan_pending = True
+        else:
+            time.sleep(self.poll_interval)
+
+    # ------------------------------------------------------------------- loop
+    def run(self):
+        """Loop utama tail; berhenti saat self.running = False."""
+        self._started = self._stats_time = time.monotonic()
+        if self.use_inotify:
+            self._inotify = Inotify.create()
+        try:
+            while self.running:
+                if self._rescan_pending or time.monotonic() - self._last_rescan >= self.rescan_interval:
+                    self._rescan()
+                busy = False
+                for tf in list(self.files.values()):
+                    if not self.running:
+                        break
+                    try:
+                        busy = self._service(tf) or busy
+                    except (OSError, IOError) as e:
+                        logger.error(f"Error reading log file {tf.path}: {e}")
+                        self._close(tf)
+                self._maybe_log_stats()
+                if not busy:
+                    if self.on_idle:
+                        self.on_idle()
+                    if self.checkpoint:
+                        self.checkpoint.maybe_flush()
+                    self._wait()
+        finally:
+            for tf in self.files.values():
+                self._close(tf)
+            if self.checkpoint:
+                self.checkpoint.flush()
+            if self._inotify:
+                self._inotify.close()
+                self._inotify = None
+
+    def stop(self):
+        self.running = False
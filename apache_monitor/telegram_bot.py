@@ -2,8 +2,11 @@
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 import os
+import asyncio
 import logging
 from .scan_manual import manual_scan
+from .hashcache import get_hash_cache
+from .reports import Reporter, format_stats, format_top_ips
 from .utils import sanitize_for_telegram
 
 logger = logging.getLogger("TelegramBot")
@@ -11,6 +14,16 @@ logger = logging.getLogger("TelegramBot")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 AUTHORIZED_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+_reporter = None
+
+def get_reporter():
+    """Reporter bersama untuk semua command (cache TTL dari `report_cache_ttl`)."""
+    global _reporter
+    if _reporter is None:
+        from apache_monitor import config_loader
+        _reporter = Reporter.from_config(config_loader.get_config())
+    return _reporter
+
 async def test_scan(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler untuk command /test_scan"""
     chat_id = str(update.effective_chat.id)
@@ -72,7 +85,8 @@ async def test_scan(update: Update, context: ContextTypes.DEFAULT_TYPE):
         print(f"[TELEGRAM BOT] Starting manual scan of: {target_dir}")
         logger.info(f"Starting manual scan of: {target_dir}")
         try:
-            result = manual_scan(target_dir)
+            result = manual_scan(target_dir, hash_cache=get_hash_cache(config),
+                                 workers=config.get("scan_workers"))
             print(f"[TELEGRAM BOT] ✅ Scan completed: {result}")
             logger.info(f"Scan completed: {result}")
         except Exception as scan_error:
@@ -91,18 +105,27 @@ async def test_scan(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"📄 Total File: {result.get('total_files', 0)}\n"
             f"➕ File Baru: {result.get('new_files', 0)}\n"
             f"✏️ File Diedit: {result.get('modified_files', 0)}\n"
+            f"🗑️ File Dihapus: {result.get('deleted_files', 0)} (folder: {result.get('deleted_dirs', 0)})\n"
+            f"♻️ Cache Hash: {result.get('hash_cache_hits', 0)} hit, {result.get('hash_cache_misses', 0)} miss\n"
+            f"⚡ Kecepatan: {result.get('files_per_sec', 0):,.0f} file/s, {result.get('mb_per_sec', 0):,.1f} MB/s di-hash "
+            f"({result.get('elapsed_seconds', 0):.1f}s)\n"
         )
+        if result.get("unreadable_dirs"):
+            msg += f"⚠️ Folder Tidak Terbaca (dilewati): {result['unreadable_dirs']}\n"
+        if result.get("hash_cache_verified"):
+            msg += (f"🔎 Verifikasi Paranoid: {result['hash_cache_verified']} file, "
+                    f"{result.get('hash_cache_mismatches', 0)} tidak cocok\n")
         
         changed_folders = result.get("changed_folders", [])
         if changed_folders:
-            msg += "\n🆕 Folder Baru/Diedit:\n"
+            msg += "\n🆕 Folder Baru/Diedit/Dihapus:\n"
             # Batasi hanya 10 folder pertama untuk menghindari pesan terlalu panjang
             for folder in changed_folders[:10]:
                 msg += f"{folder}\n"
             if len(changed_folders) > 10:
                 msg += f"\n... dan {len(changed_folders) - 10} folder lainnya"
         else:
-            msg += "\n🆕 Folder Baru/Diedit: Tidak ada perubahan"
+            msg += "\n🆕 Folder Baru/Diedit/Dihapus: Tidak ada perubahan"
         
         logger.info(f"Formatted message length: {len(msg)} characters")
         
@@ -172,6 +195,8 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Perintah yang tersedia:\n"
             "/start - Tampilkan menu ini\n"
             "/test_scan - Lakukan scan manual filesystem\n"
+            "/stats [24h|7d|...] - Statistik alert & event filesystem\n"
+            "/top_ips [24h|7d|...] [jumlah] - IP dengan alert terbanyak\n"
             "/test - Test koneksi bot (simple message)"
         )
         
@@ -208,6 +233,40 @@ async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         print(f"[TELEGRAM BOT] Error details: {type(e).__name__}: {str(e)}")
         logger.error(f"Error in test_command: {e}", exc_info=True)
 
+async def _reply_report(update: Update, name, build):
+    """Validasi chat, jalankan query laporan di thread terpisah, lalu kirim hasilnya."""
+    chat_id = str(update.effective_chat.id)
+    logger.info(f"Received /{name} from chat_id: {chat_id}")
+    if chat_id != AUTHORIZED_CHAT_ID:
+        logger.warning(f"Unauthorized access attempt from chat_id: {chat_id}")
+        await update.message.reply_text("❌ Akses ditolak. Chat ID tidak terotorisasi.")
+        return
+    try:
+        # Query SQLite tidak boleh memblok event loop bot
+        msg = await asyncio.to_thread(build)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}", parse_mode=None)
+        return
+    except Exception as e:
+        logger.error(f"Error in /{name}: {e}", exc_info=True)
+        await update.message.reply_text(f"❌ Error saat membuat laporan:\n{str(e)[:300]}", parse_mode=None)
+        return
+    await update.message.reply_text(msg, parse_mode=None)
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler untuk /stats [rentang], mis. /stats 7d (default 24h)"""
+    since = context.args[0] if context.args else "24h"
+    reporter = get_reporter()
+    await _reply_report(update, "stats", lambda: format_stats(reporter.summary(since), since))
+
+async def top_ips_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler untuk /top_ips [rentang] [jumlah], mis. /top_ips 7d 20"""
+    args = context.args or []
+    since = args[0] if args else "24h"
+    limit = int(args[1]) if len(args) > 1 and args[1].isdigit() else 10
+    reporter = get_reporter()
+    await _reply_report(update, "top_ips", lambda: format_top_ips(reporter.top_ips(since, limit=min(limit, 50)), since))
+
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle errors in telegram bot"""
     error = context.error
@@ -280,13 +339,15 @@ def start_bot():
         app.add_handler(CommandHandler("start", start_command))
         app.add_handler(CommandHandler("test_scan", test_scan))
         app.add_handler(CommandHandler("test", test_command))
+        app.add_handler(CommandHandler("stats", stats_command))
+        app.add_handler(CommandHandler("top_ips", top_ips_command))
         
         # Add message handler untuk debugging (prioritas rendah)
         from telegram.ext import MessageHandler, filters
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, any_message_handler), group=1)
         
         print("[TELEGRAM BOT] ✅ Bot initialized successfully!")
-        print(f"[TELEGRAM BOT] Commands registered: /start, /test_scan, /test")
+        print(f"[TELEGRAM BOT] Commands registered: /start, /test_scan, /test, /stats, /top_ips")
         print(f"[TELEGRAM BOT] Authorized chat_id: {AUTHORIZED_CHAT_ID}")
         print(f"[TELEGRAM BOT] Bot token: {TELEGRAM_BOT_TOKEN[:20]}...{TELEGRAM_BOT_TOKEN[-10:]}")
         print("="*60 + "\n")
@@ -1,15 +1,35 @@
 import hashlib
 import os
-from datetime import datetime
+import calendar
+from datetime import datetime, timedelta, timezone
+
+_MONTHS = {m: i for i, m in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+HASH_BUFFER_SIZE = 1024 * 1024
 
 def sha256sum(filepath):
+    """
+    SHA-256 isi file (None jika bukan file atau gagal dibaca).
+
+    Buffer besar (file_digest di Python 3.11+, atau readinto 1 MiB) supaya
+    hashlib melepas GIL per blok besar dan hashing paralel di thread pool
+    (scanner.py) benar-benar berjalan bersamaan.
+    """
     if not os.path.isfile(filepath):
         return None
-    hash_sha256 = hashlib.sha256()
     try:
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
+        with open(filepath, "rb", buffering=0) as f:
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, "sha256").hexdigest()
+            hash_sha256 = hashlib.sha256()
+            buf = bytearray(HASH_BUFFER_SIZE)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                hash_sha256.update(view[:n])
     except (OSError, IOError):
         return None
     return hash_sha256.hexdigest()
@@ -34,4 +54,61 @@ def sanitize_for_telegram(text):
     return text
 
 def now_str():
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
\ No newline at end of file
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def parse_apache_time(value):
+    """
+    Parse timestamp Apache layout tetap `01/Nov/2025:02:34:12 +0000`.
+
+    Return (epoch_seconds, utc_offset_seconds). Raise ValueError jika format salah.
+    """
+    if len(value) < 26 or value[2] != "/" or value[6] != "/" or value[11] != ":" or value[20] != " ":
+        raise ValueError(f"Format waktu Apache tidak valid: {value!r}")
+    try:
+        month = _MONTHS[value[3:6]]
+    except KeyError:
+        raise ValueError(f"Bulan tidak valid: {value!r}") from None
+    sign = value[21]
+    if sign not in "+-":
+        raise ValueError(f"Offset timezone tidak valid: {value!r}")
+    offset = int(value[22:24]) * 3600 + int(value[24:26]) * 60
+    if sign == "-":
+        offset = -offset
+    epoch = calendar.timegm((
+        int(value[7:11]), month, int(value[0:2]),
+        int(value[12:14]), int(value[15:17]), int(value[18:20]),
+    ))
+    return epoch - offset, offset
+
+class ApacheTimeCache:
+    """
+    Memo hasil parse_apache_time per string detik.
+
+    Baris log berurutan hampir selalu berbagi detik yang sama, jadi nilai
+    terakhir dicek dulu sebelum dict memo.
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._memo = {}
+        self._last_key = None
+        self._last_value = None
+
+    def get(self, value):
+        """Return (epoch, datetime aware dengan offset asli) atau None jika tidak valid."""
+        if value == self._last_key:
+            return self._last_value
+        result = self._memo.get(value)
+        if result is None:
+            try:
+                epoch, offset = parse_apache_time(value)
+            except ValueError:
+                return None
+            tz = timezone.utc if offset == 0 else timezone(timedelta(seconds=offset))
+            result = (epoch, datetime.fromtimestamp(epoch, tz))
+            if len(self._memo) >= self.max_size:
+                self._memo.clear()
+            self._memo[value] = result
+        self._last_key = value
+        self._last_value = result
+        return result
@@ -0,0 +1,218 @@
+# apache_monitor/window.py
+import logging
+from array import array
+from collections import OrderedDict
+
+logger = logging.getLogger("Window")
+
+DEFAULT_MAX_IPS = 100000
+DEFAULT_MAX_ENTRIES = 2000000
+DEFAULT_MAX_HITS_PER_IP = 1024
+DEFAULT_MAX_PATHS = 100000
+DEFAULT_SWEEP_INTERVAL = 60
+
+
+class PathInterner:
+    """Peta path <-> ID integer supaya window tidak menyimpan string berulang."""
+
+    def __init__(self):
+        self._ids = {}
+        self._paths = []
+
+    def intern(self, path):
+        pid = self._ids.get(path)
+        if pid is None:
+            pid = len(self._paths)
+            self._ids[path] = pid
+            self._paths.append(path)
+        return pid
+
+    def lookup(self, pid):
+        return self._paths[pid]
+
+    def __len__(self):
+        return len(self._paths)
+
+
+class _IPState:
+    __slots__ = ("times", "path_ids", "last_raw", "last_seen")
+
+    def __init__(self):
+        self.times = array("q")
+        self.path_ids = array("I")
+        self.last_raw = ""
+        self.last_seen = 0
+
+
+class IPWindowStore:
+    """
+    State sliding window per IP yang ringkas dan terbatas.
+
+    Per IP hanya disimpan epoch (array int64) dan ID path yang di-intern,
+    plus satu contoh baris raw terakhir. Jumlah IP dan total entri dibatasi
+    secara global (IP paling lama tidak aktif dibuang duluan), IP yang idle
+    disapu berkala, dan entri cooldown alert yang sudah lewat dihapus.
+    """
+
+    def __init__(self, window_seconds, cooldown=3600, max_ips=DEFAULT_MAX_IPS,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_hits_per_ip=DEFAULT_MAX_HITS_PER_IP,
+                 max_paths=DEFAULT_MAX_PATHS, sweep_interval=DEFAULT_SWEEP_INTERVAL):
+        self.window_seconds = window_seconds
+        self.cooldown = cooldown
+        self.max_ips = max_ips
+        self.max_entries = max_entries
+        self.max_hits_per_ip = max_hits_per_ip
+        self.max_paths = max_paths
+        self.sweep_interval = sweep_interval
+
+        self._ips = OrderedDict()  # IP -> _IPState, urut dari yang paling lama aktif
+        self.paths = PathInterner()
+        self.alerted = {}  # IP -> epoch alert terakhir
+        self.entries = 0
+        self.evicted_ips = 0
+        self.swept_ips = 0
+        self._last_sweep = None
+
+    @classmethod
+    def from_config(cls, config):
+        max_hits_per_ip = config.get("window_max_hits_per_ip", DEFAULT_MAX_HITS_PER_IP)
+        threshold = config.get("threshold")
+        if threshold and max_hits_per_ip < threshold:
+            # Hit per IP tidak akan pernah mencapai threshold jika batasnya lebih kecil
+            logger.warning(f"window_max_hits_per_ip ({max_hits_per_ip}) < threshold ({threshold}), "
+                           f"dinaikkan ke {threshold}")
+            max_hits_per_ip = threshold
+        return cls(
+            config.get("window_seconds", 60),
+            cooldown=config.get("alert_cooldown", 3600),
+            max_ips=config.get("window_max_ips", DEFAULT_MAX_IPS),
+            max_entries=config.get("window_max_entries", DEFAULT_MAX_ENTRIES),
+            max_hits_per_ip=max_hits_per_ip,
+            max_paths=config.get("window_max_paths", DEFAULT_MAX_PATHS),
+            sweep_interval=config.get("window_sweep_interval", DEFAULT_SWEEP_INTERVAL),
+        )
+
+    def __len__(self):
+        return len(self._ips)
+
+    def __contains__(self, ip):
+        return ip in self._ips
+
+    def add(self, ip, epoch, path, raw):
+        """Catat satu hit untuk IP pada `epoch`."""
+        state = self._ips.get(ip)
+        if state is None:
+            state = self._ips[ip] = _IPState()
+        else:
+            self._ips.move_to_end(ip)
+        state.times.append(epoch)
+        state.path_ids.append(self.paths.intern(path))
+        state.last_raw = raw
+        if epoch > state.last_seen:
+            state.last_seen = epoch
+        self.entries += 1
+        if len(state.times) > self.max_hits_per_ip:
+            # Ring buffer: buang hit tertua
+            drop = len(state.times) - self.max_hits_per_ip
+            del state.times[:drop]
+            del state.path_ids[:drop]
+            self.entries -= drop
+
+        if self._last_sweep is None:
+            self._last_sweep = epoch
+        elif epoch - self._last_sweep >= self.sweep_interval:
+            self.sweep(epoch)
+        self._enforce_caps()
+
+    def expire(self, ip, now):
+        """Buang hit IP yang sudah di luar window. Return jumlah hit tersisa."""
+        state = self._ips.get(ip)
+        if state is None:
+            return 0
+        cutoff = now - self.window_seconds
+        times = state.times
+        drop = 0
+        while drop < len(times) and times[drop] < cutoff:
+            drop += 1
+        if drop:
+            del times[:drop]
+            del state.path_ids[:drop]
+            self.entries -= drop
+        return len(times)
+
+    def hits(self, ip):
+        state = self._ips.get(ip)
+        return len(state.times) if state else 0
+
+    def paths_for(self, ip):
+        """Daftar path unik dalam window IP (urutan kemunculan pertama)."""
+        state = self._ips.get(ip)
+        if state is None:
+            return []
+        lookup = self.paths.lookup
+        return [lookup(pid) for pid in dict.fromkeys(state.path_ids)]
+
+    def last_raw(self, ip):
+        state = self._ips.get(ip)
+        return state.last_raw if state else ""
+
+    # ---------------------------------------------------------------- cooldown
+    def in_cooldown(self, ip, now):
+        last_alert = self.alerted.get(ip)
+        return last_alert is not None and now - last_alert <= self.cooldown
+
+    def mark_alerted(self, ip, now):
+        self.alerted[ip] = now
+
+    # --------------------------------------------------------------- eviction
+    def _drop(self, ip):
+        state = self._ips.pop(ip)
+        self.entries -= len(state.times)
+
+    def _enforce_caps(self):
+        while self._ips and (len(self._ips) > self.max_ips or self.entries > self.max_entries):
+            ip = next(iter(self._ips))
+            self._drop(ip)
+            self.evicted_ips += 1
+
+    def sweep(self, now):
+        """Buang IP idle (tanpa hit dalam window) dan cooldown yang kedaluwarsa."""
+        cutoff = now - self.window_seconds
+        # Urutan dict = urutan aktivitas, jadi cukup sapu dari depan
+        idle = 0
+        while self._ips:
+            ip, state = next(iter(self._ips.items()))
+            if state.last_seen >= cutoff:
+                break
+            self._drop(ip)
+            idle += 1
+        self.swept_ips += idle
+
+        expired = [ip for ip, ts in self.alerted.items() if now - ts > self.cooldown]
+        for ip in expired:
+            del self.alerted[ip]
+
+        if len(self.paths) > self.max_paths:
+            self._compact_paths()
+
+        self._last_sweep = now
+        if idle or expired:
+            logger.debug(f"Sweep window: {idle} IP idle, {len(expired)} cooldown kedaluwarsa")
+
+    def _compact_paths(self):
+        """Bangun ulang interner hanya dengan path yang masih dipakai."""
+        old = self.paths
+        self.paths = PathInterner()
+        for state in self._ips.values():
+            state.path_ids = array("I", (self.paths.intern(old.lookup(pid)) for pid in state.path_ids))
+
+    def stats(self):
+        return {
+            "tracked_ips": len(self._ips),
+            "entries": self.entries,
+            "interned_paths": len(self.paths),
+            "alerted_ips": len(self.alerted),
+            "evicted_ips": self.evicted_ips,
+            "swept_ips": self.swept_ips,
+            "approx_bytes": self.entries * 12 + len(self._ips) * 200,
+        }
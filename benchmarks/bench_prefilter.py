@@ -0,0 +1,54 @@
+# benchmarks/bench_prefilter.py
+"""
+Benchmark pre-filter: lines/sec parse penuh vs fast-reject.
+
+Jalankan dari root repo:
+    python benchmarks/bench_prefilter.py [--lines 200000] [--attack-ratio 0.01]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apache_monitor.log_monitor import LogMonitor
+from loggen import generate_lines
+
+
+def make_lines(count, attack_ratio, seed=42):
+    return list(generate_lines(count, attack_mix={"scanner": attack_ratio}, seed=seed))
+
+
+def run(monitor, lines):
+    start = time.perf_counter()
+    monitor.process_lines(lines)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--attack-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+
+    config = {
+        "suspicious_extensions": [".php", ".phar"],
+        "dangerous_patterns": ["/\\.env", "/wp-admin/", "/upload/.*\\.php$"],
+        # Threshold sangat tinggi supaya benchmark tidak menulis alert ke DB
+        "threshold": 10 ** 9,
+        "window_seconds": 60,
+        "alert_cooldown": 3600,
+    }
+    lines = make_lines(args.lines, args.attack_ratio)
+
+    before = run(LogMonitor(dict(config, prefilter=False), None), lines)
+    after = run(LogMonitor(dict(config, prefilter=True), None), lines)
+    print(f"lines={args.lines} attack_ratio={args.attack_ratio}")
+    print(f"full parse : {before:,.0f} lines/s")
+    print(f"pre-filter : {after:,.0f} lines/s ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
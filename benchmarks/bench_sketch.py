@@ -0,0 +1,97 @@
+# benchmarks/bench_sketch.py
+"""
+Benchmark engine deteksi exact vs sketch: memori, throughput, dan akurasi.
+
+Mensimulasikan scan botnet: banyak IP unik dengan sedikit hit masing-masing,
+ditambah sejumlah kecil heavy hitter di atas threshold.
+
+Jalankan dari root repo:
+    python benchmarks/bench_sketch.py [--ips 300000] [--heavy 50] [--width 65536]
+"""
+import argparse
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apache_monitor.log_monitor import LogMonitor
+
+
+def make_hits(ips, heavy, heavy_hits, duration, seed=7):
+    rnd = random.Random(seed)
+    hits = []
+    for i in range(ips):
+        ip = f"{10 + i % 200}.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        for _ in range(rnd.randint(1, 3)):
+            hits.append((rnd.randrange(duration), ip))
+    heavy_ips = [f"203.0.113.{i}" for i in range(heavy)]
+    for ip in heavy_ips:
+        start = rnd.randrange(duration - 30)
+        for _ in range(heavy_hits):
+            hits.append((start + rnd.randrange(30), ip))
+    hits.sort()
+    return hits, set(heavy_ips)
+
+
+def run(engine, hits, args):
+    config = {
+        "threshold": args.threshold,
+        "window_seconds": 60,
+        "alert_cooldown": 3600,
+        "detection_engine": engine,
+        "sketch_width": args.width,
+        "sketch_depth": args.depth,
+        # Baseline exact tanpa batas supaya terlihat biaya memori sebenarnya
+        "window_max_ips": 10 ** 9,
+        "window_max_entries": 10 ** 9,
+    }
+    alerts = queue.Queue()
+    tracemalloc.start()
+    monitor = LogMonitor(config, alerts, persist_alerts=False)
+    started = time.perf_counter()
+    for epoch, ip in hits:
+        monitor.record_hit(ip, epoch, "/wp-login.php", "")
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    alerted = set()
+    while not alerts.empty():
+        alerted.add(alerts.get_nowait()["ip"])
+    return {"rate": len(hits) / elapsed, "current": current, "peak": peak, "alerted": alerted}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ips", type=int, default=300000)
+    parser.add_argument("--heavy", type=int, default=50)
+    parser.add_argument("--heavy-hits", type=int, default=40)
+    parser.add_argument("--threshold", type=int, default=15)
+    parser.add_argument("--duration", type=int, default=600)
+    parser.add_argument("--width", type=int, default=65536)
+    parser.add_argument("--depth", type=int, default=4)
+    args = parser.parse_args()
+    # Jangan cetak log [ALERT] per IP selama benchmark
+    logging.disable(logging.WARNING)
+
+    hits, heavy_ips = make_hits(args.ips, args.heavy, args.heavy_hits, args.duration)
+    print(f"hits={len(hits)} distinct_ips={args.ips + args.heavy} heavy={args.heavy} "
+          f"threshold={args.threshold} sketch={args.depth}x{args.width}")
+    exact = run("exact", hits, args)
+    for name in ("exact", "sketch"):
+        result = exact if name == "exact" else run("sketch", hits, args)
+        alerted = result["alerted"]
+        true_pos = len(alerted & exact["alerted"])
+        precision = true_pos / len(alerted) if alerted else 1.0
+        recall = true_pos / len(exact["alerted"]) if exact["alerted"] else 1.0
+        print(f"{name:<7}: {result['rate']:>10,.0f} hits/s  mem={result['current'] / 1e6:7.1f} MB "
+              f"(peak {result['peak'] / 1e6:.1f} MB)  alerts={len(alerted)} "
+              f"precision={precision:.3f} recall={recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# benchmarks/loggen.py
+"""
+Generator log akses Apache sintetis yang deterministik (seed tetap).
+
+Traffic normal diambil dari sekumpulan IP (`ips` = kardinalitas), ditambah
+campuran serangan yang bisa diatur per jenis:
+
+    scanner     - satu IP mencoba banyak path suspicious berbeda (.php, .env, ...)
+    bruteforce  - satu IP berulang kali ke /wp-login.php atau /xmlrpc.php
+    notfound    - probing path acak yang berakhir 404
+    botnet      - banyak IP berbeda dalam satu /24 ke path suspicious yang sama
+
+Contoh:
+    python benchmarks/loggen.py --lines 1000000 --format combined \\
+        --attack scanner=0.01 --attack bruteforce=0.005 -o /tmp/access.log
+"""
+import argparse
+import random
+import time
+
+NORMAL_PATHS = ["/", "/index.html", "/css/style.css", "/js/app.js", "/img/logo.png",
+                "/blog/2025/10/post-title", "/api/v1/items?page=2", "/favicon.ico",
+                "/about", "/contact", "/products/42", "/search?q=sepatu"]
+SCANNER_PATHS = ["/.env", "/wp-admin/setup-config.php", "/upload/shell.php", "/phpinfo.php",
+                 "/vendor/phpunit/eval-stdin.php", "/.git/config", "/admin/config.php",
+                 "/cgi-bin/test.php", "/backup.php", "/db.php", "/info.phar"]
+BRUTEFORCE_PATHS = ["/wp-login.php", "/xmlrpc.php"]
+AGENTS = ["Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36",
+          "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+          "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Mobile/15E148",
+          "Googlebot/2.1 (+http://www.google.com/bot.html)"]
+ATTACK_AGENTS = ["curl/8.4.0", "python-requests/2.31.0", "Mozilla/5.0 zgrab/0.x", "sqlmap/1.7"]
+
+DEFAULT_ATTACK_MIX = {"scanner": 0.01, "bruteforce": 0.005, "notfound": 0.005, "botnet": 0.0}
+FORMATS = ("combined", "common")
+# 01/Nov/2025:00:00:00 +0000
+DEFAULT_START_EPOCH = 1761955200
+
+
+def _apache_time(epoch):
+    return time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(epoch))
+
+
+def _ip(rnd_value):
+    return f"10.{(rnd_value >> 16) & 255}.{(rnd_value >> 8) & 255}.{rnd_value & 255 or 1}"
+
+
+def generate_lines(count, fmt="combined", ips=10000, attack_mix=None, seed=42,
+                   start_epoch=DEFAULT_START_EPOCH, lines_per_second=1000, attackers=50):
+    """
+    Yield `count` baris log (tanpa newline) secara deterministik.
+
+    `attack_mix` memetakan jenis serangan ke fraksi baris (lihat docstring
+    modul); sisanya traffic normal dari `ips` IP berbeda.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format tidak dikenal: {fmt} ({', '.join(FORMATS)})")
+    mix = DEFAULT_ATTACK_MIX if attack_mix is None else attack_mix
+    unknown = set(mix) - set(DEFAULT_ATTACK_MIX)
+    if unknown:
+        raise ValueError(f"Jenis serangan tidak dikenal: {', '.join(sorted(unknown))}")
+    rnd = random.Random(seed)
+    client_ips = [_ip(rnd.randrange(1 << 24)) for _ in range(max(1, ips))]
+    attacker_ips = [f"203.0.{113 + i // 250}.{i % 250 + 1}" for i in range(max(1, attackers))]
+    # Ambang kumulatif supaya satu angka acak memilih jenis baris
+    cumulative = []
+    total = 0.0
+    for kind, ratio in mix.items():
+        total += ratio
+        cumulative.append((total, kind))
+
+    cached_second = None
+    stamp = ""
+    for i in range(count):
+        second = start_epoch + i // max(1, lines_per_second)
+        if second != cached_second:
+            cached_second = second
+            stamp = _apache_time(second)
+        roll = rnd.random()
+        kind = None
+        for bound, name in cumulative:
+            if roll < bound:
+                kind = name
+                break
+        status = 200
+        if kind is None:
+            ip = client_ips[rnd.randrange(len(client_ips))]
+            path = NORMAL_PATHS[rnd.randrange(len(NORMAL_PATHS))]
+            agent = AGENTS[rnd.randrange(len(AGENTS))]
+            status = 304 if rnd.random() < 0.1 else 200
+        elif kind == "scanner":
+            ip = attacker_ips[rnd.randrange(len(attacker_ips))]
+            path = SCANNER_PATHS[rnd.randrange(len(SCANNER_PATHS))]
+            agent = ATTACK_AGENTS[rnd.randrange(len(ATTACK_AGENTS))]
+            status = 404
+        elif kind == "bruteforce":
+            ip = attacker_ips[rnd.randrange(len(attacker_ips))]
+            path = BRUTEFORCE_PATHS[rnd.randrange(len(BRUTEFORCE_PATHS))]
+            agent = ATTACK_AGENTS[rnd.randrange(len(ATTACK_AGENTS))]
+            status = 200 if path == "/xmlrpc.php" else 302
+        elif kind == "notfound":
+            ip = attacker_ips[rnd.randrange(len(attacker_ips))]
+            path = f"/{rnd.randrange(1 << 20):x}/{rnd.randrange(1 << 16):x}"
+            agent = ATTACK_AGENTS[rnd.randrange(len(ATTACK_AGENTS))]
+            status = 404
+        else:  # botnet
+            ip = f"198.51.100.{rnd.randrange(1, 255)}"
+            path = BRUTEFORCE_PATHS[0]
+            agent = AGENTS[rnd.randrange(len(AGENTS))]
+        size = rnd.randrange(100, 9000)
+        request = f'{ip} - - [{stamp}] "GET {path} HTTP/1.1" {status} {size}'
+        if fmt == "combined":
+            yield f'{request} "-" "{agent}"'
+        else:
+            yield request
+
+
+def write_log(path, count, **kwargs):
+    """Tulis log sintetis ke `path`; return jumlah byte."""
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for line in generate_lines(count, **kwargs):
+            written += f.write(line + "\n")
+    return written
+
+
+def parse_attack_mix(values):
+    """Parse daftar `jenis=rasio` dari CLI menjadi dict."""
+    mix = dict.fromkeys(DEFAULT_ATTACK_MIX, 0.0)
+    for item in values:
+        kind, _, ratio = item.partition("=")
+        if kind not in mix:
+            raise argparse.ArgumentTypeError(f"Jenis serangan tidak dikenal: {kind}")
+        mix[kind] = float(ratio)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator log akses Apache sintetis")
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--format", choices=FORMATS, default="combined")
+    parser.add_argument("--ips", type=int, default=10000, help="Kardinalitas IP traffic normal")
+    parser.add_argument("--attack", action="append", default=None, metavar="JENIS=RASIO",
+                        help=f"Campuran serangan ({', '.join(DEFAULT_ATTACK_MIX)}); bisa diulang")
+    parser.add_argument("--rate", type=int, default=1000, help="Baris per detik waktu log")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+    mix = parse_attack_mix(args.attack) if args.attack else None
+    size = write_log(args.output, args.lines, fmt=args.format, ips=args.ips, attack_mix=mix,
+                     seed=args.seed, lines_per_second=args.rate)
+    print(f"{args.lines} baris ({size / 1e6:.1f} MB) ditulis ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# benchmarks/run_benchmarks.py
+"""
+Suite benchmark yang repeatable dengan output JSON untuk dibandingkan antar commit.
+
+Setiap benchmark dijalankan `--repeat` kali di atas data sintetis yang sama
+(seed tetap, lihat loggen.py dan webroot.py); hasil terbaik (waktu minimum)
+yang dilaporkan. DB dan file sementara dibuat di direktori temp, bukan di
+logs/ milik instalasi.
+
+Jalankan dari root repo:
+    python benchmarks/run_benchmarks.py -o bench.json
+    python benchmarks/run_benchmarks.py --only parse_line,tail_pipeline --compare bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apache_monitor import db
+from apache_monitor.log_monitor import LogMonitor
+from apache_monitor.pipeline import ParsePipeline
+from apache_monitor.hashcache import HashCache
+from apache_monitor.scan_manual import manual_scan
+from apache_monitor.scanner import Scanner
+from apache_monitor.tailer import MultiTailer
+from loggen import generate_lines, parse_attack_mix
+from webroot import make_webroot
+
+BENCHMARKS = {}
+
+BASE_CONFIG = {
+    "suspicious_extensions": [".php", ".phar"],
+    "dangerous_patterns": ["/\\.env", "/wp-admin/", "/upload/.*\\.php$", "/\\.git/"],
+    "threshold": 15,
+    "window_seconds": 60,
+    "alert_cooldown": 3600,
+    "log_format": "combined",
+}
+
+
+def benchmark(unit):
+    """Daftarkan fungsi benchmark; fungsi menerima ctx dan return (jumlah unit, detik)."""
+    def register(func):
+        BENCHMARKS[func.__name__.replace("bench_", "", 1)] = (func, unit)
+        return func
+    return register
+
+
+class Context:
+    """Data sintetis bersama antar benchmark, dibuat sekali (lazy)."""
+
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.config = dict(BASE_CONFIG, log_format=args.format)
+        self._lines = None
+        self._webroot = None
+        self._db_counter = 0
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = list(generate_lines(
+                self.args.lines, fmt=self.args.format, ips=self.args.ips,
+                attack_mix=self.args.attack_mix, seed=self.args.seed,
+            ))
+        return self._lines
+
+    @property
+    def webroot(self):
+        if self._webroot is None:
+            self._webroot = os.path.join(self.workdir, "webroot")
+            make_webroot(self._webroot, files=self.args.files, depth=self.args.depth,
+                         fanout=self.args.fanout, seed=self.args.seed)
+        return self._webroot
+
+    def monitor(self, **overrides):
+        return LogMonitor(dict(self.config, **overrides), queue.Queue(), persist_alerts=False)
+
+    def fresh_db(self):
+        """Arahkan modul db ke file DB baru yang kosong."""
+        self._db_counter += 1
+        db.DB_PATH = os.path.join(self.workdir, f"alerts-{self._db_counter}.db")
+        db.init_db()
+        return db.DB_PATH
+
+
+@benchmark("lines")
+def bench_parse_line(ctx):
+    monitor = ctx.monitor()
+    parse = monitor.parse_line
+    lines = ctx.lines
+    started = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return len(lines), time.perf_counter() - started
+
+
+@benchmark("paths")
+def bench_is_suspicious_path(ctx):
+    monitor = ctx.monitor()
+    paths = [e["path"] for e in map(monitor.parse_line, ctx.lines) if e]
+    check = monitor.is_suspicious_path
+    started = time.perf_counter()
+    for path in paths:
+        check(path)
+    return len(paths), time.perf_counter() - started
+
+
+@benchmark("hits")
+def bench_check_threshold(ctx):
+    """Window + threshold dengan setiap baris dianggap hit (kardinalitas IP dari --ips)."""
+    monitor = ctx.monitor()
+    hits = [(e["ip"], e["epoch"], e["path"], e["raw"])
+            for e in map(monitor.parse_line, ctx.lines) if e]
+    monitor = ctx.monitor()
+    window, check = monitor.ip_window, monitor.check_threshold
+    started = time.perf_counter()
+    for ip, epoch, path, raw in hits:
+        window.add(ip, epoch, path, raw)
+        check(ip, epoch)
+    return len(hits), time.perf_counter() - started
+
+
+@benchmark("lines")
+def bench_tail_pipeline(ctx):
+    """Tailer chunked + LogMonitor.process_lines dari file di disk sampai EOF."""
+    return _run_tail(ctx, ctx.monitor())
+
+
+def _run_tail(ctx, monitor):
+    path = os.path.join(ctx.workdir, "access.log")
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(line + "\n" for line in ctx.lines)
+    size = os.path.getsize(path)
+    pipeline = ParsePipeline.from_config(monitor)
+    tailer = MultiTailer([path], pipeline.submit if pipeline else monitor.process_lines,
+                         use_inotify=False, poll_interval=0.001, stats_interval=0,
+                         on_idle=pipeline.flush if pipeline else None)
+    started = time.perf_counter()
+    thread = threading.Thread(target=tailer.run, daemon=True)
+    thread.start()
+    while True:
+        tf = tailer.files.get(path)
+        if tf is not None and tf.offset >= size:
+            break
+        time.sleep(0.001)
+    tailer.stop()
+    thread.join()
+    if pipeline:
+        # Hitung sampai aggregator selesai memproses semua batch
+        pipeline.close()
+    elapsed = time.perf_counter() - started
+    return len(ctx.lines), elapsed
+
+
+@benchmark("lines")
+def bench_tail_pipeline_pool(ctx):
+    """Seperti tail_pipeline, tetapi parse di ParsePipeline dengan --pipeline-workers proses."""
+    return _run_tail(ctx, ctx.monitor(pipeline_workers=ctx.args.pipeline_workers))
+
+
+@benchmark("files")
+def bench_save_baseline_snapshot(ctx):
+    root = ctx.webroot
+    ctx.fresh_db()
+    started = time.perf_counter()
+    db.save_baseline_snapshot(root)
+    return ctx.args.files, time.perf_counter() - started
+
+
+@benchmark("files")
+def bench_manual_scan(ctx):
+    root = ctx.webroot
+    ctx.fresh_db()
+    db.save_baseline_snapshot(root)
+    started = time.perf_counter()
+    result = manual_scan(root)
+    return result["total_files"], time.perf_counter() - started
+
+
+@benchmark("files")
+def bench_scan_cold(ctx):
+    """Scanner tanpa cache hash (semua file dibaca dan di-hash) dengan --scan-workers thread."""
+    root = ctx.webroot
+    ctx.fresh_db()
+    scanner = Scanner(root, hash_cache=HashCache(), workers=ctx.args.scan_workers)
+    started = time.perf_counter()
+    for _ in scanner.scan():
+        pass
+    return scanner.files, time.perf_counter() - started
+
+
+def run_suite(ctx, names, repeat):
+    results = {}
+    for name in names:
+        func, unit = BENCHMARKS[name]
+        runs = []
+        for _ in range(repeat):
+            count, seconds = func(ctx)
+            runs.append(seconds)
+        best = min(runs)
+        results[name] = {
+            "unit": unit,
+            "count": count,
+            "best_seconds": round(best, 6),
+            "runs_seconds": [round(s, 6) for s in runs],
+            "per_sec": round(count / best, 1) if best > 0 else None,
+        }
+        print(f"{name:<24} {results[name]['per_sec'] or 0:>14,.0f} {unit}/s  "
+              f"({count} {unit}, best {best:.3f}s dari {repeat})", file=sys.stderr)
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results, baseline_path, tolerance):
+    """Cetak rasio terhadap hasil sebelumnya; return daftar benchmark yang regresi."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old or not old.get("per_sec") or not result["per_sec"]:
+            continue
+        ratio = result["per_sec"] / old["per_sec"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  <-- REGRESI"
+            regressions.append(name)
+        print(f"{name:<24} {ratio:6.2f}x vs baseline{flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite apache_monitor")
+    parser.add_argument("--only", help=f"Daftar benchmark dipisah koma ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--format", choices=("combined", "common"), default="combined")
+    parser.add_argument("--ips", type=int, default=10000)
+    parser.add_argument("--attack", action="append", default=None, metavar="JENIS=RASIO")
+    parser.add_argument("--pipeline-workers", type=int, default=os.cpu_count() or 1,
+                        help="Jumlah worker untuk tail_pipeline_pool")
+    parser.add_argument("--files", type=int, default=5000, help="Jumlah file web root sintetis")
+    parser.add_argument("--scan-workers", type=int, default=None,
+                        help="Jumlah thread hashing untuk scan_cold (default: otomatis)")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="Tulis hasil JSON ke file (default: stdout)")
+    parser.add_argument("--compare", help="File JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Penurunan per_sec yang dianggap regresi (default 0.10 = 10%%)")
+    parser.add_argument("--keep", action="store_true", help="Jangan hapus direktori kerja sementara")
+    args = parser.parse_args()
+    args.attack_mix = parse_attack_mix(args.attack) if args.attack else None
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Benchmark tidak dikenal: {', '.join(unknown)}")
+
+    # Log [ALERT] dan INFO per file tidak relevan untuk pengukuran
+    logging.disable(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="apache-monitor-bench-")
+    original_db = db.DB_PATH
+    try:
+        ctx = Context(args, workdir)
+        results = run_suite(ctx, names, args.repeat)
+    finally:
+        db.DB_PATH = original_db
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "keep")},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# benchmarks/webroot.py
+"""
+Generator web root sintetis yang deterministik untuk benchmark scan filesystem.
+
+Membuat pohon direktori dengan `fanout` subdirektori per level sampai
+kedalaman `depth`, lalu menyebar `files` file (campuran .php/.html/.css/.js/
+gambar) dengan ukuran acak di rentang `min_size`..`max_size`.
+
+Contoh:
+    python benchmarks/webroot.py --files 20000 --depth 3 --fanout 8 -o /tmp/webroot
+"""
+import argparse
+import os
+import random
+
+EXTENSIONS = [".php", ".html", ".css", ".js", ".png", ".jpg", ".txt"]
+WEIGHTS = [30, 15, 10, 15, 15, 10, 5]
+
+
+def _directories(root, depth, fanout):
+    dirs = [root]
+    level = [root]
+    for d in range(depth):
+        nxt = []
+        for parent in level:
+            for i in range(fanout):
+                nxt.append(os.path.join(parent, f"d{d}_{i}"))
+        dirs.extend(nxt)
+        level = nxt
+    return dirs
+
+
+def make_webroot(root, files=10000, depth=3, fanout=6, min_size=256, max_size=64 * 1024, seed=42):
+    """
+    Buat web root sintetis di `root`. Return dict ringkasan (dirs, files, bytes).
+
+    Isi file deterministik (dari seed) sehingga checksum stabil antar run.
+    """
+    rnd = random.Random(seed)
+    dirs = _directories(root, depth, fanout)
+    for path in dirs:
+        os.makedirs(path, exist_ok=True)
+    # Blok isi dipakai ulang dengan offset berbeda supaya generate cepat
+    pool = rnd.randbytes(max_size * 2)
+    total = 0
+    for i in range(files):
+        directory = dirs[rnd.randrange(len(dirs))]
+        ext = rnd.choices(EXTENSIONS, WEIGHTS)[0]
+        size = rnd.randint(min_size, max_size)
+        start = rnd.randrange(len(pool) - size)
+        with open(os.path.join(directory, f"f{i}{ext}"), "wb") as f:
+            f.write(pool[start:start + size])
+        total += size
+    return {"dirs": len(dirs), "files": files, "bytes": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator web root sintetis")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--min-size", type=int, default=256)
+    parser.add_argument("--max-size", type=int, default=64 * 1024)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+    summary = make_webroot(args.output, args.files, args.depth, args.fanout,
+                           args.min_size, args.max_size, args.seed)
+    print(f"{summary['files']} file di {summary['dirs']} direktori "
+          f"({summary['bytes'] / 1e6:.1f} MB) dibuat di {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 
 import os
 import sys
+import signal
 import argparse
 import logging
 import logging.handlers
@@ -14,6 +15,7 @@ from apache_monitor.db import init_db
 from apache_monitor.log_monitor import LogMonitor
 from apache_monitor.fs_monitor import FsMonitor
 from apache_monitor.notifier import Notifier
+from apache_monitor.retention import start_retention
 
 # Perlu impor start_bot agar telegram_app bisa diinisialisasi
 try:
@@ -40,10 +42,27 @@ def load_config(config_path="config.yaml"):
     with open(config_path) as f:
         return yaml.safe_load(f)
 
+def reload_ip_lists(log_mon, config_path="config.yaml"):
+    """Handler SIGHUP: baca ulang config.yaml lalu muat ulang allow/blocklist (inline dan file)."""
+    try:
+        config = load_config(config_path)
+    except Exception as e:
+        logging.getLogger().error(f"Gagal membaca ulang {config_path}, hanya file list yang dimuat ulang: {e}")
+        config = None
+    log_mon.reload_ip_lists(config)
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--dry-run", action="store_true", help="Do not send Telegram alerts")
-    parser.add_argument("--once", action="store_true", help="Scan log once and exit (not implemented fully)")
+    parser.add_argument("--once", action="store_true", help="Replay log historis (termasuk rotasi & .gz) sekali lalu keluar")
+    parser.add_argument("--files", nargs="+", help="File log untuk --once (default: target_log_path + hasil rotasinya)")
+    parser.add_argument("--workers", type=int, help="Jumlah proses worker untuk --once (default: jumlah CPU)")
+    subcommands = parser.add_subparsers(dest="command")
+    report_parser = subcommands.add_parser("report", help="Laporan riwayat alert dan event filesystem dari alerts.db")
+    report_parser.add_argument("--since", default="24h", help="Awal rentang: durasi (90m, 24h, 7d) atau tanggal ISO")
+    report_parser.add_argument("--until", help="Akhir rentang (default: sekarang)")
+    report_parser.add_argument("--limit", type=int, default=10, help="Jumlah baris top IP/path/direktori")
+    report_parser.add_argument("--depth", type=int, default=2, help="Kedalaman direktori untuk event filesystem")
     args = parser.parse_args()
 
     load_dotenv()
@@ -61,8 +80,23 @@ def main():
             logger.error(f"Konfigurasi tidak lengkap. Key yang hilang: {missing_keys}")
             logger.error("Pastikan config.yaml berisi semua key yang diperlukan.")
             sys.exit(1)
+
+        if args.command == "report":
+            from apache_monitor.reports import Reporter, format_report
+            try:
+                print(format_report(Reporter.from_config(config), args.since, args.until, args.limit, args.depth))
+            except ValueError as e:
+                parser.error(str(e))
+            return 0
+
+        if args.once:
+            from apache_monitor.replay import replay, format_report
+            result = replay(config, files=args.files, workers=args.workers)
+            print(format_report(result))
+            return 0
         
         # Start components
+        start_retention(config)
         log_mon = LogMonitor(config, alert_queue, dry_run=args.dry_run)
         fs_mon = FsMonitor(config, alert_queue, dry_run=args.dry_run)
         notifier = Notifier(config, alert_queue, dry_run=args.dry_run)
@@ -117,6 +151,9 @@ def main():
         try:
             log_thread = log_mon.start()
             logger.info("Log monitor berhasil dimulai")
+            if hasattr(signal, "SIGHUP"):
+                # kill -HUP <pid>: muat ulang allow/blocklist tanpa restart thread tail
+                signal.signal(signal.SIGHUP, lambda signum, frame: reload_ip_lists(log_mon))
         except Exception as e:
             logger.error(f"Gagal memulai log monitor: {e}")
             if not args.dry_run:
@@ -134,13 +171,6 @@ def main():
             logger.error(f"Error tidak terduga saat memulai filesystem monitor: {e}", exc_info=True)
             fs_observer = None
 
-        if args.once:
-            print("Once mode not fully implemented; exiting.")
-            if fs_observer:
-                fs_observer.stop()
-                fs_observer.join()
-            return 0
-
         logger.info("ApacheAuto Monitor berjalan. Tekan Ctrl+C untuk menghentikan.")
         notifier.run()  # blocks
 
@@ -148,8 +178,7 @@ def main():
         logger.info("\nMenerima signal interrupt, menghentikan monitor...")
         if 'fs_observer' in locals() and fs_observer:
             try:
-                fs_observer.stop()
-                fs_observer.join(timeout=5)
+                fs_mon.stop(timeout=5)
                 logger.info("Filesystem observer dihentikan")
             except Exception as e:
                 logger.warning(f"Error menghentikan filesystem observer: {e}")
@@ -165,4 +194,4 @@ if __name__ == "__main__":
 # - Kode sudah cukup baik dan terstruktur.
 # - Pastikan semua dependency, file config, dan environment variable ada.
 # - Apabila start_bot tidak ditemukan/import error, kode akan tetap berjalan tanpa fitur Telegram.
-# - Mode `--once` memang belum diimplementasikan sepenuhnya.
\ No newline at end of file
+# - Mode `--once` menjalankan replay paralel atas log historis (lihat apache_monitor/replay.py).
\ No newline at end of file
@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from apache_monitor import db
+
+class TestDBWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def test_group_commit_and_stats(self):
+        for i in range(1200):
+            db.log_fs_event("created", f"f{i}.php", i, 1.0, None)
+        db.log_ip_alert("1.2.3.4", 20, ["/a.php", "/b.php"], "raw")
+        self.assertTrue(db.flush_writes())
+        conn = sqlite3.connect(db.DB_PATH)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM fs_events").fetchone()[0], 1200)
+        self.assertEqual(db.alerts_for_ip("1.2.3.4")[0]["paths"], ["/a.php", "/b.php"])
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        conn.close()
+        stats = db.writer_stats()
+        # Tiap fs event = insert fs_events + upsert file_state
+        self.assertEqual(stats["rows"], 2401)
+        self.assertLess(stats["commits"], 1201)
+        self.assertEqual(stats["queue_depth"], 0)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        writer = db.DBWriter(db.DB_PATH, max_queue=1, flush_interval=0)
+        sql = "INSERT INTO notifications_sent (target, message) VALUES (?, ?)"
+        results = [writer.submit(sql, ("t", "m")) for _ in range(50)]
+        writer.close()
+        self.assertEqual(writer.dropped, results.count(False))
+
+    def test_bad_batch_does_not_kill_writer(self):
+        writer = db.DBWriter(db.DB_PATH, flush_interval=0)
+        # paths None -> TypeError (bukan sqlite3.Error) di _insert_alerts
+        writer.submit(db._ALERT, ("1.2.3.4", 20, None, None, "raw"))
+        self.assertTrue(writer.flush())
+        writer.submit("INSERT INTO notifications_sent (target, message) VALUES (?, ?)", ("t", "m"))
+        self.assertTrue(writer.flush())
+        writer.close()
+        self.assertEqual((writer.errors, writer.rows), (1, 1))
+
+    def test_bad_row_only_drops_itself(self):
+        writer = db.DBWriter(db.DB_PATH, flush_interval=0)
+        sql = "INSERT INTO notifications_sent (target, message) VALUES (?, ?)"
+        conn = db.connect()
+        writer._commit(conn, [
+            (sql, ("t", "sebelum")),
+            (db._ALERT, ("1.2.3.4", 20, ("/a.php",), None, "raw")),
+            (sql, ("t", "ok")),
+            (sql, ("t", ["bukan", "teks"])),  # tipe parameter tidak didukung sqlite
+            (sql, ("t", "sesudah")),
+        ])
+        writer.close()
+        self.assertEqual([r[0] for r in conn.execute("SELECT message FROM notifications_sent ORDER BY id")],
+                         ["sebelum", "ok", "sesudah"])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM alert_paths").fetchone()[0], 1)
+        conn.close()
+        self.assertEqual((writer.errors, writer.failed_rows, writer.rows), (1, 1, 4))
+
+class TestFileState(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def test_migrates_legacy_database_in_place(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("CREATE TABLE fs_events (id INTEGER PRIMARY KEY, event_type TEXT, path TEXT, user TEXT, "
+                     "size INTEGER, mtime REAL, checksum TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.executemany("INSERT INTO fs_events (event_type, path, size, mtime, checksum) VALUES (?, ?, ?, ?, ?)", [
+            ("created", "a.php", 1, 1.0, "x"),
+            ("modified", "a.php", 2, 2.0, "y"),
+            ("created", "gone.php", 1, 1.0, "z"),
+            ("deleted", "gone.php", 0, 0, None),
+            ("dir_created", ".", 0, 3.0, None),
+        ])
+        conn.commit()
+        conn.close()
+
+        db.init_db()
+        conn = sqlite3.connect(db.DB_PATH)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], db.SCHEMA_VERSION)
+        indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({"idx_fs_events_path", "idx_fs_events_timestamp", "idx_ip_alerts_ip_timestamp"} <= indexes)
+        conn.close()
+        self.assertEqual(db.get_baseline(), {
+            "a.php": {"mtime": 2.0, "checksum": "y", "is_dir": False},
+            ".": {"mtime": 3.0, "checksum": None, "is_dir": True},
+        })
+
+    def test_events_upsert_file_state(self):
+        db.init_db()
+        db.log_fs_event("created", "x.php", 1, 1.0, "a")
+        db.log_fs_event("modified", "x.php", 2, 2.0, "b")
+        db.log_fs_event("created", "y.php", 1, 1.0, "c")
+        db.log_fs_event("deleted", "y.php", 0, 0, None)
+        self.assertEqual(db.get_baseline(), {"x.php": {"mtime": 2.0, "checksum": "b", "is_dir": False}})
+
+class TestAlertPaths(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def test_paths_and_user_agents_are_interned(self):
+        db.init_db()
+        for i in range(300):
+            db.log_ip_alert(f"10.0.0.{i % 3}", 20, ["/.env", f"/x{i % 5}.php", "/.env"], "raw", "zgrab/0.x")
+        db.log_ip_alert("10.0.0.9", 1, ["/ok.php"], "raw")
+        db.flush_writes()
+        conn = sqlite3.connect(db.DB_PATH)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM paths").fetchone()[0], 7)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM user_agents").fetchone()[0], 1)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM alert_paths").fetchone()[0], 601)
+        plan = " ".join(r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT alert_id FROM alert_paths WHERE path_id = 1"))
+        self.assertIn("idx_alert_paths_path", plan)
+        conn.close()
+
+        hits = db.alerts_for_path("/.env", limit=1000)
+        self.assertEqual(len(hits), 300)
+        self.assertEqual({a["ip"] for a in hits}, {"10.0.0.0", "10.0.0.1", "10.0.0.2"})
+        self.assertEqual(hits[0]["paths"], ["/.env", "/x4.php"])
+        self.assertEqual(hits[0]["user_agent"], "zgrab/0.x")
+        self.assertEqual(db.alerts_for_ip("10.0.0.9")[0]["user_agent"], None)
+        self.assertEqual(db.alerts_for_path("/missing"), [])
+
+    def test_intern_cache_limit(self):
+        db.init_db()
+        original = db.INTERN_CACHE_SIZE
+        db.INTERN_CACHE_SIZE = 2
+        try:
+            db.log_ip_alert("10.0.0.1", 20, ["/a", "/b"], "raw")
+            self.assertTrue(db.flush_writes())
+            db.log_ip_alert("10.0.0.2", 20, ["/a", "/c"], "raw")
+            self.assertTrue(db.flush_writes())
+        finally:
+            db.INTERN_CACHE_SIZE = original
+        self.assertEqual(db.alerts_for_ip("10.0.0.2")[0]["paths"], ["/a", "/c"])
+        self.assertEqual(len(db.get_writer()._ids["paths"]), 2)
+
+    def test_migration_backfills_joined_paths(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("CREATE TABLE ip_alerts (id INTEGER PRIMARY KEY, ip TEXT NOT NULL, hits INTEGER, "
+                     "paths TEXT, example_entry TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.executemany("INSERT INTO ip_alerts (ip, hits, paths, example_entry) VALUES (?, ?, ?, ?)", [
+            ("1.1.1.1", 20, "/.env,/wp-login.php", "raw"),
+            ("2.2.2.2", 20, "/.env", "raw"),
+        ])
+        conn.commit()
+        conn.close()
+
+        db.init_db()
+        self.assertEqual(sorted(a["ip"] for a in db.alerts_for_path("/.env")), ["1.1.1.1", "2.2.2.2"])
+        self.assertEqual(db.alerts_for_ip("1.1.1.1")[0]["paths"], ["/.env", "/wp-login.php"])
+        conn = sqlite3.connect(db.DB_PATH)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM ip_alerts WHERE paths IS NOT NULL").fetchone()[0], 0)
+        conn.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import threading
+import time
+import unittest
+from apache_monitor.fs_coalesce import EventCoalescer, fold
+
+class TestEventCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.done = threading.Event()
+
+    def collect(self, batch):
+        self.batches.append(sorted(batch, key=lambda e: e[1]))
+        self.done.set()
+
+    def test_fold_net_effect(self):
+        self.assertEqual(fold(None, "modified"), "modified")
+        self.assertEqual(fold("created", "modified"), "created")
+        self.assertIsNone(fold("created", "deleted"))
+        self.assertEqual(fold("deleted", "created"), "modified")
+        self.assertEqual(fold("modified", "deleted"), "deleted")
+
+    def test_burst_collapses_into_one_batch(self):
+        coalescer = EventCoalescer(self.collect, quiet_seconds=0.05, max_delay=5)
+        for i in range(5000):
+            coalescer.add("created" if i == 0 else "modified", f"/www/f{i % 50}.php")
+        coalescer.add("created", "/www/tmp.swp")
+        coalescer.add("deleted", "/www/tmp.swp")
+        self.assertTrue(self.done.wait(2))
+        coalescer.close()
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(len(self.batches[0]), 50)
+        self.assertIn(("created", "/www/f0.php"), self.batches[0])
+        self.assertIn(("modified", "/www/f1.php"), self.batches[0])
+        stats = coalescer.stats()
+        self.assertEqual((stats["received"], stats["emitted"], stats["cancelled"]), (5002, 50, 1))
+
+    def test_max_delay_bounds_busy_paths(self):
+        coalescer = EventCoalescer(self.collect, quiet_seconds=10, max_delay=0.1)
+        started = time.monotonic()
+        while not self.done.is_set() and time.monotonic() - started < 2:
+            coalescer.add("modified", "/www/busy.log")
+            time.sleep(0.01)
+        coalescer.close()
+        self.assertEqual(self.batches[0], [("modified", "/www/busy.log")])
+
+    def test_close_flushes_pending(self):
+        coalescer = EventCoalescer(self.collect, quiet_seconds=60)
+        coalescer.add("created", "/www/a.php")
+        coalescer.close()
+        self.assertEqual(self.batches, [[("created", "/www/a.php")]])
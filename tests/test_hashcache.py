@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from apache_monitor import db
+from apache_monitor.hashcache import HashCache
+from apache_monitor.retention import RetentionManager
+from apache_monitor.scan_manual import manual_scan
+
+class TestHashCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+        db.init_db()
+        self.root = os.path.join(self.tmpdir.name, "www")
+        os.makedirs(self.root)
+        for name in ("a.php", "b.html"):
+            with open(os.path.join(self.root, name), "w") as f:
+                f.write(name)
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def test_rehash_only_when_stat_changes(self):
+        cache = HashCache()
+        path = os.path.join(self.root, "a.php")
+        first = cache.checksum(path)
+        db.flush_writes()
+        self.assertEqual(cache.checksum(path), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        with open(path, "a") as f:
+            f.write("<?php system($_GET[1]);")
+        db.flush_writes()
+        self.assertNotEqual(cache.checksum(path), first)
+        self.assertEqual(cache.misses, 2)
+        self.assertIsNone(cache.checksum(self.root))
+
+    def test_miss_reuses_lookup_row(self):
+        cache = HashCache()
+        path = os.path.join(self.root, "a.php")
+        cache.checksum(path)
+        db.flush_writes()
+        with open(path, "a") as f:
+            f.write("x")
+        with mock.patch.object(cache, "_row", wraps=cache._row) as row:
+            cache.checksum(path)
+        self.assertEqual(row.call_count, 1)
+
+    def test_retention_prunes_unseen_inodes(self):
+        cache = HashCache()
+        path = os.path.join(self.root, "a.php")
+        cache.checksum(path)
+        db.flush_writes()
+        conn = db.connect()
+        conn.execute("INSERT INTO hash_cache VALUES (1, 999, 0, 0, 0, 'x', '2020-01-01 00:00:00')")
+        conn.execute("UPDATE hash_cache SET verified_at = '2020-01-01 00:00:00' WHERE ino = ?",
+                     (os.stat(path).st_ino,))
+        conn.commit()
+        # Cache hit menandai inode masih ada
+        cache.checksum(path)
+        db.flush_writes()
+        removed = RetentionManager(hash_cache_days=30, pause=0).prune_hash_cache(conn)
+        self.assertEqual(removed, 1)
+        self.assertEqual(conn.execute("SELECT ino FROM hash_cache").fetchall(), [(os.stat(path).st_ino,)])
+        conn.close()
+
+    def test_paranoid_bucket_detects_silent_change(self):
+        path = os.path.join(self.root, "a.php")
+        HashCache().checksum(path)
+        db.flush_writes()
+        st = os.stat(path)
+        with open(path, "r+") as f:
+            f.write("X")
+        # Palsukan stat: size/mtime/ctime sama seperti sebelum isi diubah
+        cache = HashCache(paranoid_buckets=1)
+        with mock.patch("apache_monitor.hashcache.os.stat", return_value=st):
+            cache.checksum(path)
+        self.assertEqual((cache.verified, cache.mismatches), (1, 1))
+
+    def test_manual_scan_reports_cache_counters(self):
+        cache = HashCache()
+        first = manual_scan(self.root, hash_cache=cache)
+        db.flush_writes()
+        second = manual_scan(self.root, hash_cache=cache)
+        self.assertEqual((first["hash_cache_hits"], first["hash_cache_misses"]), (0, 2))
+        self.assertEqual((second["hash_cache_hits"], second["hash_cache_misses"]), (2, 0))
+        self.assertEqual((first["hashed_bytes"], second["hashed_bytes"]), (first["total_bytes"], 0))
+        self.assertEqual(second["mb_per_sec"], 0)
+        self.assertEqual(second["new_files"], 0)
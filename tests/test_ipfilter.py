@@ -0,0 +1,76 @@
+import os
+import queue
+import tempfile
+import unittest
+from apache_monitor.ipfilter import IPFilter, ALLOW, BLOCK
+from apache_monitor.log_monitor import LogMonitor
+
+CONFIG = {
+    "threshold": 2,
+    "window_seconds": 60,
+    "alert_cooldown": 3600,
+    "suspicious_extensions": [".php"],
+    "dangerous_patterns": [],
+}
+
+def line(ip, second, path):
+    return f'{ip} - - [01/Nov/2025:02:34:{second:02d} +0000] "GET {path} HTTP/1.1" 404 12 "-" "curl"'
+
+class TestIPFilter(unittest.TestCase):
+    def test_longest_prefix_and_block_precedence(self):
+        f = IPFilter(allow=["10.0.0.0/8", "2001:db8::/32", "192.0.2.0/24"],
+                     block=["10.6.0.0/16", "192.0.2.0/24", "bogus"])
+        self.assertEqual(f.lookup("10.1.2.3"), (ALLOW, "10.0.0.0/8"))
+        self.assertEqual(f.lookup("10.6.2.3"), (BLOCK, "10.6.0.0/16"))
+        self.assertEqual(f.lookup("192.0.2.9"), (BLOCK, "192.0.2.0/24"))
+        self.assertEqual(f.lookup("2001:db8::1")[0], ALLOW)
+        self.assertIsNone(f.lookup("8.8.8.8"))
+        self.assertIsNone(f.lookup("not-an-ip"))
+
+    def test_reload_from_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "block.txt")
+            with open(path, "w") as fh:
+                fh.write("# known bad\n198.51.100.0/24\n")
+            f = IPFilter(block_file=path, reload_interval=0)
+            self.assertEqual(f.lookup("198.51.100.7")[0], BLOCK)
+            with open(path, "w") as fh:
+                fh.write("203.0.113.0/24\n")
+            os.utime(path, ns=(1, 1))
+            self.assertTrue(f.maybe_reload())
+            self.assertIsNone(f.lookup("198.51.100.7"))
+            self.assertEqual(f.lookup("203.0.113.1")[0], BLOCK)
+
+    def test_monitor_skips_allowed_and_alerts_blocked(self):
+        config = dict(CONFIG, ip_allowlist=["10.0.0.0/8"], ip_blocklist=["203.0.113.0/24"])
+        alerts = queue.Queue()
+        monitor = LogMonitor(config, alerts, persist_alerts=False)
+        monitor.process_lines([line("10.1.1.1", s, "/x.php") for s in range(5)])
+        monitor.process_lines([line("203.0.113.5", 1, "/index.html"), line("203.0.113.5", 2, "/a.php")])
+        self.assertEqual(monitor.ip_window.stats()["tracked_ips"], 0)
+        self.assertEqual([(a["type"], a["ip"]) for a in alerts.queue], [("blocklist_alert", "203.0.113.5")])
+
+    def test_blocklist_checked_for_every_line_in_other_formats(self):
+        config = dict(CONFIG, log_format="vhost_combined", ip_blocklist=["203.0.113.0/24"])
+        alerts = queue.Queue()
+        monitor = LogMonitor(config, alerts, persist_alerts=False)
+        monitor.process_lines(["shop.example.com:443 " + line("203.0.113.5", 1, "/index.html")])
+        self.assertEqual([(a["type"], a["example_path"]) for a in alerts.queue], [("blocklist_alert", "/index.html")])
+        self.assertEqual(monitor.match_record(line("203.0.113.6", 1, "/")), None)
+        self.assertEqual(monitor.match_record("shop.example.com:443 " + line("203.0.113.6", 1, "/"))[-1],
+                         "203.0.113.0/24")
+
+    def test_reload_rereads_inline_config(self):
+        config = dict(CONFIG, ip_blocklist=["203.0.113.0/24"])
+        monitor = LogMonitor(config, queue.Queue(), persist_alerts=False)
+        monitor.reload_ip_lists(dict(CONFIG, ip_blocklist=["198.51.100.0/24"], ip_allowlist=["10.0.0.0/8"]))
+        self.assertIsNone(monitor.ip_filter.lookup("203.0.113.5"))
+        self.assertEqual(monitor.ip_filter.lookup("198.51.100.5")[0], BLOCK)
+        self.assertEqual(monitor.ip_filter.lookup("10.0.0.1")[0], ALLOW)
+
+        monitor = LogMonitor(dict(CONFIG), queue.Queue(), persist_alerts=False)
+        monitor.reload_ip_lists(dict(CONFIG, ip_blocklist=["198.51.100.0/24"]))
+        self.assertEqual(monitor.ip_filter.lookup("198.51.100.5")[0], BLOCK)
+
+if __name__ == "__main__":
+    unittest.main()
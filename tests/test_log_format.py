@@ -0,0 +1,61 @@
+import unittest
+from datetime import datetime, timezone
+from apache_monitor.log_format import LogFormat, PRESETS
+from apache_monitor.log_monitor import LogMonitor
+
+class TestLogFormat(unittest.TestCase):
+    def test_common_preset(self):
+        fmt = LogFormat(PRESETS["common"])
+        data = fmt.parse('10.0.0.1 - frank [01/Nov/2025:02:34:12 +0000] "GET /a.php HTTP/1.0" 404 -')
+        self.assertEqual(data["ip"], "10.0.0.1")
+        self.assertEqual(data["path"], "/a.php")
+        self.assertEqual(data["status"], 404)
+        self.assertEqual(data["size"], 0)
+
+    def test_vhost_combined_preset(self):
+        fmt = LogFormat(PRESETS["vhost_combined"])
+        line = ('shop.example.com:443 10.0.0.2 - - [01/Nov/2025:02:34:12 +0000] '
+                '"POST /.env HTTP/1.1" 200 512 "-" "sqlmap/1.7 \\"x\\""')
+        data = fmt.parse(line)
+        self.assertEqual(data["vhost"], "shop.example.com")
+        self.assertEqual(data["port"], 443)
+        self.assertEqual(data["user_agent"], 'sqlmap/1.7 \\"x\\"')
+
+    def test_escaped_quote_in_request(self):
+        fmt = LogFormat(PRESETS["combined"])
+        line = ('10.0.0.4 - - [01/Nov/2025:02:34:12 +0000] '
+                '"GET /shell.php?x=\\"><script> HTTP/1.1" 200 5 "-" "curl"')
+        data = fmt.parse(line)
+        self.assertEqual(data["path"], '/shell.php?x=\\"><script>')
+        self.assertEqual(data["protocol"], "HTTP/1.1")
+        self.assertEqual(data["user_agent"], "curl")
+
+    def test_custom_format_with_duration(self):
+        fmt = LogFormat('%h %l %u %t \\"%r\\" %>s %b %D %T')
+        data = fmt.parse('10.0.0.3 - - [01/Nov/2025:02:34:12 +0000] "GET / HTTP/1.1" 200 10 1534 0')
+        self.assertEqual(data["duration_us"], 1534)
+        self.assertEqual(data["duration_s"], 0)
+        self.assertTrue(fmt.request_is_first_quoted)
+
+    def test_custom_time_without_brackets(self):
+        fmt = LogFormat('%h %{%Y-%m-%dT%H:%M:%S%z}t "%r" %>s %b')
+        data = fmt.parse('1.2.3.4 2025-11-01T02:34:56+0000 "GET /x.php HTTP/1.1" 404 12')
+        self.assertEqual(data["path"], "/x.php")
+        self.assertEqual(data["time"], datetime(2025, 11, 1, 2, 34, 56, tzinfo=timezone.utc))
+
+        # [ ] dan spasi dari LogFormat user sendiri
+        monitor = LogMonitor({"log_format": '%h [%{%d/%m/%Y %H:%M:%S %z}t] "%r" %>s %b'}, None)
+        entry = monitor.parse_line('1.2.3.4 [01/11/2025 02:34:56 +0700] "GET /x.php HTTP/1.1" 404 12')
+        self.assertEqual(entry["epoch"], int(datetime(2025, 10, 31, 19, 34, 56, tzinfo=timezone.utc).timestamp()))
+
+    def test_failures_are_counted(self):
+        monitor = LogMonitor({"log_format": "combined"}, None)
+        self.assertIsNone(monitor.parse_line("not an access log line"))
+        self.assertEqual(monitor.parse_failures, 1)
+
+    def test_unknown_preset_rejected(self):
+        with self.assertRaises(ValueError):
+            LogFormat.from_config({"log_format": "fancy"})
+
+if __name__ == "__main__":
+    unittest.main()
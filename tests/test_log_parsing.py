@@ -1,5 +1,5 @@
 import unittest
-from apache_monitor.log_monitor import LogMonitor
+from apache_monitor.log_monitor import LogMonitor, extract_request_path
 
 class TestLogParsing(unittest.TestCase):
     def setUp(self):
@@ -15,10 +15,27 @@ class TestLogParsing(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertEqual(result["ip"], "192.168.1.1")
         self.assertEqual(result["path"], "/index.php")
+        self.assertEqual(result["epoch"], 1761964452)
+        self.assertEqual(result["timestamp"].utcoffset().total_seconds(), 0)
+
+    def test_parse_keeps_timezone_offset(self):
+        line = '10.0.0.1 - - [01/Nov/2025:09:34:12 +0700] "GET / HTTP/1.1" 200 1 "-" "curl"'
+        result = self.monitor.parse_line(line)
+        self.assertEqual(result["epoch"], 1761964452)
+        self.assertEqual(result["timestamp"].hour, 9)
 
     def test_suspicious_path(self):
         self.assertTrue(self.monitor.is_suspicious_path("/test.php"))
         self.assertFalse(self.monitor.is_suspicious_path("/style.css"))
 
+    def test_extract_request_path(self):
+        line = '192.168.1.1 - - [01/Nov/2025:02:34:12 +0000] "GET /index.php?a=1 HTTP/1.1" 200 1234 "-" "Mozilla/5.0"'
+        self.assertEqual(extract_request_path(line), "/index.php?a=1")
+        line = '1.2.3.4 - - [x] "GET /a.php\\"b HTTP/1.1" 404 0 "-" "-"'
+        self.assertEqual(extract_request_path(line), '/a.php\\"b')
+        self.assertEqual(self.monitor.parse_line(line)["path"], '/a.php\\"b')
+        self.assertIsNone(extract_request_path("garbage line"))
+        self.assertIsNone(extract_request_path('1.2.3.4 - - [x] "-" 400 0 "-" "-"'))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
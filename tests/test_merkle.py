@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from apache_monitor import db
+from apache_monitor.hashcache import HashCache
+from apache_monitor.merkle import MerkleBuilder
+from apache_monitor.scanner import Scanner
+from apache_monitor.scan_manual import manual_scan
+
+class TestMerkle(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+        db.init_db()
+        self.root = os.path.join(self.tmpdir.name, "www")
+        for d in ("a/x", "a/y", "b", "empty"):
+            os.makedirs(os.path.join(self.root, d))
+        for name in ("index.php", "a/x/1.php", "a/y/2.php", "b/3.css"):
+            with open(os.path.join(self.root, name), "w") as f:
+                f.write(name)
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def digests(self):
+        builder = MerkleBuilder()
+        nodes = []
+        for record in Scanner(self.root, hash_cache=HashCache(), workers=2).scan():
+            nodes.extend(builder.add(*record))
+        nodes.extend(builder.finish())
+        self.assertEqual(nodes[-1].path, ".")
+        return {node.path: node.digest for node in nodes}
+
+    def test_change_only_propagates_to_ancestors(self):
+        before = self.digests()
+        self.assertEqual(len(before), 6)
+        self.assertEqual(self.digests(), before)
+        with open(os.path.join(self.root, "a/x/1.php"), "a") as f:
+            f.write("<?php eval($_POST[0]);")
+        after = self.digests()
+        changed = {path for path in before if before[path] != after[path]}
+        self.assertEqual(changed, {".", "a", os.path.join("a", "x")})
+
+    def test_manual_scan_reports_diverged_subtrees(self):
+        db.save_baseline_snapshot(self.root)
+        clean = manual_scan(self.root, hash_cache=HashCache())
+        self.assertEqual((clean["changed_folders"], clean["unchanged_dirs"]), ([], 6))
+
+        with open(os.path.join(self.root, "a/y/shell.php"), "w") as f:
+            f.write("<?php")
+        os.makedirs(os.path.join(self.root, "b/new"))
+        result = manual_scan(self.root, hash_cache=HashCache())
+        self.assertEqual(result["new_files"], 1)
+        self.assertEqual(result["changed_folders"], [
+            f"  • {os.path.join('a', 'y')} (diedit)",
+            f"  • {os.path.join('b', 'new')} (baru)",
+        ])
+        # a/x dan empty dilewati; root, a dan b berbeda hanya karena subfoldernya
+        self.assertEqual(result["unchanged_dirs"], 2)
+        self.assertEqual(manual_scan(self.root, hash_cache=HashCache())["changed_folders"], [])
@@ -0,0 +1,115 @@
+import queue
+import unittest
+from concurrent.futures import Future
+from apache_monitor.log_monitor import LogMonitor
+from apache_monitor.pipeline import ParsePipeline
+
+CONFIG = {
+    "threshold": 3,
+    "window_seconds": 60,
+    "alert_cooldown": 3600,
+    "suspicious_extensions": [".php"],
+    "dangerous_patterns": [],
+    "pipeline_workers": 2,
+    "pipeline_batch_lines": 5,
+}
+
+def line(ip, second, path):
+    return f'{ip} - - [01/Nov/2025:02:34:{second:02d} +0000] "GET {path} HTTP/1.1" 404 12 "-" "curl"'
+
+class TestPipeline(unittest.TestCase):
+    def test_matches_single_thread_alerts(self):
+        lines = []
+        for second in range(40):
+            lines.append(line(f"10.0.0.{second % 4}", second, "/x.php" if second % 3 else "/ok.html"))
+
+        expected = queue.Queue()
+        LogMonitor(CONFIG, expected, persist_alerts=False).process_lines(lines)
+
+        alerts = queue.Queue()
+        monitor = LogMonitor(CONFIG, alerts, persist_alerts=False)
+        pipeline = ParsePipeline.from_config(monitor)
+        for start in range(0, len(lines), 3):
+            pipeline.submit(lines[start:start + 3])
+        pipeline.close()
+
+        self.assertTrue(expected.queue)
+        key = lambda a: (a["ip"], a["hits"], a["epoch"], a["paths"])
+        self.assertEqual([key(a) for a in alerts.queue], [key(a) for a in expected.queue])
+        self.assertEqual(pipeline.stats()["lines"], len(lines))
+
+    def test_workers_report_blocklisted_ips(self):
+        config = dict(CONFIG, ip_blocklist=["203.0.113.0/24"])
+        alerts = queue.Queue()
+        monitor = LogMonitor(config, alerts, persist_alerts=False)
+        pipeline = ParsePipeline.from_config(monitor)
+        pipeline.submit([line("203.0.113.5", 1, "/index.html"), line("10.0.0.1", 2, "/ok.html")])
+        pipeline.close()
+        self.assertEqual([(a["type"], a["ip"]) for a in alerts.queue], [("blocklist_alert", "203.0.113.5")])
+
+    def test_reload_sends_new_config_to_workers(self):
+        alerts = queue.Queue()
+        monitor = LogMonitor(dict(CONFIG, ip_blocklist=["198.51.100.0/24"]), alerts, persist_alerts=False)
+        pipeline = ParsePipeline.from_config(monitor)
+        monitor.pipeline = pipeline
+        pipeline.submit([line("203.0.113.5", 1, "/index.html")])
+        pipeline.flush()
+        monitor.reload_ip_lists(dict(CONFIG, ip_blocklist=["203.0.113.0/24"]))
+        pipeline.submit([line("203.0.113.5", 2, "/index.html")])
+        pipeline.close()
+        self.assertEqual([(a["type"], a["epoch"] % 60) for a in alerts.queue], [("blocklist_alert", 2)])
+
+    def test_empty_lines_not_counted(self):
+        monitor = LogMonitor(CONFIG, queue.Queue(), persist_alerts=False)
+        pipeline = ParsePipeline.from_config(monitor)
+        pipeline.submit([line("10.0.0.1", 1, "/a.php"), ""])
+        pipeline.submit(["", line("10.0.0.1", 2, "/b.php")])
+        pipeline.close()
+        self.assertEqual(pipeline.stats()["lines"], 2)
+
+    def test_checkpoint_waits_for_aggregation(self):
+        class Store:
+            def __init__(self):
+                self.offsets = {}
+            def update(self, path, inode, offset, lines=0):
+                self.offsets[path] = offset
+            def maybe_flush(self):
+                return False
+            def flush(self):
+                pass
+
+        class FailingPool:
+            def submit(self, *args):
+                future = Future()
+                future.set_exception(RuntimeError("worker mati"))
+                return future
+            def shutdown(self):
+                pass
+
+        alerts = queue.Queue()
+        monitor = LogMonitor(CONFIG, alerts, persist_alerts=False)
+        pipeline = ParsePipeline.from_config(monitor)
+        pipeline.pool.shutdown()
+        pipeline.pool = FailingPool()
+        store = Store()
+        checkpoint = pipeline.wrap_checkpoint(store)
+
+        pipeline.submit([line("10.0.0.1", second, "/x.php") for second in range(3)])
+        checkpoint.update("access.log", 1, 300)
+        checkpoint.maybe_flush()
+        self.assertEqual(store.offsets, {})  # batch belum dikirim ke worker
+
+        pipeline.close()
+        checkpoint.flush()
+        self.assertEqual(store.offsets, {"access.log": 300})
+        # Batch gagal di worker tetap diproses di aggregator
+        self.assertEqual(pipeline.stats()["failed_batches"], 1)
+        self.assertEqual(pipeline.stats()["lines"], 3)
+        self.assertEqual([a["ip"] for a in alerts.queue], ["10.0.0.1"])
+
+    def test_disabled_without_workers(self):
+        monitor = LogMonitor(dict(CONFIG, pipeline_workers=0), queue.Queue(), persist_alerts=False)
+        self.assertIsNone(ParsePipeline.from_config(monitor))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import gzip
+import os
+import tempfile
+import unittest
+from apache_monitor.replay import collect_log_files, plan_units, scan_unit, replay, format_report
+
+CONFIG = {
+    "target_log_path": None,
+    "threshold": 3,
+    "window_seconds": 60,
+    "alert_cooldown": 3600,
+    "suspicious_extensions": [".php"],
+    "dangerous_patterns": [],
+}
+
+def line(ip, second, path):
+    return f'{ip} - - [01/Nov/2025:02:34:{second:02d} +0000] "GET {path} HTTP/1.1" 404 12 "-" "curl"\n'
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.live = os.path.join(self.tmpdir.name, "access.log")
+        self.config = dict(CONFIG, target_log_path=self.live)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_collects_rotated_files_oldest_first(self):
+        for name in ["access.log", "access.log.1", "access.log.2.gz", "access.log.bak"]:
+            open(os.path.join(self.tmpdir.name, name), "w").close()
+        names = [os.path.basename(p) for p in collect_log_files([self.live])]
+        self.assertEqual(names, ["access.log.2.gz", "access.log.1", "access.log"])
+
+    def test_byte_ranges_cover_each_line_once(self):
+        with open(self.live, "w") as f:
+            for i in range(50):
+                f.write(line("10.0.0.1", i, f"/p{i}.php"))
+        whole = scan_unit(self.config, (self.live, 0, None))
+        units = plan_units([self.live], range_bytes=333)
+        self.assertGreater(len(units), 1)
+        parts = [scan_unit(self.config, unit) for unit in units]
+        self.assertEqual(sum(p[0] for p in parts), whole[0])
+        self.assertEqual([r for p in parts for r in p[2]], whole[2])
+
+    def test_replay_reports_alerts_across_gz_and_live(self):
+        with gzip.open(self.live + ".1.gz", "wt") as f:
+            f.write(line("6.6.6.6", 1, "/a.php") + line("6.6.6.6", 2, "/b.php"))
+        with open(self.live, "w") as f:
+            f.write(line("6.6.6.6", 3, "/c.php") + line("10.0.0.2", 4, "/index.html"))
+        result = replay(self.config, workers=1)
+        self.assertEqual(result["lines"], 4)
+        self.assertEqual(result["suspicious"], 3)
+        self.assertEqual([a["ip"] for a in result["alerts"]], ["6.6.6.6"])
+
+    def test_replay_runs_detection_rules(self):
+        config = dict(self.config, detection_rules={"status_storm": {"threshold": 3}})
+        with open(self.live, "w") as f:
+            for second in range(4):
+                f.write(line("7.7.7.7", second, f"/missing{second}.html"))
+        result = replay(config, workers=1)
+        self.assertEqual(result["suspicious"], 0)
+        self.assertEqual([(a["type"], a["rule"], a["key"]) for a in result["alerts"]],
+                         [("rule_alert", "status_storm", "7.7.7.7")])
+        self.assertIn("status_storm", result["rules"])
+        self.assertIn("status_storm (ip=7.7.7.7)", format_report(result))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from apache_monitor import db
+from apache_monitor.reports import Reporter, resolve_time, format_report
+
+class TestReports(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+        db.init_db()
+        for ip, paths in (("1.1.1.1", ["/.env"]), ("1.1.1.1", ["/.env", "/wp-login.php"]), ("2.2.2.2", ["/.env"])):
+            db.log_ip_alert(ip, 20, paths, "raw")
+        db.flush_writes()
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("UPDATE ip_alerts SET timestamp = '2025-03-02 10:15:00'")
+        conn.executemany("INSERT INTO fs_events (event_type, path, size, mtime, checksum, timestamp) "
+                         "VALUES (?, ?, 0, 0, NULL, '2025-03-02 11:00:00')",
+                         [("created", "wp-content/uploads/a.php"), ("modified", "wp-content/uploads/b.php"),
+                          ("created", "index.php")])
+        # Data lama yang sudah terkena retensi: hanya tersisa rollup harian
+        conn.execute("INSERT INTO ip_alert_rollup VALUES ('day', '2025-02-01', '2.2.2.2', 5, 100)")
+        conn.execute("INSERT INTO fs_event_rollup VALUES ('day', '2025-02-01', 'wp-content/uploads', 'created', 4)")
+        conn.commit()
+        conn.close()
+        self.reporter = Reporter(cache_ttl=60)
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def test_resolve_time(self):
+        now = datetime(2025, 3, 2, 12, 0, tzinfo=timezone.utc)
+        self.assertEqual(resolve_time("90m", now), "2025-03-02 10:30:00")
+        self.assertEqual(resolve_time("7d", now), "2025-02-23 12:00:00")
+        self.assertEqual(resolve_time("2025-01-31"), "2025-01-31 00:00:00")
+        self.assertEqual(resolve_time("2025-01-31T10:00:00+07:00"), "2025-01-31 03:00:00")
+        self.assertIsNone(resolve_time(None))
+        with self.assertRaises(ValueError):
+            resolve_time("kemarin")
+
+    def test_top_ips_merges_raw_and_rollups(self):
+        self.assertEqual(self.reporter.top_ips("2025-03-01", "2025-03-03"), [("1.1.1.1", 2, 40), ("2.2.2.2", 1, 20)])
+        self.assertEqual(self.reporter.top_ips("2025-01-01", "2025-03-03"), [("2.2.2.2", 6, 120), ("1.1.1.1", 2, 40)])
+        self.assertEqual(self.reporter.top_paths("2025-03-01", "2025-03-03"),
+                         [("/.env", 3, 2), ("/wp-login.php", 1, 1)])
+        self.assertEqual(self.reporter.alerts_per_hour("2025-03-01", "2025-03-03"), [("2025-03-02 10:00", 3, 60)])
+
+    def test_rollup_boundary_mid_day(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        # Rollup per jam 2025-02-10 sudah dipangkas sampai 14:00; rollup harian hari itu utuh
+        conn.executemany("INSERT INTO ip_alert_rollup VALUES (?, ?, '3.3.3.3', ?, ?)", [
+            ("day", "2025-02-10", 10, 100), ("hour", "2025-02-10 14:00", 3, 30),
+            ("day", "2025-02-11", 4, 40), ("hour", "2025-02-11 01:00", 4, 40),
+        ])
+        conn.commit()
+        conn.close()
+        rows = dict((ip, (alerts, hits)) for ip, alerts, hits in
+                    Reporter().top_ips(since="2025-02-05", until="2025-02-20"))
+        self.assertEqual(rows["3.3.3.3"], (14, 140))
+
+    def test_fs_events_per_dir(self):
+        rows = self.reporter.fs_events_per_dir("2025-01-01", "2025-03-03")
+        self.assertEqual(rows[0], ("wp-content/uploads", 6, {"created": 5, "modified": 1}))
+        self.assertEqual(rows[1], (".", 1, {"created": 1}))
+        # Rollup (depth 2) dipotong ke depth 1; depth 3 hanya dari data mentah
+        self.assertEqual(self.reporter.fs_events_per_dir("2025-01-01", "2025-03-03", depth=1)[0],
+                         ("wp-content", 6, {"created": 5, "modified": 1}))
+        self.assertEqual(self.reporter.fs_events_per_dir("2025-01-01", "2025-03-03", depth=3)[0],
+                         ("wp-content/uploads", 2, {"created": 1, "modified": 1}))
+
+    def test_summary_includes_rollups(self):
+        summary = self.reporter.summary("2025-01-01", "2025-03-03")
+        self.assertEqual((summary["alerts"], summary["hits"], summary["unique_ips"]), (8, 160, 2))
+        self.assertEqual(summary["alerts"], sum(row[1] for row in summary["top_ips"]))
+        self.assertEqual(summary["fs_events"], {"created": 6, "modified": 1})
+
+    def test_results_are_cached(self):
+        first = self.reporter.top_ips("2025-03-01", "2025-03-03")
+        db.log_ip_alert("3.3.3.3", 99, ["/x"], "raw")
+        db.flush_writes()
+        self.assertEqual(self.reporter.top_ips("2025-03-01", "2025-03-03"), first)
+        self.assertEqual(self.reporter.stats()["cache_hits"], 1)
+        self.assertIn("1.1.1.1", format_report(Reporter(cache_ttl=0), "2025-03-01", "2025-03-03"))
+
+    def test_range_queries_use_covering_index(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        plan = " ".join(r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT ip, COUNT(*), SUM(hits) FROM ip_alerts "
+            "WHERE timestamp >= '2025' AND timestamp < '2026' GROUP BY ip"))
+        conn.close()
+        self.assertIn("COVERING INDEX idx_ip_alerts_timestamp_cover", plan)
@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from apache_monitor import db
+from apache_monitor.retention import RetentionManager, path_prefix
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def test_path_prefix(self):
+        self.assertEqual(path_prefix("wp-content/uploads/2025/x.php", 2), "wp-content/uploads")
+        self.assertEqual(path_prefix("wp-content/x.php", 2), "wp-content")
+        self.assertEqual(path_prefix("index.php", 2), ".")
+
+    def test_rollup_then_delete_in_batches(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        old = [("1.1.1.1", 10, "", "", f"2020-01-01 0{h}:15:00") for h in (1, 1, 2)]
+        conn.executemany("INSERT INTO ip_alerts (ip, hits, paths, example_entry, timestamp) VALUES (?, ?, ?, ?, ?)",
+                         old + [("2.2.2.2", 5, "", "", "2999-01-01 00:00:00")])
+        conn.executemany("INSERT INTO fs_events (event_type, path, size, mtime, checksum, timestamp) "
+                         "VALUES (?, ?, 0, 0, NULL, '2020-01-01 00:00:00')",
+                         [("modified", f"wp-content/uploads/f{i}.php") for i in range(5)])
+        conn.execute("INSERT INTO paths (id, path) VALUES (1, '/.env')")
+        conn.executemany("INSERT INTO alert_paths (alert_id, path_id) VALUES (?, 1)", [(1,), (4,)])
+        conn.commit()
+
+        manager = RetentionManager({"ip_alerts": 30, "fs_events": 30}, hourly_rollup_days=0, batch_size=2, pause=0)
+        result = manager.run_once()
+        self.assertEqual((result["ip_alerts"], result["fs_events"]), (3, 5))
+        self.assertEqual(conn.execute("SELECT ip FROM ip_alerts").fetchall(), [("2.2.2.2",)])
+        self.assertEqual(conn.execute("SELECT alert_id FROM alert_paths").fetchall(), [(4,)])
+        self.assertEqual(conn.execute(
+            "SELECT bucket, alerts, hits FROM ip_alert_rollup WHERE period = 'hour' ORDER BY bucket").fetchall(),
+            [("2020-01-01 01:00", 2, 20), ("2020-01-01 02:00", 1, 10)])
+        self.assertEqual(conn.execute(
+            "SELECT bucket, alerts, hits FROM ip_alert_rollup WHERE period = 'day'").fetchall(),
+            [("2020-01-01", 3, 30)])
+        self.assertEqual(conn.execute(
+            "SELECT path_prefix, event_type, events FROM fs_event_rollup WHERE period = 'day'").fetchall(),
+            [("wp-content/uploads", "modified", 5)])
+        conn.close()
+
+    def test_hourly_rollups_pruned_at_day_boundary(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        day = conn.execute("SELECT date('now', '-30 days')").fetchone()[0]
+        conn.executemany("INSERT INTO ip_alert_rollup VALUES ('hour', ?, '1.1.1.1', 1, 1)",
+                         [(f"{day} 00:00",), (f"{day} 23:00",)])
+        conn.commit()
+        RetentionManager(hourly_rollup_days=30).prune_hourly_rollups(conn)
+        # Hari batas tidak terpotong di tengah: semua jamnya masih ada
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM ip_alert_rollup").fetchone()[0], 2)
+        conn.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import queue
+import unittest
+from apache_monitor.log_monitor import LogMonitor
+from apache_monitor.rule_engine import HyperLogLog, RuleEngine, Rule, StatusStormRule, DistinctPathsRule
+
+LINE = '{ip} - - [01/Nov/2025:02:34:{sec:02d} +0000] "GET {path} HTTP/1.1" {status} 10 "-" "{ua}"'
+
+class TestRuleEngine(unittest.TestCase):
+    def test_hyperloglog_estimate(self):
+        hll = HyperLogLog(precision=10)
+        for i in range(5000):
+            hll.add(f"/p{i}")
+        self.assertLess(abs(hll.count() - 5000), 500)
+
+    def engine(self, rule):
+        alerts = []
+        engine = RuleEngine([rule], lambda rule, key, count, entry: alerts.append((key, entry["epoch"], count)))
+        return engine, alerts
+
+    def entry(self, epoch, ip="1.1.1.1", path="/", status=404):
+        return {"ip": ip, "user_agent": "x", "path": path, "status": status, "epoch": epoch}
+
+    def test_status_storm_window_and_cooldown(self):
+        engine, alerts = self.engine(StatusStormRule(3, window_seconds=60, cooldown=100))
+        for epoch, status in ((10, 404), (11, 200), (12, 404), (13, 404), (14, 404)):
+            engine.process(self.entry(epoch, status=status))
+        self.assertEqual(alerts, [("1.1.1.1", 13, 3)])
+        # Hit lama sudah keluar window
+        engine.process(self.entry(10, ip="2.2.2.2"))
+        engine.process(self.entry(200, ip="2.2.2.2"))
+        self.assertEqual(len(alerts), 1)
+
+    def test_distinct_paths(self):
+        engine, alerts = self.engine(DistinctPathsRule(20, window_seconds=60))
+        for i in range(30):
+            engine.process(self.entry(5, path=f"/x{i}"))
+        self.assertTrue(alerts)
+        engine.process(self.entry(5, ip="3.3.3.3", path="/same"))
+        self.assertEqual({key for key, _, _ in alerts}, {"1.1.1.1"})
+
+    def test_engine_sweeps_and_evicts_state_for_all_rules(self):
+        count = StatusStormRule(100, window_seconds=60, max_keys=2)
+        distinct = DistinctPathsRule(100, window_seconds=60, max_keys=2)
+        engine = RuleEngine([count, distinct], lambda *args: None, sweep_interval=60)
+        for i in range(3):
+            engine.process(self.entry(10, ip=f"10.0.0.{i}"))
+        # Batas dipakai bersama (2 + 2 key): state tertua dibuang
+        self.assertEqual(len(engine.state), 4)
+        self.assertEqual(count.keys + distinct.keys, 4)
+        engine.process(self.entry(500, ip="10.0.0.9"))
+        self.assertEqual((count.keys, distinct.keys), (1, 1))
+
+    def test_monitor_shares_parse_between_rules(self):
+        config = {
+            "suspicious_extensions": [".php"],
+            "dangerous_patterns": [],
+            "threshold": 3,
+            "detection_rules": {"status_storm": {"threshold": 2}, "ua_burst": {"enabled": False}},
+        }
+        alerts = queue.Queue()
+        monitor = LogMonitor(config, alerts, persist_alerts=False)
+        for sec, (path, status) in enumerate([("/a.php", 200), ("/b", 404), ("/c.php", 404), ("/d.php", 200)]):
+            monitor.process_line(LINE.format(ip="9.9.9.9", sec=sec, path=path, status=status, ua="x"))
+        types = sorted((a["type"], a.get("rule")) for a in alerts.queue)
+        self.assertEqual(types, [("ip_alert", None), ("rule_alert", "status_storm")])
+        stats = monitor.rule_stats()["rules"]
+        self.assertEqual(set(stats), {"suspicious_path", "status_storm"})
+        self.assertEqual(stats["status_storm"]["calls"], 4)
+
+    def test_rule_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Rule(1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from apache_monitor.rules import PathMatcher
+
+class TestPathMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = PathMatcher([".php", ".PHAR"], ["/\\.env", "/wp-admin/", "/upload/.*\\.php$"], cache_size=2)
+
+    def test_reports_fired_rule(self):
+        self.assertEqual(self.matcher.match("/index.php"), "ext:.php")
+        self.assertEqual(self.matcher.match("/x.phar"), "ext:.phar")
+        self.assertEqual(self.matcher.match("/.env"), "pattern:/\\.env")
+        self.assertEqual(self.matcher.match("/wp-admin/?x=1"), "pattern:/wp-admin/")
+        self.assertIsNone(self.matcher.match("/style.css"))
+
+    def test_lru_is_bounded(self):
+        for path in ["/a.css", "/b.css", "/a.css", "/c.css"]:
+            self.matcher.match(path)
+        self.assertEqual(self.matcher.stats(), {"cache_size": 2, "hits": 1, "misses": 3})
+
+    def test_uncombinable_patterns_fall_back(self):
+        matcher = PathMatcher([], ["(a)\\1", "/x/"])
+        self.assertEqual(matcher.match("/aa"), "pattern:(a)\\1")
+        self.assertEqual(matcher.match("/x/"), "pattern:/x/")
+
+    def test_backreference_after_first_pattern(self):
+        matcher = PathMatcher([], ["/x/", "(a)\\1", "(?i)/ADMIN"])
+        self.assertEqual(matcher.match("/aa"), "pattern:(a)\\1")
+        self.assertEqual(matcher.match("/admin"), "pattern:(?i)/ADMIN")
+        self.assertEqual(matcher.match("/x/"), "pattern:/x/")
+        self.assertIsNotNone(matcher._combined)
+
+if __name__ == "__main__":
+    unittest.main()
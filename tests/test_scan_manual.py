@@ -0,0 +1,107 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from apache_monitor import db
+from apache_monitor.hashcache import HashCache
+from apache_monitor.scanner import Scanner
+from apache_monitor.scan_manual import manual_scan, merge_baseline, NEW, MODIFIED, DELETED, UNCHANGED
+
+class TestStreamingScan(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+        db.init_db()
+        self.root = os.path.join(self.tmpdir.name, "www")
+        # Nama yang urutannya berbeda jika direktori tidak diurutkan sebagai "nama/"
+        for d in ("a/x", "a-b", "old/deep"):
+            os.makedirs(os.path.join(self.root, d))
+        for name in ("a/x/1.php", "a/2.php", "a-b/3.php", "a.txt", "a0", "old/deep/4.php", "old/5.php"):
+            with open(os.path.join(self.root, name), "w") as f:
+                f.write(name)
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def test_walk_order_matches_sqlite_binary_order(self):
+        walked = [rel for rel, *_ in Scanner(self.root, hash_cache=HashCache()).walk()][1:]
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE t (path TEXT PRIMARY KEY) WITHOUT ROWID")
+        conn.executemany("INSERT INTO t VALUES (?)", [(p,) for p in reversed(walked)])
+        self.assertEqual(walked, [r[0] for r in conn.execute("SELECT path FROM t ORDER BY path")])
+        self.assertLess(walked.index("a.txt"), walked.index(os.path.join("a", "2.php")))
+
+    def test_merge_baseline(self):
+        st = os.stat(self.root)
+        records = [("a", True, st, None), ("b.php", False, st, "x"), ("c.php", False, st, "y")]
+        rows = [("a", 1, 0, None, "d"), ("a/z.php", 0, 1.0, "z", None), ("c.php", 0, st.st_mtime, "old", None),
+                ("d.php", 0, 1.0, "d", None)]
+        self.assertEqual([(status, path) for status, path, _, _ in merge_baseline(records, rows)], [
+            (UNCHANGED, "a"), (DELETED, "a/z.php"), (NEW, "b.php"), (MODIFIED, "c.php"), (DELETED, "d.php"),
+        ])
+
+    def test_manual_scan_detects_deletions(self):
+        db.save_baseline_snapshot(self.root)
+        shutil.rmtree(os.path.join(self.root, "old"))
+        os.remove(os.path.join(self.root, "a", "2.php"))
+        with open(os.path.join(self.root, "a-b", "new.php"), "w") as f:
+            f.write("<?php")
+        result = manual_scan(self.root, hash_cache=HashCache())
+        self.assertEqual((result["new_files"], result["modified_files"]), (1, 0))
+        self.assertEqual((result["deleted_files"], result["deleted_dirs"]), (3, 2))
+        self.assertEqual(result["changed_folders"], ["  • a (diedit)", "  • a-b (diedit)", "  • old (dihapus)"])
+        self.assertNotIn("old/5.php", db.get_baseline())
+
+        again = manual_scan(self.root, hash_cache=HashCache())
+        self.assertEqual((again["deleted_files"], again["new_files"], again["changed_folders"]), (0, 0, []))
+        self.assertEqual(again["unchanged_dirs"], again["total_dirs"])
+
+    def test_iter_children_skips_subtrees(self):
+        db.save_baseline_snapshot(self.root)
+        conn = db.connect()
+        try:
+            self.assertEqual([row[0] for row in db.iter_children(conn, ".")], ["a", "a-b", "a.txt", "a0", "old"])
+            self.assertEqual([row[0] for row in db.iter_children(conn, "a")],
+                             [os.path.join("a", "2.php"), os.path.join("a", "x")])
+            self.assertEqual(len(list(db.iter_subtree(conn, "old"))), 3)
+        finally:
+            conn.close()
+
+    def test_unchanged_subtree_is_not_compared(self):
+        db.save_baseline_snapshot(self.root)
+        db.flush_writes()
+        # Baris file di subtree yang digest-nya sama tidak dibaca sama sekali
+        conn = sqlite3.connect(db.DB_PATH)
+        with conn:
+            conn.execute("UPDATE file_state SET checksum = 'stale' WHERE path = ?", (os.path.join("old", "5.php"),))
+        conn.close()
+        with open(os.path.join(self.root, "a0"), "a") as f:
+            f.write("x")
+        result = manual_scan(self.root, hash_cache=HashCache())
+        self.assertEqual((result["modified_files"], result["changed_folders"]), (1, ["  • (root) (diedit)"]))
+        self.assertEqual(result["unchanged_dirs"], result["total_dirs"] - 1)
+
+    def test_unreadable_directory_keeps_baseline(self):
+        db.save_baseline_snapshot(self.root)
+        unreadable = os.path.join(self.root, "a")
+        scandir = os.scandir
+
+        def failing_scandir(path):
+            if path == unreadable:
+                raise PermissionError(13, "Permission denied", path)
+            return scandir(path)
+
+        with mock.patch("os.scandir", failing_scandir):
+            result = manual_scan(self.root, hash_cache=HashCache())
+        self.assertEqual((result["deleted_files"], result["deleted_dirs"], result["unreadable_dirs"]), (0, 0, 1))
+        self.assertEqual(result["changed_folders"], [])
+        self.assertIn(os.path.join("a", "x", "1.php"), db.get_baseline())
+
+        again = manual_scan(self.root, hash_cache=HashCache())
+        self.assertEqual((again["new_files"], again["deleted_files"], again["changed_folders"]), (0, 0, []))
+        self.assertEqual(again["unchanged_dirs"], again["total_dirs"])
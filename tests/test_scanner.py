@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from apache_monitor import db
+from apache_monitor.hashcache import HashCache
+from apache_monitor.scanner import Scanner
+from apache_monitor.scan_manual import manual_scan
+from apache_monitor.utils import sha256sum
+
+class TestScanner(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "alerts.db")
+        db.init_db()
+        self.root = os.path.join(self.tmpdir.name, "www")
+        for d in ("", "wp-content/uploads", "assets"):
+            os.makedirs(os.path.join(self.root, d), exist_ok=True)
+        for i, name in enumerate(("index.php", "wp-content/x.php", "wp-content/uploads/a.jpg", "assets/app.js")):
+            with open(os.path.join(self.root, name), "wb") as f:
+                f.write(os.urandom(1000 * (i + 1)))
+        os.symlink(os.path.join(self.root, "assets"), os.path.join(self.root, "link"))
+
+    def tearDown(self):
+        db.close_writer()
+        db.DB_PATH = self.original
+        self.tmpdir.cleanup()
+
+    def test_scan_matches_os_walk(self):
+        scanner = Scanner(self.root, hash_cache=HashCache(), workers=3, max_inflight=2)
+        results = {rel: (is_dir, checksum) for rel, is_dir, st, checksum in scanner.scan()}
+        expected = {".": (True, None)}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for d in dirnames:
+                if not os.path.islink(os.path.join(dirpath, d)):
+                    expected[os.path.relpath(os.path.join(dirpath, d), self.root)] = (True, None)
+            for f in filenames:
+                path = os.path.join(dirpath, f)
+                expected[os.path.relpath(path, self.root)] = (False, sha256sum(path))
+        self.assertEqual(results, expected)
+        stats = scanner.stats()
+        self.assertEqual((stats["files"], stats["dirs"], stats["bytes"]), (4, 4, 10000))
+        self.assertEqual(stats["hashed_bytes"], 10000)
+        self.assertGreater(stats["files_per_sec"], 0)
+
+    def test_manual_scan_against_streamed_baseline(self):
+        snapshot = db.save_baseline_snapshot(self.root, workers=2)
+        self.assertEqual(snapshot["files"], 4)
+        with open(os.path.join(self.root, "wp-content/uploads/shell.php"), "w") as f:
+            f.write("<?php")
+        with open(os.path.join(self.root, "index.php"), "ab") as f:
+            f.write(b"x")
+        result = manual_scan(self.root, hash_cache=HashCache(), workers=2)
+        self.assertEqual((result["new_files"], result["modified_files"], result["total_files"]), (1, 1, 5))
+        self.assertIn("  • wp-content/uploads (diedit)", result["changed_folders"])
+        self.assertIn("mb_per_sec", result)
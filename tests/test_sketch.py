@@ -0,0 +1,29 @@
+import unittest
+from apache_monitor.sketch import SketchDetector, WindowedCountMin
+
+class TestSketch(unittest.TestCase):
+    def test_count_min_window_expiry(self):
+        cms = WindowedCountMin(60, width=1024, depth=4, buckets=6)
+        for t in range(5):
+            cms.add("1.1.1.1", 100 + t)
+        self.assertEqual(cms.estimate("1.1.1.1"), 5)
+        cms.add("2.2.2.2", 200)
+        self.assertEqual(cms.estimate("1.1.1.1"), 0)
+
+    def test_detector_threshold_and_cooldown(self):
+        detector = SketchDetector(60, 3, cooldown=100, width=1024, top_k=2)
+        self.assertIsNone(detector.add("6.6.6.6", 10, "/a.php", "r1"))
+        self.assertIsNone(detector.add("6.6.6.6", 11, "/b.php", "r2"))
+        hits, paths, raw = detector.add("6.6.6.6", 12, "/a.php", "r3")
+        self.assertEqual((hits, paths, raw), (3, ["/a.php", "/b.php"], "r3"))
+        self.assertIsNone(detector.add("6.6.6.6", 13, "/c.php", "r4"))
+        self.assertEqual(detector.heavy_hitters(1), [("6.6.6.6", 4)])
+
+    def test_top_k_is_bounded(self):
+        detector = SketchDetector(60, 100, width=4096, top_k=10)
+        for i in range(1000):
+            detector.add(f"10.0.{i // 256}.{i % 256}", 5, "/x.php", "")
+        self.assertLessEqual(len(detector.candidates), 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import random
+import unittest
+from apache_monitor.iptrie import PrefixTrie, parse_cidr, parse_ip
+from apache_monitor.subnet import SubnetCounter
+
+class TestSubnet(unittest.TestCase):
+    def test_longest_match(self):
+        trie = PrefixTrie(32)
+        for value, cidr in enumerate(["10.0.0.0/8", "10.1.0.0/16"]):
+            _, prefix, length = parse_cidr(cidr)
+            trie.insert(prefix, length, value)
+        self.assertEqual(trie.longest_match(parse_ip("10.1.2.3")[1]), 1)
+        self.assertEqual(trie.longest_match(parse_ip("10.2.2.3")[1]), 0)
+        self.assertIsNone(trie.longest_match(parse_ip("192.168.0.1")[1]))
+
+    def test_subnet_threshold_across_ips(self):
+        counter = SubnetCounter(60, 5, prefixes={"ipv4": [24, 16], "ipv6": [64]}, cooldown=100)
+        alerts = []
+        for i in range(5):
+            alerts.extend(counter.add(f"203.0.113.{i + 1}", 10 + i))
+        self.assertEqual(sorted(alerts), [("203.0.0.0/16", 5), ("203.0.113.0/24", 5)])
+        # Masih cooldown
+        self.assertEqual(counter.add("203.0.113.9", 16), [])
+        self.assertEqual(counter.add("2001:db8::1", 16), [])
+
+    def test_window_expiry_and_compaction(self):
+        counter = SubnetCounter(60, 3, prefixes={"ipv4": [24]}, max_nodes=100)
+        for i in range(50):
+            counter.add(f"10.{i}.0.1", 10)
+        self.assertGreater(counter.stats()["trie_nodes"], 100)
+        counter.add("192.0.2.1", 200)
+        self.assertEqual(counter.stats()["compactions"], 1)
+        self.assertEqual(counter.add("10.1.0.2", 201), [])
+        self.assertEqual(counter.add("192.0.2.2", 201), [])
+        self.assertEqual(counter.add("192.0.2.3", 202), [("192.0.2.0/24", 3)])
+
+    def test_ipv6_churn_evicts_instead_of_compacting_every_bucket(self):
+        rnd = random.Random(1)
+        counter = SubnetCounter(60, 1000, prefixes={"ipv6": [64]}, max_nodes=3000)
+        for second in range(300):
+            for _ in range(3):
+                counter.add("2001:db8:%x:%x::1" % (rnd.getrandbits(16), rnd.getrandbits(16)), second)
+        stats = counter.stats()
+        # 30 bucket; prefix aktif butuh jauh lebih dari max_nodes node
+        self.assertGreater(stats["evicted_prefixes"], 0)
+        self.assertLessEqual(stats["compactions"], 15)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from apache_monitor.tailer import TailedFile, MultiTailer
+from apache_monitor.checkpoint import CheckpointStore
+
+class TestTailer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "access.log")
+        self.lines = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_partial_line_carried_over(self):
+        with open(self.path, "w") as f:
+            f.write("line1\nline2\npart")
+        tf = TailedFile(self.path, chunk_size=4)
+        tf.open()
+        tf.read_available(self.lines.extend)
+        self.assertEqual(self.lines, ["line1", "line2"])
+        self.assertEqual(tf.offset, 12)
+
+        with open(self.path, "a") as f:
+            f.write("ial\n")
+        tf.read_available(self.lines.extend)
+        tf.close()
+        self.assertEqual(self.lines, ["line1", "line2", "partial"])
+        self.assertEqual(tf.lines_total, 3)
+
+    def test_glob_picks_up_new_files(self):
+        pattern = os.path.join(self.tmpdir.name, "*.log")
+        tailer = MultiTailer(pattern, self.lines.extend, use_inotify=False)
+        with open(os.path.join(self.tmpdir.name, "a.log"), "w") as f:
+            f.write("a1\n")
+        tailer._rescan()
+        for tf in list(tailer.files.values()):
+            tailer._service(tf)
+        with open(os.path.join(self.tmpdir.name, "b.log"), "w") as f:
+            f.write("b1\n")
+        tailer._rescan()
+        for tf in list(tailer.files.values()):
+            tailer._service(tf)
+            tailer._close(tf)
+        self.assertEqual(sorted(self.lines), ["a1", "b1"])
+        self.assertEqual(len(tailer.files), 2)
+
+    def test_resume_drains_rotated_predecessor(self):
+        cp_path = os.path.join(self.tmpdir.name, "cp.json")
+        with open(self.path, "w") as f:
+            f.write("old1\n")
+        tailer = MultiTailer(self.path, self.lines.extend, use_inotify=False,
+                             checkpoint=CheckpointStore(cp_path))
+        tailer._rescan()
+        tailer._service(tailer.files[self.path])
+        tailer._close(tailer.files[self.path])
+        tailer.checkpoint.flush()
+
+        # Rotasi terjadi saat monitor mati
+        with open(self.path, "a") as f:
+            f.write("old2\n")
+        os.rename(self.path, self.path + ".1")
+        with open(self.path, "w") as f:
+            f.write("new1\n")
+
+        tailer = MultiTailer(self.path, self.lines.extend, use_inotify=False,
+                             checkpoint=CheckpointStore(cp_path))
+        tailer._rescan()
+        tailer._service(tailer.files[self.path])
+        tailer._close(tailer.files[self.path])
+        self.assertEqual(self.lines, ["old1", "old2", "new1"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from apache_monitor.window import IPWindowStore
+
+class TestIPWindowStore(unittest.TestCase):
+    def test_expire_and_paths(self):
+        store = IPWindowStore(60)
+        store.add("1.1.1.1", 100, "/a.php", "raw1")
+        store.add("1.1.1.1", 130, "/b.php", "raw2")
+        store.add("1.1.1.1", 150, "/a.php", "raw3")
+        self.assertEqual(store.expire("1.1.1.1", 150), 3)
+        self.assertEqual(store.paths_for("1.1.1.1"), ["/a.php", "/b.php"])
+        self.assertEqual(store.expire("1.1.1.1", 170), 2)
+        self.assertEqual(store.last_raw("1.1.1.1"), "raw3")
+        self.assertEqual(store.stats()["entries"], 2)
+
+    def test_caps_and_idle_sweep(self):
+        store = IPWindowStore(60, cooldown=100, max_ips=2, max_hits_per_ip=2, sweep_interval=30)
+        store.add("a", 0, "/x", "")
+        store.add("b", 0, "/x", "")
+        store.add("c", 0, "/x", "")
+        self.assertNotIn("a", store)
+        self.assertEqual(store.evicted_ips, 1)
+        for t in range(3):
+            store.add("c", t, "/x", "")
+        self.assertEqual(store.hits("c"), 2)
+
+        store.mark_alerted("c", 0)
+        store.add("d", 200, "/y", "")
+        self.assertEqual(list(store._ips), ["d"])
+        self.assertEqual(store.stats()["alerted_ips"], 0)
+
+    def test_from_config_keeps_cap_above_threshold(self):
+        store = IPWindowStore.from_config({"threshold": 2000, "window_max_hits_per_ip": 1024, "window_max_paths": 5})
+        self.assertEqual((store.max_hits_per_ip, store.max_paths), (2000, 5))
+        for t in range(2000):
+            store.add("a", t, "/x", "")
+        self.assertEqual(store.hits("a"), 2000)
+
+if __name__ == "__main__":
+    unittest.main()